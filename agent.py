@@ -2,15 +2,28 @@
 文化の森お出かけパス 施設休館情報エージェント
 Amazon Bedrock AgentCore + Strands Agent
 """
+import asyncio
 import os
 import json
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from strands import Agent, tool
-from bedrock_agentcore.memory.integrations.strands.config import AgentCoreMemoryConfig, RetrievalConfig
-from bedrock_agentcore.memory.integrations.strands.session_manager import AgentCoreMemorySessionManager
-from bedrock_agentcore.runtime import BedrockAgentCoreApp
+from typing import Any, Dict
 from facility_scraper import FacilityScraper
 from config import REGION, MODEL_ID, FACILITIES
+from charset_resolver import decode_response
+from text_normalizer import normalize_text
+from prompts import AGENT_SYSTEM_PROMPT
+from prompt_cache import prompt_cache_stats
+from model_invoker import model_invoker
+from deadline import Deadline, current_deadline, deadline_scope, timeout_for
+from tool_results import compact_closure, compact_summary, diagnostics_store
+from closure_models import Verdict, dumps
+from closure_patterns import (
+    MONTH_LINE_PATTERN, DAY_WITH_WEEKDAY_PATTERN, DAY_RANGE_WITH_WEEKDAY_PATTERN,
+    CRAFT_HOLIDAYS_PATTERN, ISO_DATE_LITERAL_PATTERN, closure_scanner
+)
 # Simple holiday checker replacement for GitHub publication
 class SimpleHolidayChecker:
     def is_national_holiday(self, date_str):
@@ -19,8 +32,8 @@ class SimpleHolidayChecker:
 
 holiday_checker = SimpleHolidayChecker()
 
-# AgentCoreアプリケーションの初期化
-app = BedrockAgentCoreApp()
+# AgentCoreアプリケーション（strands・bedrock_agentcore の読み込みは get_app() まで遅延）
+_app = None
 
 MEMORY_ID = os.getenv("BEDROCK_AGENTCORE_MEMORY_ID")
 current_session = None
@@ -29,46 +42,62 @@ current_session = None
 scraper = FacilityScraper()
 print("✅ Facility scraper initialized")
 
-@tool
-def check_facility_closure(facility_name: str, date: str) -> str:
-    """指定した施設の指定日の休館情報を確認します
+def facility_closure_verdict(facility_name: str, date: str) -> Verdict:
+    """指定した施設の指定日の休館判定
+    
+    施設別判定（公式データ・カレンダー解析）がある施設はその結果を、それ以外はスクレイパーの結果を返す。
     
     Args:
         facility_name: 施設名（例: "石川県立美術館"）
         date: 確認したい日付（例: "2025-01-15", "1月15日", "明日"）
     
     Returns:
-        施設の休館情報（JSON形式の文字列）
+        判定結果
     """
+    normalized_date = date
     try:
         # 日付の正規化
         normalized_date = _normalize_date(date)
         
         # 施設別特別処理
         if "鈴木大拙館" in facility_name or "大拙館" in facility_name:
-            return _get_daisetz_closure_info_from_official_site(normalized_date)
+            result = _get_daisetz_closure_info_from_official_site(normalized_date)
         elif "国立工芸館" in facility_name or "工芸館" in facility_name:
-            return _get_craft_museum_closure_info_from_calendar(normalized_date)
+            result = _get_craft_museum_closure_info_from_calendar(normalized_date)
         elif "石川四高記念文化交流館" in facility_name or "四高記念" in facility_name or "文化交流館" in facility_name:
-            return _get_shiko_closure_info_from_official_site(normalized_date)
+            result = _get_shiko_closure_info_from_official_site(normalized_date)
         elif "金沢市老舗記念館" in facility_name or "老舗記念館" in facility_name:
-            return _get_shinise_closure_info_with_official_data(normalized_date)
+            result = _get_shinise_closure_info_with_official_data(normalized_date)
         elif "金沢くらしの博物館" in facility_name or "くらしの博物館" in facility_name:
-            return _get_kurashi_closure_info_with_image_data(normalized_date)
+            result = _get_kurashi_closure_info_with_image_data(normalized_date)
         elif "金沢市立中村記念美術館" in facility_name or "中村記念美術館" in facility_name:
-            return _get_nakamura_closure_info_with_image_data(normalized_date)
+            result = _get_nakamura_closure_info_with_image_data(normalized_date)
         elif "前田土佐守家資料館" in facility_name or "土佐守家資料館" in facility_name:
-            return _get_maedatosa_closure_info_with_holiday_check(normalized_date)
+            result = _get_maedatosa_closure_info_with_holiday_check(normalized_date)
         elif "成巽閣" in facility_name or "せいそんかく" in facility_name:
-            return _get_seisonkaku_closure_info_with_holiday_check(normalized_date)
+            result = _get_seisonkaku_closure_info_with_holiday_check(normalized_date)
         elif "金沢能楽美術館" in facility_name or "能楽美術館" in facility_name:
-            return _get_noh_museum_closure_info_from_reservation_page(normalized_date)
+            result = _get_noh_museum_closure_info_from_reservation_page(normalized_date)
+        else:
+            return scraper.get_facility_verdict(facility_name, normalized_date)
         
-        result = scraper.get_facility_closure_info(facility_name, normalized_date)
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        # 施設別判定の JSON をスクレイパーと同じ判定結果の形にそろえる
+        return Verdict.from_dict(json.loads(result), facility_name, normalized_date)
         
     except Exception as e:
-        return json.dumps({"error": f"エラーが発生しました: {str(e)}"}, ensure_ascii=False)
+        return Verdict(facility_name, normalized_date, error=f"エラーが発生しました: {str(e)}")
+
+def get_facility_closure_detail(facility_name: str, date: str) -> str:
+    """指定した施設の指定日の休館情報（判定の根拠・診断用フィールドを含む詳細）
+    
+    Args:
+        facility_name: 施設名（例: "石川県立美術館"）
+        date: 確認したい日付（例: "2025-01-15", "1月15日", "明日"）
+    
+    Returns:
+        施設の休館情報（JSON形式の文字列）
+    """
+    return dumps(facility_closure_verdict(facility_name, date))
 
 def _get_shinise_closure_info_with_official_data(date_str: str) -> str:
     """金沢市老舗記念館の公式データ統合による休館情報（画像解析併用）"""
@@ -726,47 +755,33 @@ def _get_daisetz_closure_info_from_official_site(date_str: str) -> str:
             session.mount('https://', SSLAdapter())
             
             # サイトにアクセス
-            response = session.get(url, timeout=30)
+            response = session.get(url, timeout=timeout_for(30))
             response.raise_for_status()
             
-            # 複数のエンコーディングを試行
-            encodings = ['utf-8', 'shift_jis', 'euc-jp', 'iso-2022-jp', 'cp932']
-            html_content = None
-            
-            for encoding in encodings:
-                try:
-                    html_content = response.content.decode(encoding)
-                    break
-                except UnicodeDecodeError:
-                    continue
-            
-            if not html_content:
-                # エラーを無視して強制デコード
-                html_content = response.content.decode('utf-8', errors='ignore')
-            
+            # 文字コード判定（ホスト単位で記憶されるため2回目以降は1回でデコード）
+            html_content = decode_response(response)
+
             # HTMLを解析
             soup = BeautifulSoup(html_content, 'html.parser')
-            page_text = soup.get_text()
+            page_text = normalize_text(soup.get_text())
             
             # 特別な休館日パターンを解析（例: "10月 4(土)-10(金),14(火),20(月),28(火)"）
             is_mentioned_as_closed = False
             closure_context = ""
             
             # 対象月の休館日リストを検索
-            import re
-            # より正確なパターンで10月の休館日情報を取得
-            month_pattern = rf'{target_date.month}月\s+([^\n]+)'
-            month_matches = re.findall(month_pattern, page_text)
+            month_matches = [
+                month_info for month, month_info in MONTH_LINE_PATTERN.findall(page_text)
+                if int(month) == target_date.month
+            ]
             
             for month_info in month_matches:
                 # 日付パターンを解析（例: "4(土)-10(金),14(火),20(月),28(火)"）
                 # 個別の日付を抽出
-                day_pattern = r'(\d{1,2})\([月火水木金土日]\)'
-                days = re.findall(day_pattern, month_info)
+                days = DAY_WITH_WEEKDAY_PATTERN.findall(month_info)
                 
                 # 範囲指定を解析（例: "4(土)-10(金)"）
-                range_pattern = r'(\d{1,2})\([月火水木金土日]\)-(\d{1,2})\([月火水木金土日]\)'
-                ranges = re.findall(range_pattern, month_info)
+                ranges = DAY_RANGE_WITH_WEEKDAY_PATTERN.findall(month_info)
                 
                 # 全ての休館日を収集
                 closure_days = set()
@@ -805,31 +820,32 @@ def _get_daisetz_closure_info_from_official_site(date_str: str) -> str:
                     "展示替", "展示替え", "メンテナンス", "設備点検", "工事", "整備"
                 ]
                 
-                # 日付パターンと休館キーワードの組み合わせをチェック
+                # ページを1回だけ走査し、日付の前後5行にあるキーワードを位置情報から判定
+                hits = closure_scanner.scan(page_text)
+                lines = page_text.split('\n')
+                line_starts = [0]
+                for line in lines[:-1]:
+                    line_starts.append(line_starts[-1] + len(line) + 1)
+                
                 for pattern in date_patterns:
-                    if pattern in page_text:
-                        # 該当日付の前後の文脈を詳細にチェック
-                        lines = page_text.split('\n')
-                        for i, line in enumerate(lines):
-                            if pattern in line:
-                                # 前後5行の文脈をチェック（より広範囲）
-                                context_lines = []
-                                for j in range(max(0, i-5), min(len(lines), i+6)):
-                                    context_lines.append(lines[j].strip())
-                                context = ' '.join(context_lines)
-                                
-                                # 休館キーワードが含まれているかチェック
-                                for keyword in closure_keywords:
-                                    if keyword in context:
-                                        is_mentioned_as_closed = True
-                                        closure_context = f"公式サイトに「{keyword}」として記載"
-                                        break
-                                
-                                if is_mentioned_as_closed:
-                                    break
+                    pos = page_text.find(pattern)
+                    while pos != -1 and not is_mentioned_as_closed:
+                        line_no = hits.line_of(pos)
+                        window_start = line_starts[max(0, line_no - 5)]
+                        window_end_line = min(len(lines), line_no + 6)
+                        window_end = line_starts[window_end_line] if window_end_line < len(lines) else len(page_text)
                         
-                        if is_mentioned_as_closed:
-                            break
+                        # 休館キーワードが含まれているかチェック（リスト順で最初のもの）
+                        for keyword in closure_keywords:
+                            if any(window_start <= hit < window_end for hit in hits.get(keyword)):
+                                is_mentioned_as_closed = True
+                                closure_context = f"公式サイトに「{keyword}」として記載"
+                                break
+                        
+                        pos = page_text.find(pattern, pos + 1)
+                    
+                    if is_mentioned_as_closed:
+                        break
             
             # 祝日情報を取得
             is_holiday, holiday_name = holiday_checker.is_national_holiday(date_str)
@@ -948,7 +964,6 @@ def _get_craft_museum_closure_info_from_calendar(date_str: str) -> str:
         from dateutil.parser import parse
         import requests
         from bs4 import BeautifulSoup
-        import re
         
         target_date = parse(date_str)
         weekday_jp = ["月曜日", "火曜日", "水曜日", "木曜日", "金曜日", "土曜日", "日曜日"]
@@ -962,9 +977,9 @@ def _get_craft_museum_closure_info_from_calendar(date_str: str) -> str:
             # SSL証明書の検証を無効化
             import urllib3
             urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-            response = requests.get(url, timeout=10, verify=False)
+            response = requests.get(url, timeout=timeout_for(10), verify=False)
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = BeautifulSoup(decode_response(response), 'html.parser')
             
             # JavaScript内のholidays配列を解析
             script_elements = soup.find_all('script')
@@ -974,27 +989,18 @@ def _get_craft_museum_closure_info_from_calendar(date_str: str) -> str:
                 if script.string:
                     js_content += script.string + "\n"
             
-            # holidays配列を検索
-            holiday_patterns = [
-                r'holidays\s*:\s*\[(.*?)\]',
-                r'"holidays"\s*:\s*\[(.*?)\]',
-                r'holidays\s*=\s*\[(.*?)\]'
+            # holidays配列を検索（3種類の書き方を1回の走査で）
+            holidays_data = [
+                next(group for group in groups if group)
+                for groups in CRAFT_HOLIDAYS_PATTERN.findall(js_content)
+                if any(groups)
             ]
             
-            holidays_data = []
-            for pattern in holiday_patterns:
-                matches = re.findall(pattern, js_content, re.DOTALL)
-                if matches:
-                    holidays_data.extend(matches)
-            
             # 休館日リストを抽出
             all_holidays = set()
-            if holidays_data:
-                for holiday_str in holidays_data:
-                    # 日付パターンを抽出（YYYY-MM-DD形式）
-                    date_pattern = r'"(\d{4}-\d{2}-\d{2})"'
-                    dates = re.findall(date_pattern, holiday_str)
-                    all_holidays.update(dates)
+            for holiday_str in holidays_data:
+                # 日付パターンを抽出（YYYY-MM-DD形式）
+                all_holidays.update(ISO_DATE_LITERAL_PATTERN.findall(holiday_str))
             
             # 対象日付が休館日リストに含まれているかチェック
             target_date_str = target_date.strftime('%Y-%m-%d')
@@ -1107,16 +1113,15 @@ def _get_shiko_closure_info_from_official_site(date_str: str) -> str:
             # SSL証明書の検証を無効化
             import urllib3
             urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-            response = requests.get(url, timeout=10, verify=False)
+            response = requests.get(url, timeout=timeout_for(10), verify=False)
             response.raise_for_status()
             
-            # 文字コードを明示的に指定
-            response.encoding = 'utf-8'
-            html_content = response.text
+            # 文字コード判定
+            html_content = decode_response(response)
             soup = BeautifulSoup(html_content, 'html.parser')
             
             # HTMLソースとテキスト両方で「【全館休館中】」を検索
-            page_text = soup.get_text()
+            page_text = normalize_text(soup.get_text())
             
             # 全館休館中の文言をチェック（HTMLソースも含む）
             closure_keywords = ["【全館休館中】", "全館休館中", "全館休館", "休館中"]
@@ -1374,54 +1379,93 @@ def _get_maedatosa_closure_info_with_holiday_check(date_str: str) -> str:
             "date": date_str
         }, ensure_ascii=False)
 
-@tool
-def check_all_facilities_closure(date: str) -> str:
-    """全施設の指定日の休館情報を一括確認します
+def all_facilities_closure_summary(date: str) -> Dict[str, Any]:
+    """全施設の指定日の休館判定と件数
     
     Args:
         date: 確認したい日付（例: "2025-01-15", "1月15日", "明日"）
     
     Returns:
-        全施設の休館情報（JSON形式の文字列）
+        date・件数・休館/開館施設名と、施設ごとの判定結果（details、Verdict のリスト）
     """
     try:
         # 日付の正規化
         normalized_date = _normalize_date(date)
         
         # 各施設に対して個別の特別処理を適用
-        results = []
-        for facility_name in FACILITIES:
-            try:
-                # check_facility_closureを使って各施設の正確な情報を取得
-                facility_result_str = check_facility_closure(facility_name, normalized_date)
-                facility_result = json.loads(facility_result_str)
-                results.append(facility_result)
-            except Exception as e:
-                # 個別施設でエラーが発生した場合はフォールバック
-                fallback_result = scraper.get_facility_closure_info(facility_name, normalized_date)
-                results.append(fallback_result)
-        
-        # サマリー情報を追加
-        total_facilities = len(results)
-        closed_facilities = [r for r in results if r.get("is_closed", False)]
-        open_facilities = [r for r in results if not r.get("is_closed", False)]
-        
-        summary = {
+        verdicts = [facility_closure_verdict(facility_name, normalized_date) for facility_name in FACILITIES]
+        
+        closed_facilities = [v.facility for v in verdicts if v.is_closed]
+        open_facilities = [v.facility for v in verdicts if not v.is_closed]
+        
+        return {
             "date": normalized_date,
-            "total_facilities": total_facilities,
+            "total_facilities": len(verdicts),
             "closed_count": len(closed_facilities),
             "open_count": len(open_facilities),
-            "closed_facilities": [f["facility"] for f in closed_facilities if "facility" in f],
-            "open_facilities": [f["facility"] for f in open_facilities if "facility" in f],
-            "details": results
+            "closed_facilities": closed_facilities,
+            "open_facilities": open_facilities,
+            "details": verdicts
         }
         
-        return json.dumps(summary, ensure_ascii=False, indent=2)
-        
     except Exception as e:
-        return json.dumps({"error": f"エラーが発生しました: {str(e)}"}, ensure_ascii=False)
+        return {"error": f"エラーが発生しました: {str(e)}"}
+
+def get_all_facilities_closure_detail(date: str) -> str:
+    """全施設の指定日の休館情報（施設ごとの詳細を含む）
+    
+    Args:
+        date: 確認したい日付（例: "2025-01-15", "1月15日", "明日"）
+    
+    Returns:
+        全施設の休館情報（JSON形式の文字列）
+    """
+    return dumps(all_facilities_closure_summary(date))
+
+def check_facility_closure(facility_name: str, date: str) -> str:
+    """指定した施設の指定日の休館情報を確認します
+    
+    Args:
+        facility_name: 施設名（例: "石川県立美術館"）
+        date: 確認したい日付（例: "2025-01-15", "1月15日", "明日"）
+    
+    Returns:
+        判定結果（JSON形式の文字列）: verdict（open/closed/unknown）、reason、confidence、source、
+        as_of と、判定の根拠を get_closure_diagnostics で取得するための diagnostics_id
+    """
+    return dumps(compact_closure(facility_closure_verdict(facility_name, date)))
+
+def check_all_facilities_closure(date: str) -> str:
+    """全施設の指定日の休館情報を一括確認します
+    
+    Args:
+        date: 確認したい日付（例: "2025-01-15", "1月15日", "明日"）
+    
+    Returns:
+        判定結果（JSON形式の文字列）: 休館施設（理由・信頼度・情報源つき）、開館施設名、判定できなかった施設、
+        as_of と diagnostics_id
+    """
+    summary = all_facilities_closure_summary(date)
+    if "error" in summary:
+        return dumps(summary)
+    return dumps(compact_summary(summary))
+
+def get_closure_diagnostics(diagnostics_id: str) -> str:
+    """休館判定の根拠（取得したページの抜粋・AI解析の詳細など）を取得します
+    
+    判定結果だけでは回答できない場合（根拠の説明を求められた場合など）にのみ使用してください。
+    
+    Args:
+        diagnostics_id: check_facility_closure などの結果に含まれる diagnostics_id
+    
+    Returns:
+        判定の詳細（JSON形式の文字列）
+    """
+    diagnostics = diagnostics_store.get(diagnostics_id)
+    if diagnostics is None:
+        return dumps({"error": f"診断情報 '{diagnostics_id}' は見つからないか期限切れです"})
+    return dumps(diagnostics)
 
-@tool
 def list_available_facilities() -> str:
     """利用可能な施設一覧を取得します
     
@@ -1439,12 +1483,11 @@ def list_available_facilities() -> str:
             "regular_closed_days": info["regular_closed"]
         })
     
-    return json.dumps({
+    return dumps({
         "total_facilities": len(facility_list),
         "facilities": facility_list
-    }, ensure_ascii=False, indent=2)
+    })
 
-@tool
 def analyze_facility_website_with_ai(facility_name: str, date: str) -> str:
     """AI機能を使って施設の公式サイトから休館情報を分析します
     
@@ -1472,17 +1515,17 @@ def analyze_facility_website_with_ai(facility_name: str, date: str) -> str:
         import requests
         from bs4 import BeautifulSoup
         
-        response = requests.get(url, timeout=10)
+        response = requests.get(url, timeout=timeout_for(10))
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.content, 'html.parser')
+        soup = BeautifulSoup(decode_response(response), 'html.parser')
         
         # 関連する情報を抽出
         relevant_text = []
         
         # 開館時間・休館日関連の情報を探す
         for element in soup.find_all(['div', 'p', 'span', 'li']):
-            text = element.get_text(strip=True)
+            text = normalize_text(element.get_text(strip=True))
             if text and any(keyword in text for keyword in [
                 '開館', '休館', '時間', '定休', '営業', '閉館', '休み', 
                 '月曜', '火曜', '水曜', '木曜', '金曜', '土曜', '日曜',
@@ -1513,12 +1556,8 @@ def analyze_facility_website_with_ai(facility_name: str, date: str) -> str:
 - 確信度: 高/中/低
 """
         
-        # Claude 3.7 Sonnetを使用してAI分析
-        import boto3
-        
-        bedrock = boto3.client('bedrock-runtime', region_name=REGION)
-        
-        body = json.dumps({
+        # Claude 3.7 Sonnetを使用してAI分析（共有クライアント・実行枠・再試行は共通サービス）
+        body = {
             "anthropic_version": "bedrock-2023-05-31",
             "max_tokens": 1000,
             "messages": [
@@ -1527,26 +1566,21 @@ def analyze_facility_website_with_ai(facility_name: str, date: str) -> str:
                     "content": analysis_prompt
                 }
             ]
-        })
-        
-        response = bedrock.invoke_model(
-            body=body,
-            modelId=MODEL_ID,
-            accept='application/json',
-            contentType='application/json'
-        )
+        }
         
-        response_body = json.loads(response.get('body').read())
+        response_body = model_invoker.invoke('website_analysis', MODEL_ID, body, region=REGION)
         ai_analysis = response_body['content'][0]['text']
         
-        return json.dumps({
+        # 抽出したページ情報は診断情報として保存し、モデルには分析結果だけを返す
+        return dumps({
             "facility": facility_name,
             "date": normalized_date,
             "weekday": target_weekday,
             "ai_analysis": ai_analysis,
-            "scraped_info": relevant_text[:5],  # デバッグ用
-            "analysis_method": "AI-powered analysis using Claude 3.7 Sonnet"
-        }, ensure_ascii=False, indent=2)
+            "source": "AI解析",
+            "as_of": datetime.now().isoformat(timespec="seconds"),
+            "diagnostics_id": diagnostics_store.put({"scraped_info": relevant_text[:5], "model_id": MODEL_ID})
+        })
         
     except Exception as e:
         return json.dumps({
@@ -1670,9 +1704,9 @@ def _get_noh_museum_closure_info_from_reservation_page(date_str: str) -> str:
             # SSL証明書の検証を無効化
             import urllib3
             urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-            response = requests.get(url, timeout=10, verify=False)
+            response = requests.get(url, timeout=timeout_for(10), verify=False)
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = BeautifulSoup(decode_response(response), 'html.parser')
             
             # ページ全体のテキストを取得
             page_text = soup.get_text()
@@ -1975,20 +2009,66 @@ def _normalize_date(date_str: str) -> str:
         # パースできない場合はそのまま返す
         return date_str
 
-@app.entrypoint
-def invoke_proper(payload, context):
-    """エージェントのエントリーポイント"""
-    global current_session
-    
-    # セッション情報の取得
-    actor_id = context.headers.get('X-Amzn-Bedrock-AgentCore-Runtime-Custom-Actor-Id', 'user') if hasattr(context, 'headers') else 'user'
-    session_id = getattr(context, 'session_id', 'default')
-    current_session = session_id
-    
-    # メモリ設定（オプション）
-    session_manager = None
-    if MEMORY_ID:
+# エージェントに登録するツール（strands の tool ラップは初回のエージェント作成時に行う）
+AGENT_TOOL_FUNCTIONS = [check_facility_closure, check_all_facilities_closure, list_available_facilities,
+                        analyze_facility_website_with_ai, get_closure_diagnostics]
+
+# コンテナ内で保持するエージェント数の上限
+AGENT_CACHE_SIZE = int(os.getenv("AGENT_CACHE_SIZE", "32"))
+
+# 1回の呼び出しの処理時間の上限（秒）と、応答を返すために残しておく時間
+AGENT_TIME_BUDGET_SECONDS = float(os.getenv("AGENT_TIME_BUDGET_SECONDS", "60"))
+DEADLINE_MARGIN_SECONDS = 1.0
+
+
+class AgentCache:
+    """(session_id, actor_id) ごとに構築済みエージェントを保持（LRU）
+
+    モデルクライアント・ツール登録・システムプロンプトはコンテナごとに1回だけ用意し、
+    リクエストごとの作り直しを避ける。
+    """
+
+    def __init__(self, max_agents: int):
+        self.max_agents = max_agents
+        self.agents = OrderedDict()
+        # agents と _building を守るロック（エージェントの構築中は保持しない）
+        self._lock = threading.Lock()
+        # 構築中のキー → そのキーの構築を1回にまとめるロック
+        self._building: Dict[Any, threading.Lock] = {}
+        # 共有するモデル・ツールの初期化用
+        self._shared_lock = threading.Lock()
+        self._model = None
+        self._tools = None
+
+    @property
+    def model(self):
+        """全エージェントで共有するモデル（システムプロンプトとツール定義にキャッシュのチェックポイントを置く）"""
+        with self._shared_lock:
+            if self._model is None:
+                from strands.models import BedrockModel
+                self._model = BedrockModel(
+                    model_id=MODEL_ID,
+                    region_name=REGION,
+                    **_prompt_cache_options(BedrockModel)
+                )
+            return self._model
+
+    @property
+    def tools(self):
+        """strands のツールとしてラップ済みの関数一覧"""
+        with self._shared_lock:
+            if self._tools is None:
+                from strands import tool
+                self._tools = [tool(function) for function in AGENT_TOOL_FUNCTIONS]
+            return self._tools
+
+    def _build_session_manager(self, session_id: str, actor_id: str):
+        """メモリ設定（オプション）"""
+        if not MEMORY_ID:
+            return None
         try:
+            from bedrock_agentcore.memory.integrations.strands.config import AgentCoreMemoryConfig, RetrievalConfig
+            from bedrock_agentcore.memory.integrations.strands.session_manager import AgentCoreMemorySessionManager
             memory_config = AgentCoreMemoryConfig(
                 memory_id=MEMORY_ID,
                 session_id=session_id,
@@ -1998,95 +2078,113 @@ def invoke_proper(payload, context):
                     f"/users/{actor_id}/queries": RetrievalConfig(top_k=5, relevance_score=0.4)
                 }
             )
-            session_manager = AgentCoreMemorySessionManager(memory_config, REGION)
+            return AgentCoreMemorySessionManager(memory_config, REGION)
         except Exception as e:
             print(f"Memory configuration failed: {e}")
-    
-    # エージェントの作成
-    agent = Agent(
-        model=MODEL_ID,
-        session_manager=session_manager,
-        system_prompt="""あなたは文化の森お出かけパス（石川県）の施設休館情報を調べる専門エージェントです。
+            return None
 
-主な機能:
-1. 指定した施設の休館情報確認
-2. 全施設の一括休館情報確認  
-3. 利用可能施設一覧の提供（公式サイトから取得した正確な18施設）
-4. AI機能を使った公式サイト分析による高精度な休館判定
+    def _build(self, session_id: str, actor_id: str):
+        """エージェントを構築（メモリのセッション管理の初期化で通信することがある）"""
+        from strands import Agent
+        session_manager = self._build_session_manager(session_id, actor_id)
+        agent = Agent(
+            model=self.model,
+            session_manager=session_manager,
+            system_prompt=AGENT_SYSTEM_PROMPT,
+            tools=self.tools
+        )
+        return (agent, threading.Lock(), session_manager is not None)
+
+    def get(self, session_id: str, actor_id: str):
+        """エージェントと、その実行を直列化するロックを取得
 
-対応施設（18施設）:
-公式サイト（https://odekakepass.hot-ishikawa.jp/）から取得した正確な施設リスト:
-- 鈴木大拙館、金沢21世紀美術館、いしかわ生活工芸ミュージアム
-- 武家屋敷跡 野村家、国指定重要文化財 成巽閣、石川県立歴史博物館
-- 国立工芸館、特別名勝 兼六園、金沢城公園
-- 前田土佐守家資料館、金沢市老舗記念館、石川県立美術館
-- 金沢くらしの博物館、金沢能楽美術館、金沢市立中村記念美術館
-- 加賀本多博物館、金沢ふるさと偉人館、石川四高記念文化交流館
+        構築はキーごとのロックで行い、別セッションのエージェントの構築を待たせない。
+        """
+        key = (session_id, actor_id)
+        with self._lock:
+            entry = self.agents.get(key)
+            if entry is not None:
+                self.agents.move_to_end(key)
+                return entry
+            build_lock = self._building.setdefault(key, threading.Lock())
 
-特徴:
-- 推測による定休日設定は一切行いません
-- 各施設の公式サイトから動的に情報を取得
-- Claude 3.7 SonnetのAI機能で高精度な休館判定
-- AgentCore Browser + AI画像解析による最高精度判定（95-98%）
-- 公式サイトの最新情報に基づく正確な回答
+        with build_lock:
+            with self._lock:
+                # 同じキーを先に構築したスレッドがあればその結果を使う
+                entry = self.agents.get(key)
+                if entry is not None:
+                    self.agents.move_to_end(key)
+                    return entry
+            try:
+                entry = self._build(session_id, actor_id)
+                with self._lock:
+                    self.agents[key] = entry
+                    while len(self.agents) > self.max_agents:
+                        self.agents.popitem(last=False)
+            finally:
+                with self._lock:
+                    self._building.pop(key, None)
+            return entry
 
-【重要】画像カレンダー対応施設の最新情報:
 
-■金沢市老舗記念館（画像解析による正確な色分け判定）:
-- 基本ルール: 月曜定休（祝日の場合はその直後の平日）
-- 年末年始: 12/29～1/3休館
-- 色分けルール: オレンジ色=休館日、ピンク色=祝日（65歳以上無料・開館）
-- 2025年10月の詳細情報（画像解析で確認済み）:
-  * 10月6日(月): 🔴休館（月曜定休・オレンジ色）
-  * 10月13日(月): 🟢開館（スポーツの日祝日・ピンク色・65歳以上無料）
-  * 10月14日(火): 🔴休館（臨時休館日・オレンジ色）
-  * 10月20日(月): 🔴休館（月曜定休・オレンジ色）
-  * 10月27日(月): 🔴休館（月曜定休・オレンジ色）
+def _prompt_cache_options(model_class) -> Dict[str, str]:
+    """BedrockModel がプロンプトキャッシュの設定（cache_prompt / cache_tools）を受け付ける場合だけその指定
+
+    古い strands の BedrockConfig にはこれらの項目がないため、設定の型定義を見て渡すかを決める。
+    """
+    config_class = getattr(model_class, "BedrockConfig", None)
+    supported = getattr(config_class, "__annotations__", {})
+    options = {name: "default" for name in ("cache_prompt", "cache_tools") if name in supported}
+    if len(options) < 2:
+        print(f"Prompt caching options not supported by this strands version: "
+              f"{sorted({'cache_prompt', 'cache_tools'} - set(options))}")
+    return options
 
-■金沢くらしの博物館:
-- 基本ルール: 月曜定休（祝日の場合はその直後の平日）
-- 年末年始: 12/29～1/3休館
-- 色分けルール: ■は休館日、■は祝日（65歳以上無料）
-- 開館時間: 9:30～17:00（入館は16:30まで）
 
-■金沢市立中村記念美術館:
-- 基本ルール: 月曜定休（祝日の場合はその直後の平日）
-- 年末年始: 12/29～1/3休館
-- 2025年10月・11月の詳細情報（公式サイト確認済み）:
-  * 10月1～3日: 🔴休館（展示替え期間）
-  * 10月6日(月): 🔴休館（月曜定休）
-  * 10月13日(月): 🟢開館（スポーツの日祝日・65歳以上無料）
-  * 10月14日(月): 🔴休館（月曜定休）
-  * 10月20日(月): 🔴休館（月曜定休）
-  * 10月27日(月): 🟢開館（臨時開館）
-  * 10月28日(月): 🔴休館（月曜定休）
-  * 11月4日(月): 🔴休館（月曜定休）
-  * 11月10日(月): 🔴休館（月曜定休）
-  * 11月17日(月): 🔴休館（月曜定休）
-  * 11月25日(月): 🔴休館（月曜定休）
+agent_cache = AgentCache(AGENT_CACHE_SIZE)
 
-回答時の注意点:
-- 日付は具体的に「YYYY年MM月DD日（曜日）」の形式で表示
-- 休館理由を明確に説明（定休日/臨時休館/展示替えなど）
-- 情報の取得方法（AI分析/サイトスクレイピング）を明示
-- 最新情報は各施設の公式サイトで確認するよう案内
-- 不確実な情報は推測せず、公式サイト確認を推奨
 
-ユーザーの質問に対して、適切なツールを使用して正確で分かりやすい情報を提供してください。""",
-        tools=[check_facility_closure, check_all_facilities_closure, list_available_facilities, analyze_facility_website_with_ai]
-    )
+def _invocation_deadline(context):
+    """呼び出しの締め切り
+
+    lambda_handler から呼ばれた場合はその締め切りを引き継ぐ。それ以外は context の残り実行時間
+    （なければ AGENT_TIME_BUDGET_SECONDS）から決め、ツールの通信・モデル呼び出しをその範囲に収める。
+    """
+    return current_deadline() or Deadline.from_lambda_context(context, DEADLINE_MARGIN_SECONDS,
+                                                              AGENT_TIME_BUDGET_SECONDS)
+
+def invoke_proper(payload, context):
+    """エージェントのエントリーポイント"""
+    global current_session
+    
+    # セッション情報の取得
+    actor_id = context.headers.get('X-Amzn-Bedrock-AgentCore-Runtime-Custom-Actor-Id', 'user') if hasattr(context, 'headers') else 'user'
+    session_id = getattr(context, 'session_id', 'default')
+    current_session = session_id
+    
+    # 構築済みエージェントを取得（初回のみ作成）
+    agent, agent_lock, has_memory = agent_cache.get(session_id, actor_id)
     
     # プロンプトの処理
     user_prompt = payload.get("prompt", "")
     
     try:
-        result = agent(user_prompt)
+        with agent_lock, deadline_scope(_invocation_deadline(context)):
+            # メモリ未設定時は従来どおり会話履歴を持ち越さない
+            if not has_memory:
+                agent.messages = []
+            result = agent(user_prompt)
         response_content = result.message.get('content', [{}])[0].get('text', str(result))
         
+        # キャッシュのヒット・ミスを集計
+        metrics = getattr(result, 'metrics', None)
+        prompt_cache_stats.record(getattr(metrics, 'accumulated_usage', None))
+        
         return {
             "response": response_content,
             "session_id": session_id,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now().isoformat(),
+            "prompt_cache": prompt_cache_stats.snapshot()
         }
         
     except Exception as e:
@@ -2096,6 +2194,56 @@ def invoke_proper(payload, context):
             "timestamp": datetime.now().isoformat()
         }
 
+def _iterate_async(async_iterator):
+    """非同期イテレータを同期的に順に取り出す"""
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(async_iterator.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        loop.run_until_complete(async_iterator.aclose())
+        loop.close()
+
+def stream_proper(payload, context):
+    """ストリーミング用エントリーポイント
+
+    生成されたテキスト断片（str）を順に返し、最後に invoke_proper と同じ形式の dict を返す。
+    """
+    actor_id = context.headers.get('X-Amzn-Bedrock-AgentCore-Runtime-Custom-Actor-Id', 'user') if hasattr(context, 'headers') else 'user'
+    session_id = getattr(context, 'session_id', 'default')
+    agent, agent_lock, has_memory = agent_cache.get(session_id, actor_id)
+    user_prompt = payload.get("prompt", "")
+    
+    try:
+        with agent_lock, deadline_scope(_invocation_deadline(context)):
+            if not has_memory:
+                agent.messages = []
+            result = None
+            for event in _iterate_async(agent.stream_async(user_prompt)):
+                if event.get("data"):
+                    yield event["data"]
+                elif "result" in event:
+                    result = event["result"]
+        
+        metrics = getattr(result, 'metrics', None)
+        prompt_cache_stats.record(getattr(metrics, 'accumulated_usage', None))
+        yield {
+            "response": result.message.get('content', [{}])[0].get('text', str(result)) if result else "",
+            "session_id": session_id,
+            "timestamp": datetime.now().isoformat(),
+            "prompt_cache": prompt_cache_stats.snapshot()
+        }
+        
+    except Exception as e:
+        yield {
+            "error": f"エージェント実行エラー: {str(e)}",
+            "session_id": session_id,
+            "timestamp": datetime.now().isoformat()
+        }
+
 # Test entrypoint (disabled)
 def invoke_test(payload, context):
     """テスト用エントリーポイント（無効化）"""
@@ -2126,11 +2274,46 @@ def invoke_test(payload, context):
             "timestamp": datetime.now().isoformat()
         }
 
+def get_app():
+    """AgentCoreアプリケーション（初回呼び出し時に作成し、エントリーポイントを登録）"""
+    global _app
+    if _app is None:
+        from bedrock_agentcore.runtime import BedrockAgentCoreApp
+        _app = BedrockAgentCoreApp()
+        _app.entrypoint(invoke_proper)
+    return _app
+
+
+def __getattr__(name):
+    # 従来の `agent.app` 参照を遅延初期化で維持
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def warm_up() -> dict:
+    """リクエスト処理の外で重いモジュール・クライアントを事前に初期化"""
+    timings = {}
+    for name, step in (
+        ("app", get_app),
+        ("model", lambda: agent_cache.model),
+        ("tools", lambda: agent_cache.tools),
+        ("http_session", lambda: scraper.session),
+        ("bedrock_client", lambda: scraper.bedrock_client),
+    ):
+        start = time.time()
+        try:
+            step()
+            timings[name] = round(time.time() - start, 3)
+        except Exception as e:
+            timings[name] = f"error: {e}"
+    return timings
+
 # AgentCore Lambda handler
 def handler(event, context):
     """Lambda handler for AgentCore"""
-    return app.handler(event, context)
+    return get_app().handler(event, context)
 
 if __name__ == "__main__":
     # ローカルテスト用
-    app.run()
\ No newline at end of file
+    get_app().run()
\ No newline at end of file
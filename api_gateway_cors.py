@@ -15,14 +15,15 @@ class APIGatewayCORSConfig:
         
         # CORS configuration
         self.allowed_origins = ['*']  # Configure for production
-        self.allowed_methods = ['POST', 'OPTIONS']
+        self.allowed_methods = ['GET', 'POST', 'OPTIONS']
         self.allowed_headers = [
             'Content-Type',
             'X-Amz-Date',
             'Authorization',
             'X-Api-Key',
             'X-Amz-Security-Token',
-            'X-Requested-With'
+            'X-Requested-With',
+            'Idempotency-Key'
         ]
         self.max_age = 86400  # 24 hours
     
@@ -41,6 +42,7 @@ class APIGatewayCORSConfig:
         
         # Configure CORS headers for existing methods
         self._configure_method_cors(api_id, resource_id, 'POST')
+        self._configure_method_cors(api_id, resource_id, 'GET')
     
     def _create_options_method(self, api_id: str, resource_id: str) -> None:
         """
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Cold start benchmark
+
+Measures module import time in fresh interpreters (python -X importtime) and the
+cost of a CORS preflight request, and checks that preflight does not load the
+agent stack (boto3, strands, bedrock_agentcore).
+
+Usage:
+    python benchmark_cold_start.py [--runs 5] [--json]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+MODULES = ['cors_config', 'rate_limiter', 'lambda_handler', 'facility_scraper', 'agent']
+
+# Modules that must not be loaded while serving a preflight request
+HEAVY_MODULES = ['boto3', 'botocore', 'strands', 'bedrock_agentcore', 'agent', 'facility_scraper']
+
+PREFLIGHT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import lambda_handler
+imported = time.perf_counter()
+event = {
+    'httpMethod': 'OPTIONS',
+    'headers': {'Origin': 'http://localhost:8000', 'Access-Control-Request-Method': 'POST'}
+}
+response = lambda_handler.lambda_handler(event, None)
+done = time.perf_counter()
+print(json.dumps({
+    'status': response['statusCode'],
+    'import_ms': (imported - start) * 1000,
+    'request_ms': (done - imported) * 1000,
+    'loaded': [m for m in %r if m in sys.modules]
+}))
+""" % (HEAVY_MODULES,)
+
+
+def measure_import(module: str) -> float:
+    """Cumulative import time of a module in a fresh interpreter (milliseconds)"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        last_line = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'unknown error'
+        raise RuntimeError(last_line)
+    for line in reversed(result.stderr.splitlines()):
+        # import time: self [us] | cumulative | imported package
+        parts = [part.strip() for part in line.split('|')]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000
+    raise RuntimeError('module not found in importtime output')
+
+
+def measure_preflight() -> dict:
+    result = subprocess.run([sys.executable, '-c', PREFLIGHT_SCRIPT], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cold start benchmark')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per measurement')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    report = {'imports': {}, 'preflight': {}}
+
+    for module in MODULES:
+        try:
+            samples = [measure_import(module) for _ in range(args.runs)]
+            report['imports'][module] = {
+                'median_ms': round(statistics.median(samples), 1),
+                'max_ms': round(max(samples), 1)
+            }
+        except RuntimeError as e:
+            report['imports'][module] = {'error': str(e)}
+
+    try:
+        samples = [measure_preflight() for _ in range(args.runs)]
+        report['preflight'] = {
+            'status': samples[-1]['status'],
+            'import_median_ms': round(statistics.median(s['import_ms'] for s in samples), 1),
+            'request_median_ms': round(statistics.median(s['request_ms'] for s in samples), 2),
+            'heavy_modules_loaded': samples[-1]['loaded']
+        }
+    except RuntimeError as e:
+        report['preflight'] = {'error': str(e)}
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print('Import time (fresh interpreter)')
+    for module, stats in report['imports'].items():
+        if 'error' in stats:
+            print(f"  {module:<20} error: {stats['error']}")
+        else:
+            print(f"  {module:<20} {stats['median_ms']:>8.1f} ms (max {stats['max_ms']:.1f} ms)")
+
+    preflight = report['preflight']
+    print('\nPreflight (OPTIONS)')
+    if 'error' in preflight:
+        print(f"  error: {preflight['error']}")
+    else:
+        print(f"  status:        {preflight['status']}")
+        print(f"  import:        {preflight['import_median_ms']:.1f} ms")
+        print(f"  request:       {preflight['request_median_ms']:.2f} ms")
+        loaded = preflight['heavy_modules_loaded']
+        print(f"  heavy modules: {', '.join(loaded) if loaded else 'none'}")
+
+
+if __name__ == '__main__':
+    main()
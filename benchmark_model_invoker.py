@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Model invoker benchmark
+
+Runs interactive and background callers concurrently against FakeBedrockClient
+(simulated latency and throttling, no AWS access) through a ModelInvoker and
+reports per-priority latency including queue wait, plus the invoker's
+per-caller metrics. Background work floods the queue first, so the interactive
+numbers show how far priority scheduling keeps them ahead of it.
+
+Usage:
+    python benchmark_model_invoker.py [--calls 200] [--threads 16] [--max-concurrency 4]
+                                      [--latency 0.05] [--throttle-rate 0.05] [--json]
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from model_invoker import (
+    PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, FakeBedrockClient, ModelInvoker, model_priority
+)
+from concurrency_limiter import OverloadedError
+
+MODEL_ID = 'fake-model'
+BODY = {
+    "anthropic_version": "bedrock-2023-05-31",
+    "max_tokens": 100,
+    "messages": [{"role": "user", "content": "兼六園は明日開いていますか？"}]
+}
+
+
+def call(invoker: ModelInvoker, priority: int) -> tuple:
+    """One model call at the given priority; returns (priority, seconds, outcome)"""
+    caller = 'interactive' if priority == PRIORITY_INTERACTIVE else 'background'
+    start = time.perf_counter()
+    try:
+        with model_priority(priority):
+            invoker.invoke(caller, MODEL_ID, BODY)
+        outcome = 'ok'
+    except OverloadedError:
+        outcome = 'shed'
+    except Exception:
+        outcome = 'error'
+    return priority, time.perf_counter() - start, outcome
+
+
+def run(calls: int, threads: int, max_concurrency: int, latency: float, throttle_rate: float) -> dict:
+    fake = FakeBedrockClient(latency=latency, throttle_rate=throttle_rate, seed=1)
+    invoker = ModelInvoker(max_concurrency=max_concurrency, client_factory=lambda region, **_: fake)
+    # Background calls are submitted first; interactive calls arrive while they are queued
+    priorities = [PRIORITY_BACKGROUND] * calls + [PRIORITY_INTERACTIVE] * calls
+
+    lock = threading.Lock()
+    results = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for result in executor.map(lambda priority: call(invoker, priority), priorities):
+            with lock:
+                results.append(result)
+    elapsed = time.perf_counter() - start
+
+    summary = {}
+    for priority, name in ((PRIORITY_INTERACTIVE, 'interactive'), (PRIORITY_BACKGROUND, 'background')):
+        durations = sorted(seconds for p, seconds, outcome in results if p == priority and outcome == 'ok')
+        outcomes = [outcome for p, _, outcome in results if p == priority]
+        summary[name] = {
+            'ok': outcomes.count('ok'),
+            'shed': outcomes.count('shed'),
+            'error': outcomes.count('error'),
+            'median_ms': round(statistics.median(durations) * 1000, 1) if durations else 0.0,
+            'p95_ms': round(durations[int(len(durations) * 0.95) - 1] * 1000, 1) if durations else 0.0,
+        }
+    return {
+        'elapsed_s': round(elapsed, 2),
+        'throughput_per_s': round(len(results) / elapsed, 1),
+        'priorities': summary,
+        'invoker': invoker.snapshot(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Model invoker benchmark')
+    parser.add_argument('--calls', type=int, default=200, help='Calls per priority')
+    parser.add_argument('--threads', type=int, default=16, help='Concurrent callers')
+    parser.add_argument('--max-concurrency', type=int, default=4, help='Invoker concurrency limit')
+    parser.add_argument('--latency', type=float, default=0.05, help='Fake model latency (seconds)')
+    parser.add_argument('--throttle-rate', type=float, default=0.05, help='Fraction of fake calls throttled')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    result = run(args.calls, args.threads, args.max_concurrency, args.latency, args.throttle_rate)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"{result['elapsed_s']}s, {result['throughput_per_s']} calls/s "
+          f"(max concurrency {args.max_concurrency}, {args.threads} callers)")
+    print(f"  {'priority':<12} {'ok':>5} {'shed':>5} {'error':>5} {'median':>10} {'p95':>10}")
+    for name, point in result['priorities'].items():
+        print(f"  {name:<12} {point['ok']:>5} {point['shed']:>5} {point['error']:>5} "
+              f"{point['median_ms']:>8.1f}ms {point['p95_ms']:>8.1f}ms")
+    for caller, metrics in result['invoker']['callers'].items():
+        print(f"  {caller}: {metrics['calls']} calls, {metrics['retries']} retries, {metrics['errors']} errors, "
+              f"avg queue wait {metrics['avg_queue_wait'] * 1000:.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Rate limiter benchmark
+
+Feeds requests from distinct client identifiers through AdvancedRateLimiter.acquire
+(the per-IP and global check/record used by check_request_rate_limit) and reports per-request latency as the number of tracked
+clients grows. A simulated clock advances at --rate requests per second. At the
+default rate every client still holds a bucket at the end (a one-request bucket
+refills in 6 seconds); lower rates exercise expiry through the wheel instead.
+
+Usage:
+    python benchmark_rate_limiter.py [--identifiers 1000000] [--rate 200000] [--json]
+"""
+import argparse
+import json
+import statistics
+import time
+
+from rate_limiter import AdvancedRateLimiter, RateLimitRule, RateLimitType
+
+SAMPLE_SIZE = 10000
+
+
+class SimulatedClock:
+    """Clock that advances a fixed step per request"""
+
+    def __init__(self, step: float):
+        self.now = 1_000_000.0
+        self.step = step
+
+    def __call__(self) -> float:
+        return self.now
+
+    def tick(self) -> None:
+        self.now += self.step
+
+
+def request(limiter: AdvancedRateLimiter, identifier: str) -> bool:
+    """Same call as check_request_rate_limit (per-IP and global check and record)"""
+    result, _ = limiter.acquire(identifier)
+    return result.allowed
+
+
+def run(identifiers: int, rate: float) -> list:
+    clock = SimulatedClock(1.0 / rate)
+    limiter = AdvancedRateLimiter(clock=clock)
+    # Keep the global limit above the simulated rate so every request is charged per IP
+    limiter.rules[RateLimitType.GLOBAL] = RateLimitRule(
+        max_requests=int(rate * 60), window_seconds=60, limit_type=RateLimitType.GLOBAL, burst_allowance=0
+    )
+    checkpoints = []
+    target = min(SAMPLE_SIZE, identifiers)
+    samples = []
+
+    for i in range(identifiers):
+        identifier = f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}:{i >> 24}"
+        if i + 1 <= target - SAMPLE_SIZE:
+            request(limiter, identifier)
+            clock.tick()
+            continue
+
+        start = time.perf_counter_ns()
+        request(limiter, identifier)
+        samples.append(time.perf_counter_ns() - start)
+        clock.tick()
+
+        if i + 1 == target:
+            samples.sort()
+            checkpoints.append({
+                'identifiers': i + 1,
+                'tracked': limiter.tracked_identifiers(RateLimitType.PER_IP),
+                'median_us': round(statistics.median(samples) / 1000, 2),
+                'p99_us': round(samples[int(len(samples) * 0.99) - 1] / 1000, 2),
+            })
+            samples = []
+            target = min(target * 10, identifiers) if target < identifiers else identifiers + 1
+    return checkpoints
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rate limiter benchmark')
+    parser.add_argument('--identifiers', type=int, default=1_000_000, help='Distinct client identifiers')
+    parser.add_argument('--rate', type=float, default=200_000, help='Simulated requests per second')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    checkpoints = run(args.identifiers, args.rate)
+
+    if args.json:
+        print(json.dumps(checkpoints, indent=2))
+        return
+
+    print(f"Per-request latency (check + record, last {SAMPLE_SIZE} requests before each checkpoint)")
+    print(f"  {'identifiers':>12} {'tracked':>10} {'median':>10} {'p99':>10}")
+    for point in checkpoints:
+        print(f"  {point['identifiers']:>12,} {point['tracked']:>10,} "
+              f"{point['median_us']:>8.2f}us {point['p99_us']:>8.2f}us")
+
+
+if __name__ == '__main__':
+    main()
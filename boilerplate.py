@@ -0,0 +1,229 @@
+"""ホスト単位の定型文（ヘッダー・ナビゲーション・フッター）除去
+
+同じホストの複数ページに繰り返し現れる連続行（シングル）をハッシュで数え、
+一定数以上のページに出現したものを定型文として除去する。
+学習結果は BOILERPLATE_TABLE があれば DynamoDB（Lambda のコンテナ間で共有）、なければJSONファイルに
+保存し、コールドスタートごとに作り直さない。
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Set
+from urllib.parse import urlparse
+
+from closure_patterns import closure_scanner
+from config import BOILERPLATE_STORE_PATH, BOILERPLATE_TABLE, REGION
+from date_index import KEYWORD_KINDS
+
+logger = logging.getLogger(__name__)
+
+# シングルの行数
+SHINGLE_SIZE = 3
+# 定型文とみなす出現ページ数
+MIN_PAGES = 3
+# ホストごとに記録するURL数・シングル数の上限
+MAX_PAGES_PER_HOST = 200
+MAX_SHINGLES_PER_HOST = 5000
+
+# 日付らしい記述を含む行は定型文でも残す（休館日リスト等）
+_PROTECTED_LINE_PATTERN = re.compile(r'\d{1,2}月|\d{1,2}/\d{1,2}|\([月火水木金土日]\)')
+
+
+def _hash(value: str) -> str:
+    return hashlib.blake2b(value.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _is_protected(line: str) -> bool:
+    if _PROTECTED_LINE_PATTERN.search(line):
+        return True
+    hits = closure_scanner.scan(line)
+    return any(hits.has(keyword) for keyword in KEYWORD_KINDS)
+
+
+def _shingles(lines: List[str]) -> List[str]:
+    """行ごとのシングルハッシュ（i番目は lines[i:i+SHINGLE_SIZE]）"""
+    size = min(SHINGLE_SIZE, len(lines))
+    return [_hash('\n'.join(lines[i:i + size])) for i in range(len(lines) - size + 1)]
+
+
+def _new_template() -> Dict:
+    return {"pages": [], "shingles": {}, "version": 0}
+
+
+class FileTemplateStore:
+    """ローカル用のテンプレート保存先（全ホストを1つのJSONファイルに保存）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._hosts: Optional[Dict[str, Dict]] = None
+
+    def _all(self) -> Dict[str, Dict]:
+        if self._hosts is None:
+            self._hosts = {}
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        self._hosts = json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Boilerplate store load failed: {e}")
+        return self._hosts
+
+    def get(self, host: str) -> Optional[Dict]:
+        return self._all().get(host)
+
+    def put(self, host: str, template: Dict) -> bool:
+        hosts = self._all()
+        hosts[host] = template
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(hosts, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        return True
+
+
+class DynamoDBTemplateStore:
+    """Lambda のコンテナ間で共有するテンプレート保存先（パーティションキー host）
+
+    他のコンテナの書き込みを上書きしないよう、version が読んだときのままの場合だけ書き込む。
+    """
+
+    def __init__(self, table_name: str, region: str):
+        self.table_name = table_name
+        self.region = region
+        self._table = None
+
+    @property
+    def table(self):
+        if self._table is None:
+            import boto3
+            self._table = boto3.resource('dynamodb', region_name=self.region).Table(self.table_name)
+        return self._table
+
+    def get(self, host: str) -> Optional[Dict]:
+        item = self.table.get_item(Key={"host": host}).get("Item")
+        if not item:
+            return None
+        return json.loads(item["template"])
+
+    def put(self, host: str, template: Dict) -> bool:
+        """書き込めなければ（他のコンテナが先に更新した）False"""
+        try:
+            self.table.put_item(
+                Item={"host": host, "template": json.dumps(template), "version": template["version"]},
+                ConditionExpression="attribute_not_exists(host) OR version = :previous",
+                ExpressionAttributeValues={":previous": template["version"] - 1},
+            )
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            return False
+        return True
+
+
+class BoilerplateLearner:
+    """ホスト → 定型文テンプレート
+
+    テンプレートは出現ページ数つきのシングルと、数え済みページのURLハッシュ（pages）からなる。
+    pages は削らずに保持し、上限に達したホストはそれ以上学習しない（削ると同じページを
+    もう一度数えてしまうため）。
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+        self.hosts: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def _template(self, host: str, refresh: bool = False) -> Dict:
+        """ホストのテンプレート（未読込または refresh なら保存先から読む）"""
+        if (refresh or host not in self.hosts) and self.store is not None:
+            try:
+                stored = self.store.get(host)
+                if stored is not None:
+                    self.hosts[host] = stored
+            except Exception as e:
+                logger.warning(f"Boilerplate store load failed: {e}")
+        return self.hosts.setdefault(host, _new_template())
+
+    def _save(self, host: str) -> None:
+        if self.store is None:
+            return
+        try:
+            if not self.store.put(host, self.hosts[host]):
+                # 他のコンテナの学習結果を次回読み直す（このページは次に取得したときに数える）
+                del self.hosts[host]
+        except Exception as e:
+            logger.warning(f"Boilerplate store save failed: {e}")
+
+    def learn(self, url: str, lines: List[str]) -> bool:
+        """ページのシングルを記録（同じURLは1回だけ数える）"""
+        host = urlparse(url).netloc
+        page_key = _hash(url)
+        template = self._template(host)
+        if page_key in template["pages"] or len(template["pages"]) >= MAX_PAGES_PER_HOST:
+            return False
+
+        template["pages"].append(page_key)
+        template["version"] = template.get("version", 0) + 1
+        counts = template["shingles"]
+        for shingle in set(_shingles(lines)):
+            counts[shingle] = counts.get(shingle, 0) + 1
+        if len(counts) > MAX_SHINGLES_PER_HOST:
+            # 出現ページ数の多いものを残す
+            kept = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:MAX_SHINGLES_PER_HOST]
+            template["shingles"] = dict(kept)
+        return True
+
+    def boilerplate_shingles(self, url: str) -> Set[str]:
+        template = self._template(urlparse(url).netloc)
+        return {shingle for shingle, count in template["shingles"].items() if count >= MIN_PAGES}
+
+    def strip(self, url: str, text: str) -> str:
+        """ページを学習したうえで定型文の行を除去"""
+        lines = [line for line in text.split('\n') if line]
+        if not lines:
+            return text
+
+        host = urlparse(url).netloc
+        with self._lock:
+            pages = self._template(host)["pages"]
+            if _hash(url) not in pages and len(pages) < MAX_PAGES_PER_HOST:
+                # 未学習のページは他のコンテナの学習結果を読み直してから数える
+                self._template(host, refresh=True)
+                if self.learn(url, lines):
+                    self._save(host)
+        return self._remove(url, lines)
+
+    def remove(self, url: str, text: str) -> str:
+        """学習済みの定型文の行を除去（学習はしない）"""
+        return self._remove(url, [line for line in text.split('\n') if line])
+
+    def _remove(self, url: str, lines: List[str]) -> str:
+        with self._lock:
+            boilerplate = self.boilerplate_shingles(url)
+        if not boilerplate or not lines:
+            return '\n'.join(lines)
+
+        size = min(SHINGLE_SIZE, len(lines))
+        removed = [False] * len(lines)
+        for i, shingle in enumerate(_shingles(lines)):
+            if shingle in boilerplate:
+                for j in range(i, i + size):
+                    removed[j] = True
+
+        return '\n'.join(
+            line for line, is_removed in zip(lines, removed)
+            if not is_removed or _is_protected(line)
+        )
+
+
+def _create_template_store():
+    if BOILERPLATE_TABLE:
+        return DynamoDBTemplateStore(BOILERPLATE_TABLE, REGION)
+    if BOILERPLATE_STORE_PATH:
+        return FileTemplateStore(BOILERPLATE_STORE_PATH)
+    return None
+
+
+# 全ページ共通の学習器
+boilerplate_learner = BoilerplateLearner(_create_template_store())
@@ -0,0 +1,130 @@
+"""文字コード判定機能
+
+HTTPヘッダー → metaタグ → ホスト単位の判定済み文字コード → 高速判定器 の順で文字コードを決定する。
+宣言のないページの判定結果をホスト単位で記憶し、2回目以降は1回のデコードで済ませる
+"""
+import codecs
+import logging
+import re
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# metaタグの検索範囲（<head>内に収まる想定）
+META_SCAN_BYTES = 4096
+
+_HEADER_CHARSET_PATTERN = re.compile(r'charset\s*=\s*["\']?([\w\-]+)', re.IGNORECASE)
+_META_CHARSET_PATTERN = re.compile(rb'<meta[^>]+?charset\s*=\s*["\']?\s*([\w\-]+)', re.IGNORECASE)
+
+# 日本語サイトで宣言されがちな名前を実際に使うコーデックへ寄せる
+# （Shift_JIS宣言のサイトでも機種依存文字が混じるためcp932で読む）
+_CHARSET_ALIASES = {
+    "shift_jis": "cp932",
+    "shift-jis": "cp932",
+    "sjis": "cp932",
+    "x-sjis": "cp932",
+    "windows-31j": "cp932",
+    "ms932": "cp932",
+    "x-euc-jp": "euc_jp",
+}
+
+
+def _canonical_charset(name: Optional[str]) -> Optional[str]:
+    """文字コード名を正規化（未知の名前はNone）"""
+    if not name:
+        return None
+    name = name.strip().lower()
+    name = _CHARSET_ALIASES.get(name, name)
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+class CharsetResolver:
+    def __init__(self):
+        # ホスト → 判定済み文字コード（スクレイピングのスレッド間で共有するためロックで保護）
+        self.host_charsets: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, url: str, content: bytes, content_type: Optional[str] = None) -> str:
+        """レスポンスの文字コードを決定"""
+        # 1. HTTPヘッダー（text/htmlでcharset未指定の場合は使わない）
+        if content_type:
+            match = _HEADER_CHARSET_PATTERN.search(content_type)
+            charset = _canonical_charset(match.group(1)) if match else None
+            if charset:
+                return charset
+
+        # 2. metaタグ（同一ホストでもページごとに文字コードが違うことがあるため記憶より優先）
+        match = _META_CHARSET_PATTERN.search(content[:META_SCAN_BYTES])
+        charset = _canonical_charset(match.group(1).decode('ascii', 'ignore')) if match else None
+        if charset:
+            return charset
+
+        # 3. 同一ホストで判定済みの文字コード
+        host = urlparse(url).netloc
+        with self._lock:
+            charset = self.host_charsets.get(host)
+        if charset:
+            return charset
+
+        # 4. 高速判定器
+        charset = self._detect(content)
+        with self._lock:
+            self.host_charsets[host] = charset
+        return charset
+
+    def decode(self, url: str, content: bytes, content_type: Optional[str] = None) -> str:
+        """文字コードを判定してデコード"""
+        charset = self.resolve(url, content, content_type)
+        try:
+            return content.decode(charset)
+        except UnicodeDecodeError:
+            # サイト側で文字コードが変わった場合は記憶を破棄して判定し直す
+            host = urlparse(url).netloc
+            with self._lock:
+                stale = self.host_charsets.get(host) == charset
+                if stale:
+                    del self.host_charsets[host]
+            if stale:
+                logger.debug(f"Charset {charset} no longer valid for {host}, re-detecting")
+                charset = self._detect(content)
+                with self._lock:
+                    self.host_charsets[host] = charset
+            return content.decode(charset, errors='replace')
+
+    def _detect(self, content: bytes) -> str:
+        """宣言がない場合の判定（UTF-8検証 → charset_normalizer）"""
+        try:
+            content.decode('utf-8')
+            return 'utf-8'
+        except UnicodeDecodeError:
+            pass
+
+        try:
+            from charset_normalizer import from_bytes
+            best = from_bytes(content).best()
+            charset = _canonical_charset(best.encoding) if best else None
+            if charset:
+                return charset
+        except ImportError:
+            pass
+
+        # 判定器が使えない場合は日本語サイトで最も多いcp932とみなす
+        return 'cp932'
+
+
+# グローバルインスタンス
+charset_resolver = CharsetResolver()
+
+
+def decode_response(response) -> str:
+    """requestsのレスポンスを判定済み文字コードでデコード"""
+    return charset_resolver.decode(
+        response.url,
+        response.content,
+        response.headers.get('Content-Type')
+    )
@@ -0,0 +1,178 @@
+"""休館判定の結果モデル
+
+判定結果を入れ子の dict ではなく、__slots__ つきの変更できないオブジェクトで表す。
+
+- Evidence: 根拠テキストへの参照。取得済みページの本文などの文字列と範囲だけを持ち、抜粋は
+  シリアライズする時点で切り出す（判定のたびにページ本文の断片をコピーしない）
+- Signal: 判定の根拠1件（サイトの記載・期間表現・AI解析・専用ページ解析・手動設定など）
+- Verdict: 施設・日付ごとの判定結果
+
+FacilityScraper と agent.py の施設別判定はどちらも Verdict を返し、JSON への変換は dumps に一本化する。
+Python 3.9 でも動くよう dataclass(slots=True) は使わず、__slots__ と __setattr__ で変更を禁止する。
+"""
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+# Signal の種類
+SIGNAL_SITE = "site"                  # サイトの記載（定休日・本日休館・日付つきの休館の言及）
+SIGNAL_PERIOD = "period"              # 期間表現
+SIGNAL_AI = "ai"                      # AI解析
+SIGNAL_SPECIAL_PAGE = "special_page"  # 施設専用ページの解析
+SIGNAL_MANUAL = "manual"              # 手動設定
+SIGNAL_NEWS = "news"                  # お知らせ欄の記載（判定には使わない）
+
+
+class _Frozen:
+    """作成後に属性を変更できないオブジェクト"""
+    __slots__ = ()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class Evidence(_Frozen):
+    """根拠テキストへの参照（text[start:end] が抜粋）"""
+    __slots__ = ("source", "text", "start", "end")
+
+    def __init__(self, source: str, text: str, start: int = 0, end: Optional[int] = None):
+        object.__setattr__(self, "source", source)
+        object.__setattr__(self, "text", text)
+        object.__setattr__(self, "start", start)
+        object.__setattr__(self, "end", end)
+
+    @property
+    def excerpt(self) -> str:
+        return self.text[self.start:self.end]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"source": self.source, "excerpt": self.excerpt}
+
+
+class Signal(_Frozen):
+    """判定の根拠1件
+
+    closed は休館を示すなら True、開館を示すなら False、判定に使わない情報（お知らせ・エラー）なら None。
+    """
+    __slots__ = ("kind", "closed", "reason", "confidence", "source", "evidence", "detail")
+
+    def __init__(self, kind: str, closed: Optional[bool], reason: str, confidence: Optional[float] = None,
+                 source: str = "", evidence: Optional[Evidence] = None, detail: str = ""):
+        object.__setattr__(self, "kind", kind)
+        object.__setattr__(self, "closed", closed)
+        object.__setattr__(self, "reason", reason)
+        object.__setattr__(self, "confidence", confidence)
+        object.__setattr__(self, "source", source)
+        object.__setattr__(self, "evidence", evidence)
+        object.__setattr__(self, "detail", detail)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"kind": self.kind, "closed": self.closed, "reason": self.reason}
+        if self.confidence is not None:
+            data["confidence"] = self.confidence
+        if self.source:
+            data["source"] = self.source
+        if self.detail:
+            data["detail"] = self.detail
+        if self.evidence is not None:
+            data["evidence"] = self.evidence.to_dict()
+        return data
+
+
+class Verdict(_Frozen):
+    """施設・日付ごとの判定結果
+
+    is_closed が None なら判定できなかった（error に理由）。notes は施設別判定が返す
+    祝日情報・補足などで、シリアライズ時にはトップレベルのキーとして出力する。
+    """
+    __slots__ = ("facility", "date", "weekday", "is_closed", "reason", "confidence", "source", "signals",
+                 "is_regular_closed", "regular_closed_days", "site_status", "notes", "error", "as_of")
+
+    def __init__(self, facility: str, date: str, weekday: str = "", is_closed: Optional[bool] = None,
+                 reason: str = "", confidence: Optional[float] = None, source: str = "",
+                 signals: Iterable[Signal] = (), is_regular_closed: Optional[bool] = None,
+                 regular_closed_days: Iterable[str] = (), site_status: str = "",
+                 notes: Optional[Dict[str, Any]] = None, error: Optional[str] = None,
+                 as_of: Optional[float] = None):
+        object.__setattr__(self, "facility", facility)
+        object.__setattr__(self, "date", date)
+        object.__setattr__(self, "weekday", weekday)
+        object.__setattr__(self, "is_closed", is_closed)
+        object.__setattr__(self, "reason", reason)
+        object.__setattr__(self, "confidence", confidence)
+        object.__setattr__(self, "source", source)
+        object.__setattr__(self, "signals", tuple(signals))
+        object.__setattr__(self, "is_regular_closed", is_regular_closed)
+        object.__setattr__(self, "regular_closed_days", tuple(regular_closed_days))
+        object.__setattr__(self, "site_status", site_status)
+        object.__setattr__(self, "notes", tuple(notes.items()) if notes else ())
+        object.__setattr__(self, "error", error)
+        object.__setattr__(self, "as_of", as_of if as_of is not None else time.time())
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], facility: str = "", date: str = "") -> "Verdict":
+        """施設別判定などが返す dict から作成（既知以外のキーは notes に残す）
+
+        facility・date は dict にない場合（エラー応答など）に使う値。
+        """
+        notes = {name: value for name, value in data.items() if name not in _DICT_FIELDS}
+        return cls(
+            facility=data.get("facility") or facility,
+            date=data.get("date") or date,
+            weekday=data.get("weekday", ""),
+            is_closed=data.get("is_closed"),
+            reason=data.get("closure_reason", ""),
+            confidence=data.get("confidence"),
+            source=data.get("source", ""),
+            notes=notes,
+            error=data.get("error"),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"facility": self.facility, "date": self.date}
+        if self.weekday:
+            data["weekday"] = self.weekday
+        if self.is_closed is not None:
+            data["is_closed"] = self.is_closed
+            data["closure_reason"] = self.reason
+        if self.confidence is not None:
+            data["confidence"] = self.confidence
+        if self.source:
+            data["source"] = self.source
+        if self.is_regular_closed is not None:
+            data["is_regular_closed"] = self.is_regular_closed
+            data["regular_closed_days"] = list(self.regular_closed_days)
+        if self.site_status:
+            data["site_status"] = self.site_status
+        data.update(self.notes)
+        if self.signals:
+            data["signals"] = [signal.to_dict() for signal in self.signals]
+        if self.error is not None:
+            data["error"] = self.error
+        data["as_of"] = datetime.fromtimestamp(self.as_of).isoformat(timespec="seconds")
+        return data
+
+
+# Verdict の属性として読み込む dict のキー
+_DICT_FIELDS = frozenset(("facility", "date", "weekday", "is_closed", "closure_reason", "confidence", "source",
+                          "error", "as_of"))
+
+
+def _encode(value: Any) -> Any:
+    to_dict = getattr(value, "to_dict", None)
+    if to_dict is None:
+        raise TypeError(f"{type(value).__name__} is not JSON serializable")
+    return to_dict()
+
+
+def dumps(payload: Any) -> str:
+    """判定結果の JSON（Verdict などのモデルを含む値をそのまま渡せる。区切りの空白なし）"""
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=_encode)
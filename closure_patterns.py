@@ -0,0 +1,189 @@
+"""休館判定用の正規表現レジストリとキーワードスキャナー
+
+パターンはインポート時に一度だけコンパイルする。
+キーワードは1つの連結パターンで1回走査し、位置情報を後段の判定で使い回す。
+"""
+import re
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+WEEKDAY_JP = ["月曜日", "火曜日", "水曜日", "木曜日", "金曜日", "土曜日", "日曜日"]
+
+# 開館・休館関連キーワード
+CLOSURE_KEYWORDS = ["休館", "休業", "臨時休館", "閉館", "休み", "定休"]
+OPEN_KEYWORDS = ["開館", "営業", "本日開館", "開いて"]
+# 日付の近くにあれば休館とみなす補助キーワード
+SPECIAL_CLOSURE_KEYWORDS = ["展示替", "展示替え", "メンテナンス", "設備点検", "工事", "整備", "改修", "CLOSED", "closed"]
+TODAY_ANCHORS = ["本日", "今日"]
+
+# 日付言及（和暦・西暦・スラッシュ表記、曜日注記、「〜10日」等の範囲）
+_WEEKDAY_NOTE = r'(?:\s*[(（][月火水木金土日](?:曜日?)?[)）])?'
+DATE_MENTION_PATTERN = re.compile(
+    r'(?:'
+    r'(?:(?P<era>令和|平成)(?P<era_year>\d{1,2}|元)年|(?P<year>\d{4})年)?(?P<month>\d{1,2})月(?P<day>\d{1,2})日'
+    r'|(?P<sy>\d{4})/(?P<sm>\d{1,2})/(?P<sd>\d{1,2})'
+    r'|(?P<m2>\d{1,2})/(?P<d2>\d{1,2})'
+    r')'
+    + _WEEKDAY_NOTE +
+    r'(?:\s*[〜～~\-－―]\s*(?:(?P<range_month>\d{1,2})[月/])?(?P<range_day>\d{1,2})(?!\d)日?' + _WEEKDAY_NOTE + r')?'
+)
+
+
+# 期間表現（「令和7年9月から12月中旬（予定）まで」「10月4日〜10日」「11月30日まで」）
+def _period_point(prefix: str) -> str:
+    return (
+        rf'(?:(?:(?P<{prefix}era>令和|平成)(?P<{prefix}era_year>\d{{1,2}}|元)年|(?P<{prefix}year>\d{{4}})年)?'
+        rf'(?P<{prefix}month>\d{{1,2}})月'
+        rf'(?:(?P<{prefix}day>\d{{1,2}})日|(?P<{prefix}part>上旬|初旬|中旬|下旬|末))?'
+        rf'|(?P<{prefix}day_only>\d{{1,2}})日)'
+    ) + _WEEKDAY_NOTE
+
+
+PERIOD_PATTERN = re.compile(
+    r'(?:' + _period_point('s_') + r'\s*(?P<connector>から|より|[〜～~\-－―])\s*)?'
+    + _period_point('e_') +
+    r'\s*(?P<tentative>[(（]?予定[)）]?)?\s*(?P<until>まで)?'
+)
+
+# 文の区切り
+SENTENCE_BREAK_PATTERN = re.compile(r'[。！？!?\n]')
+
+# 「10月 4(土)-10(金),14(火)」形式の月別休館日リスト
+MONTH_LINE_PATTERN = re.compile(r'(\d{1,2})月\s+([^\n]+)')
+DAY_WITH_WEEKDAY_PATTERN = re.compile(r'(\d{1,2})\([月火水木金土日]\)')
+DAY_RANGE_WITH_WEEKDAY_PATTERN = re.compile(r'(\d{1,2})\([月火水木金土日]\)-(\d{1,2})\([月火水木金土日]\)')
+
+# 鈴木大拙館iframe: 月ごとのブロック
+DAISETZ_MONTH_BLOCK_PATTERNS = {
+    10: re.compile(r'10月\s*([^\n]+?)(?=\n11月|\nお知らせ)', re.DOTALL),
+    11: re.compile(r'11月\s*([^\n]+?)(?=\n12月|\nお知らせ)', re.DOTALL),
+    12: re.compile(r'12月\s*([^\n]+?)(?=\nお知らせ|$)', re.DOTALL),
+}
+DAISETZ_DAY_PATTERN = re.compile(r'(?:^|,|\s)(\d{1,2})\(')
+DAISETZ_RANGE_PATTERN = re.compile(r'(\d+)\([^)]+\)-(\d+)\([^)]+\)')
+
+# 金沢21世紀美術館: 臨時開館日・臨時休館日の行
+TEMP_OPEN_LINE_PATTERN = re.compile(r'臨時開館日([^\n]*)')
+TEMP_CLOSE_LINE_PATTERN = re.compile(r'臨時休館日([^\n]*)')
+
+# 国立工芸館: JavaScriptのholidays配列
+CRAFT_HOLIDAYS_PATTERN = re.compile(
+    r'holidays\s*:\s*\[(.*?)\]|"holidays"\s*:\s*\[(.*?)\]|holidays\s*=\s*\[(.*?)\]',
+    re.DOTALL
+)
+ISO_DATE_LITERAL_PATTERN = re.compile(r'"(\d{4}-\d{2}-\d{2})"')
+
+# AI応答からJSONブロックを抽出
+JSON_BLOCK_PATTERN = re.compile(r'\{.*\}', re.DOTALL)
+
+
+class KeywordHits:
+    """キーワードの出現位置（1回の走査結果）"""
+    __slots__ = ("positions", "line_breaks")
+
+    def __init__(self, positions: Dict[str, List[int]], line_breaks: List[int]):
+        self.positions = positions
+        self.line_breaks = line_breaks
+
+    def has(self, keyword: str) -> bool:
+        return keyword in self.positions
+
+    def has_any(self, keywords: Iterable[str]) -> bool:
+        return any(keyword in self.positions for keyword in keywords)
+
+    def first_present(self, keywords: Iterable[str]) -> Optional[str]:
+        """指定順で最初に出現しているキーワード"""
+        for keyword in keywords:
+            if keyword in self.positions:
+                return keyword
+        return None
+
+    def get(self, keyword: str) -> List[int]:
+        return self.positions.get(keyword, [])
+
+    def line_of(self, pos: int) -> int:
+        """位置が何行目か（0始まり）"""
+        return bisect_right(self.line_breaks, pos)
+
+    def regular_closure_weekdays(self) -> Set[str]:
+        """「○曜日…休館」「休館…月曜日」「定休…月曜日/木曜日」が同一行にある曜日"""
+        weekdays = set()
+        for weekday in WEEKDAY_JP:
+            for pos in self.get(weekday):
+                line = self.line_of(pos)
+                if any(self.line_of(hit) == line and hit > pos for hit in self.get("休館")):
+                    weekdays.add(weekday)
+                    break
+
+        for marker, targets in (("休館", ["月曜日"]), ("定休", ["月曜日", "木曜日"])):
+            for pos in self.get(marker):
+                line = self.line_of(pos)
+                for weekday in targets:
+                    if any(self.line_of(hit) == line and hit > pos for hit in self.get(weekday)):
+                        weekdays.add(weekday)
+        return weekdays
+
+    def today_status(self, text: str) -> Optional[str]:
+        """「本日…開館」「本日…休館」等の直接表現から 'open' / 'closed' を判定"""
+        for anchor in TODAY_ANCHORS:
+            for keyword in ("開館", "休館"):
+                for pos in self.get(anchor):
+                    line = self.line_of(pos)
+                    end = next((hit for hit in self.get(keyword)
+                                if hit > pos and self.line_of(hit) == line), None)
+                    if end is None:
+                        continue
+                    matched_text = text[pos:end + len(keyword)]
+                    if "開館" in matched_text and "休館" not in matched_text:
+                        return "open"
+                    if "休館" in matched_text:
+                        return "closed"
+                    return None
+        return None
+
+
+class KeywordScanner:
+    """連結パターンによる単一走査のキーワード検出器
+
+    長いキーワードを先に並べた1つの選択パターンで走査し、
+    長いキーワードに含まれる短いキーワード（臨時休館 → 休館）の位置も同時に記録する。
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = sorted(set(keywords), key=len, reverse=True)
+        self.pattern = re.compile('|'.join(re.escape(k) for k in self.keywords) + r'|\n')
+        # キーワード → (内包するキーワード, オフセット) の一覧
+        self.contained: Dict[str, List[Tuple[str, int]]] = {}
+        for keyword in self.keywords:
+            inner = []
+            for other in self.keywords:
+                if other == keyword:
+                    continue
+                start = keyword.find(other)
+                while start != -1:
+                    inner.append((other, start))
+                    start = keyword.find(other, start + 1)
+            self.contained[keyword] = inner
+
+    def scan(self, text: str) -> KeywordHits:
+        positions: Dict[str, List[int]] = {}
+        line_breaks: List[int] = []
+        for match in self.pattern.finditer(text):
+            keyword = match.group()
+            start = match.start()
+            if keyword == "\n":
+                line_breaks.append(start)
+                continue
+            positions.setdefault(keyword, []).append(start)
+            for inner, offset in self.contained[keyword]:
+                positions.setdefault(inner, []).append(start + offset)
+        for hits in positions.values():
+            hits.sort()
+        return KeywordHits(positions, line_breaks)
+
+
+# 休館判定で使う全キーワードの走査器
+closure_scanner = KeywordScanner(
+    CLOSURE_KEYWORDS + OPEN_KEYWORDS + SPECIAL_CLOSURE_KEYWORDS + TODAY_ANCHORS + WEEKDAY_JP +
+    ["休館日", "臨時休館日", "臨時開館日", "全館休館", "全館休館中", "【全館休館中】", "休館中"]
+)
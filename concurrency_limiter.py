@@ -0,0 +1,259 @@
+"""
+Adaptive concurrency limiting for agent executions
+
+An AIMD controller bounds the number of agent / Bedrock executions in flight.
+The limit grows by about one per limit's worth of successful completions and
+shrinks multiplicatively when Bedrock throttles or when Bedrock or scrape
+latency rises well above its baseline. Requests over the limit are shed before
+any work is done instead of piling onto a throttled backend.
+
+The limit is per process: on Lambda it bounds batch and job fan-out within a
+container and sheds new agent work for a short backoff after a throttle.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+from config import AGENT_CONCURRENCY_INITIAL, AGENT_CONCURRENCY_MAX, AGENT_CONCURRENCY_MIN
+
+# Multiplicative decrease on a throttle and on sustained high latency
+THROTTLE_DECREASE = 0.5
+LATENCY_DECREASE = 0.9
+# At most one decrease per interval (in-flight calls report the same congestion)
+DECREASE_INTERVAL_SECONDS = 1.0
+# After a throttle, new executions are shed for this long
+THROTTLE_BACKOFF_SECONDS = 2.0
+
+# Latency is congested when the recent average exceeds the baseline by this factor
+LATENCY_TOLERANCE = 2.0
+# Smoothing for the recent average and the (slower) baseline
+RECENT_ALPHA = 0.3
+BASELINE_ALPHA = 0.02
+# Samples needed before a source's baseline is trusted
+MIN_SAMPLES = 10
+
+# Bedrock / AWS error codes treated as throttling
+THROTTLE_ERROR_CODES = ('ThrottlingException', 'TooManyRequestsException', 'ServiceUnavailableException')
+
+
+class OverloadedError(Exception):
+    """Raised when an execution is shed; retry_after is in seconds"""
+    
+    def __init__(self, retry_after: int, message: str = "The service is busy. Please try again shortly."):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.message = message
+
+
+def is_throttle_error(error: Exception) -> bool:
+    """
+    Whether an exception reports backend throttling
+    
+    Args:
+        error: Exception from a Bedrock call or the agent
+        
+    Returns:
+        True for ClientError throttling codes, or errors whose text names one
+        (the agent wraps model errors into its own messages)
+    """
+    # botocore ClientError carries a dict; requests exceptions carry a Response or None
+    response = getattr(error, 'response', None)
+    code = response.get('Error', {}).get('Code', '') if isinstance(response, dict) else ''
+    return code in THROTTLE_ERROR_CODES or any(name in str(error) for name in THROTTLE_ERROR_CODES)
+
+
+class LatencyTracker:
+    """Recent and baseline latency (exponential moving averages) for one source"""
+    __slots__ = ('recent', 'baseline', 'samples')
+    
+    def __init__(self):
+        self.recent = 0.0
+        self.baseline = 0.0
+        self.samples = 0
+    
+    def update(self, latency: float) -> bool:
+        """Add a sample; returns True when latency is congested"""
+        if self.samples == 0:
+            self.recent = self.baseline = latency
+        else:
+            self.recent += RECENT_ALPHA * (latency - self.recent)
+            self.baseline += BASELINE_ALPHA * (latency - self.baseline)
+        self.samples += 1
+        return self.samples >= MIN_SAMPLES and self.recent > self.baseline * LATENCY_TOLERANCE
+
+
+class CallObservation:
+    """Outcome of a tracked call; set throttled for throttles that are not exceptions (HTTP 429)"""
+    __slots__ = ('throttled',)
+    
+    def __init__(self):
+        self.throttled = False
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD limit on in-flight agent executions
+    
+    Executions hold a permit for their whole duration; Bedrock and scrape calls
+    inside them report latency and throttles through track() or observe().
+    """
+    
+    def __init__(self, initial_limit: int = AGENT_CONCURRENCY_INITIAL, min_limit: int = AGENT_CONCURRENCY_MIN,
+                 max_limit: int = AGENT_CONCURRENCY_MAX, clock=time.monotonic):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.clock = clock
+        self._limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self._in_flight = 0
+        self._shed_until = 0.0
+        self._last_decrease = float('-inf')
+        self._latency: Dict[str, LatencyTracker] = {}
+        self._counters = {'admitted': 0, 'shed': 0, 'throttles': 0, 'congested': 0}
+        self._lock = threading.Lock()
+    
+    @property
+    def limit(self) -> int:
+        """Current number of executions allowed in flight"""
+        return int(self._limit)
+    
+    def try_acquire(self) -> bool:
+        """
+        Take a permit if one is available
+        
+        Returns:
+            True if the execution may start (release() must follow)
+        """
+        with self._lock:
+            if self.clock() < self._shed_until or self._in_flight >= int(self._limit):
+                self._counters['shed'] += 1
+                return False
+            self._in_flight += 1
+            self._counters['admitted'] += 1
+            return True
+    
+    def retry_after(self) -> int:
+        """Seconds a shed client should wait before retrying"""
+        with self._lock:
+            return max(1, int(math.ceil(self._shed_until - self.clock())))
+    
+    def release(self, latency: float, throttled: bool = False) -> None:
+        """
+        Return a permit and feed the execution outcome to the controller
+        
+        Args:
+            latency: Execution time in seconds
+            throttled: Whether the execution hit backend throttling
+        """
+        with self._lock:
+            self._in_flight -= 1
+        # Additive increase only when this execution saw no congestion
+        if not self.observe('agent', latency, throttled):
+            with self._lock:
+                self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+    
+    def observe(self, source: str, latency: float, throttled: bool = False) -> bool:
+        """
+        Record one backend call
+        
+        Args:
+            source: 'bedrock', 'scrape' or 'agent'
+            latency: Call time in seconds
+            throttled: Whether the backend throttled the call
+            
+        Returns:
+            True if the call signalled congestion (throttle or high latency)
+        """
+        with self._lock:
+            now = self.clock()
+            if throttled:
+                self._counters['throttles'] += 1
+                self._shed_until = max(self._shed_until, now + THROTTLE_BACKOFF_SECONDS)
+                self._decrease(THROTTLE_DECREASE, now)
+                return True
+            tracker = self._latency.get(source)
+            if tracker is None:
+                tracker = self._latency[source] = LatencyTracker()
+            if tracker.update(latency):
+                self._counters['congested'] += 1
+                self._decrease(LATENCY_DECREASE, now)
+                return True
+            return False
+    
+    def _decrease(self, factor: float, now: float) -> None:
+        """Multiplicative decrease, once per interval (caller holds the lock)"""
+        if now - self._last_decrease < DECREASE_INTERVAL_SECONDS:
+            return
+        self._last_decrease = now
+        self._limit = max(float(self.min_limit), self._limit * factor)
+    
+    @contextmanager
+    def permit(self) -> Iterator[None]:
+        """
+        Run an agent execution under the limit
+        
+        Raises:
+            OverloadedError: When the execution is shed, or when it hit throttling
+            (callers must not retry it against another model right away)
+        """
+        if not self.try_acquire():
+            raise OverloadedError(self.retry_after())
+        with self.acquired():
+            yield
+    
+    @contextmanager
+    def acquired(self) -> Iterator[None]:
+        """
+        Run an execution that already holds a permit from try_acquire(), releasing it when done
+        
+        Raises:
+            OverloadedError: When the execution hit throttling
+        """
+        start = self.clock()
+        throttled = False
+        try:
+            yield
+        except OverloadedError:
+            throttled = True
+            raise
+        except Exception as e:
+            if not is_throttle_error(e):
+                raise
+            throttled = True
+            raise OverloadedError(int(math.ceil(THROTTLE_BACKOFF_SECONDS))) from e
+        finally:
+            self.release(self.clock() - start, throttled)
+    
+    @contextmanager
+    def track(self, source: str) -> Iterator[CallObservation]:
+        """
+        Time a Bedrock or scrape call and report it; exceptions are re-raised
+        
+        Args:
+            source: 'bedrock' or 'scrape'
+        """
+        observation = CallObservation()
+        start = self.clock()
+        try:
+            yield observation
+        except Exception as e:
+            self.observe(source, self.clock() - start, is_throttle_error(e))
+            raise
+        self.observe(source, self.clock() - start, observation.throttled)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Current limit, load and counters"""
+        with self._lock:
+            return {
+                'limit': int(self._limit),
+                'inFlight': self._in_flight,
+                'shedding': self.clock() < self._shed_until,
+                'latency': {source: {'recent': round(tracker.recent, 3), 'baseline': round(tracker.baseline, 3)}
+                            for source, tracker in self._latency.items()},
+                **self._counters
+            }
+
+
+# Global concurrency limiter instance
+concurrency_limiter = AdaptiveConcurrencyLimiter()
@@ -156,4 +156,61 @@ FACILITIES = {
 
 # スクレイピング設定
 REQUEST_TIMEOUT = 10
-USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
\ No newline at end of file
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+# 取得済みページのキャッシュ有効期限（秒）
+DOCUMENT_CACHE_TTL = 600
+
+# 期間表現の解析とAI解析の段落選びに使う1ページあたりの最大文字数（定型文を除いた本文）
+PAGE_TEXT_MAX_CHARS = 8000
+
+# AI解析プロンプトに含めるページ情報のトークン予算
+PROMPT_CONTEXT_TOKEN_BUDGET = 1500
+
+# ホスト単位で学習した共通ヘッダー・ナビゲーション・フッターの保存先
+# （BOILERPLATE_TABLE があれば DynamoDB、なければ JSON ファイル）
+BOILERPLATE_TABLE = os.environ.get("BOILERPLATE_TABLE", "")
+BOILERPLATE_STORE_PATH = os.environ.get("BOILERPLATE_STORE_PATH", "/tmp/kzpass_boilerplate.json")
+
+# 応答キャッシュ（有効期限は取得済みページのキャッシュと揃える）
+RESPONSE_CACHE_TTL = DOCUMENT_CACHE_TTL
+RESPONSE_CACHE_MEMORY_ENTRIES = 256
+# 共有ストア: RESPONSE_CACHE_TABLE があれば DynamoDB、なければ SQLite ファイル
+RESPONSE_CACHE_TABLE = os.environ.get("RESPONSE_CACHE_TABLE", "")
+RESPONSE_CACHE_PATH = os.environ.get("RESPONSE_CACHE_PATH", "/tmp/kzpass_response_cache.sqlite3")
+
+# API Gateway が同期リクエストを打ち切るまでの時間（29秒）から応答の返却分を引いた締め切り（秒）。
+# Lambda のタイムアウトはジョブのワーカー用に長いため、同期リクエストの締め切りはこれで抑える
+API_GATEWAY_TIMEOUT_SECONDS = 28.0
+
+# 非同期ジョブ（JOB_TABLE があれば DynamoDB、なければ SQLite ファイル）
+JOB_TABLE = os.environ.get("JOB_TABLE", "")
+JOB_STORE_PATH = os.environ.get("JOB_STORE_PATH", "/tmp/kzpass_jobs.sqlite3")
+JOB_TTL = 24 * 60 * 60
+# ジョブ1件の実行時間の上限（秒）。Lambda のワーカーはタイムアウト（deploy_lambda.py の timeout）、
+# ローカルのスレッドはこの値を締め切りにする
+JOB_TIME_BUDGET_SECONDS = 300
+# ワーカーが締め切り後に結果を書き込むまでの猶予（秒）。リース（締め切り＋猶予）を過ぎても
+# 実行中のジョブは、ワーカーが落ちたとみなして失敗として返す
+JOB_LEASE_GRACE_SECONDS = 30
+# 登録後この秒数を過ぎても開始されないジョブは失敗として返す（ワーカーの起動に失敗した場合）
+JOB_START_TIMEOUT_SECONDS = 120
+# ジョブ1件に保存する途中結果・最終結果の上限（DynamoDB の項目上限 400KB に収める）
+JOB_MAX_RESULT_BYTES = 300 * 1024
+# 期間指定ジョブの最大日数
+JOB_MAX_RANGE_DAYS = 31
+
+# 冪等キー（IDEMPOTENCY_TABLE があれば DynamoDB、なければ SQLite ファイル）
+IDEMPOTENCY_TABLE = os.environ.get("IDEMPOTENCY_TABLE", "")
+IDEMPOTENCY_STORE_PATH = os.environ.get("IDEMPOTENCY_STORE_PATH", "/tmp/kzpass_idempotency.sqlite3")
+# 完了した応答を再送に返す期間と、処理中の記録の有効期限（Lambda のタイムアウトに合わせる）
+IDEMPOTENCY_TTL = 10 * 60
+IDEMPOTENCY_LEASE_SECONDS = 5 * 60
+
+# エージェント（Bedrock）実行の同時実行数の適応制御（AIMD）
+AGENT_CONCURRENCY_INITIAL = int(os.environ.get("AGENT_CONCURRENCY_INITIAL", "8"))
+AGENT_CONCURRENCY_MIN = int(os.environ.get("AGENT_CONCURRENCY_MIN", "1"))
+AGENT_CONCURRENCY_MAX = int(os.environ.get("AGENT_CONCURRENCY_MAX", "32"))
+
+# Bedrock 呼び出しの同時実行数の上限（model_invoker の実行枠・接続プール）
+MODEL_MAX_CONCURRENCY = int(os.environ.get("MODEL_MAX_CONCURRENCY", "8"))
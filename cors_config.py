@@ -11,14 +11,15 @@ class CORSConfig:
     def __init__(self):
         # Get allowed origins from environment or use defaults
         self.allowed_origins = self._get_allowed_origins()
-        self.allowed_methods = ['POST', 'OPTIONS']
+        self.allowed_methods = ['GET', 'POST', 'OPTIONS']
         self.allowed_headers = [
             'Content-Type',
             'X-Amz-Date',
             'Authorization',
             'X-Api-Key',
             'X-Amz-Security-Token',
-            'X-Requested-With'
+            'X-Requested-With',
+            'Idempotency-Key'
         ]
         self.max_age = 86400  # 24 hours
         
@@ -148,6 +149,43 @@ def create_cors_response(status_code: int, body: Dict, origin: Optional[str] = N
         'body': json.dumps(body, ensure_ascii=False)
     }
 
+def format_sse_event(event: str, data: Dict) -> str:
+    """
+    Format one Server-Sent Events message
+    
+    Args:
+        event: Event name
+        data: JSON-serializable event payload
+        
+    Returns:
+        SSE message text
+    """
+    import json
+    
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def create_sse_response(status_code: int, body: str, origin: Optional[str] = None) -> Dict:
+    """
+    Create API Gateway response carrying a Server-Sent Events body
+    
+    Args:
+        status_code: HTTP status code
+        body: Concatenated SSE messages
+        origin: Request origin
+        
+    Returns:
+        API Gateway response with CORS headers
+    """
+    return {
+        'statusCode': status_code,
+        'headers': {
+            'Content-Type': 'text/event-stream; charset=utf-8',
+            'Cache-Control': 'no-cache',
+            **cors_config.get_cors_headers(origin)
+        },
+        'body': body
+    }
+
 def handle_preflight_request(origin: Optional[str] = None) -> Dict:
     """
     Handle CORS preflight OPTIONS request
@@ -0,0 +1,245 @@
+"""日付言及の抽出と文書単位の日付インデックス
+
+ページを1回だけ走査して全ての日付言及（和暦・西暦・範囲・月別休館日リスト）を抽出し、
+日付をキーにした辞書にまとめる。対象日が何日あっても辞書引きで判定できる。
+"""
+import re
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from closure_patterns import (
+    CLOSURE_KEYWORDS, OPEN_KEYWORDS, SPECIAL_CLOSURE_KEYWORDS,
+    DATE_MENTION_PATTERN, SENTENCE_BREAK_PATTERN, MONTH_LINE_PATTERN,
+    DAY_WITH_WEEKDAY_PATTERN, DAY_RANGE_WITH_WEEKDAY_PATTERN,
+    KeywordHits, closure_scanner
+)
+
+# 和暦 → 西暦のオフセット（令和1年 = 2019年）
+ERA_OFFSETS = {
+    "令和": 2018,
+    "平成": 1988,
+}
+
+# 範囲表記を展開する最大日数（誤検出で巨大な範囲を作らないため）
+MAX_RANGE_DAYS = 120
+
+# キーワード → 種別
+KEYWORD_KINDS = {keyword: "closure" for keyword in CLOSURE_KEYWORDS + SPECIAL_CLOSURE_KEYWORDS}
+KEYWORD_KINDS.update({keyword: "open" for keyword in OPEN_KEYWORDS})
+KEYWORD_KINDS.update({"休館日": "closure", "臨時休館日": "closure", "臨時開館日": "open"})
+
+# キーワードと、その後に続く日付の間に置けるつなぎ
+# （「休館期間：12月29日〜」「臨時休館日 10/5」「休館日 10月 4(土)-10(金),14(火)」など）
+_LEADING_GAP_PATTERN = re.compile(r'(?:[\s:：は・,、\-〜～()（）【】「」\[\]月火水木金土日\d]|期間|日程|予定)*')
+MAX_LEADING_GAP = 40
+
+# 日付とその後に続くキーワードの間の最大文字数（「11月30日まで休館」「〜12月中旬まで、工事のため休館」）
+MAX_TRAILING_GAP = 20
+
+# 日付の直前にあれば、その日付は会期・開催期間（休館ではない）
+EVENT_LABEL_PATTERN = re.compile(r'(?:会期|開催期間|開催日|展示期間|期間中)\s*[:：]?\s*$')
+EVENT_LABEL_LOOKBEHIND = 10
+
+# キーワードの直後にあれば、そのキーワードは別の項目の見出し（「休館日：月曜日」）
+_LABEL_SUFFIX_PATTERN = re.compile(r'日?\s*[:：]')
+
+
+def era_to_year(era: str, era_year: str) -> int:
+    """和暦の年を西暦に変換（「元」年対応）"""
+    number = 1 if era_year == "元" else int(era_year)
+    return ERA_OFFSETS[era] + number
+
+
+class DateMention:
+    """ページ中の1つの日付言及"""
+    __slots__ = ("start_date", "end_date", "start", "end", "text", "sentence", "keyword", "keyword_kind")
+
+    def __init__(self, start_date: date, end_date: date, start: int, end: int, text: str,
+                 sentence: str, keyword: Optional[str], keyword_kind: Optional[str]):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.start = start
+        self.end = end
+        self.text = text
+        self.sentence = sentence
+        self.keyword = keyword
+        self.keyword_kind = keyword_kind
+
+    @property
+    def is_range(self) -> bool:
+        return self.start_date != self.end_date
+
+    def to_dict(self) -> Dict:
+        return {
+            "start_date": self.start_date.isoformat(),
+            "end_date": self.end_date.isoformat(),
+            "text": self.text,
+            "sentence": self.sentence,
+            "keyword": self.keyword,
+            "keyword_kind": self.keyword_kind,
+        }
+
+
+class DateIndex:
+    """日付 → 言及一覧"""
+
+    def __init__(self, mentions: List[DateMention]):
+        self.mentions = mentions
+        self.by_date: Dict[date, List[DateMention]] = {}
+        for mention in mentions:
+            day = mention.start_date
+            while day <= mention.end_date:
+                self.by_date.setdefault(day, []).append(mention)
+                day += timedelta(days=1)
+
+    def lookup(self, target: date) -> List[DateMention]:
+        return self.by_date.get(target, [])
+
+    def closure_mentions(self, target: date) -> List[DateMention]:
+        return [m for m in self.lookup(target) if m.keyword_kind == "closure"]
+
+    def open_mentions(self, target: date) -> List[DateMention]:
+        return [m for m in self.lookup(target) if m.keyword_kind == "open"]
+
+    def __contains__(self, target: date) -> bool:
+        return target in self.by_date
+
+    def __len__(self) -> int:
+        return len(self.mentions)
+
+
+class _SentenceLocator:
+    """位置 → 文の範囲"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.breaks = [m.start() for m in SENTENCE_BREAK_PATTERN.finditer(text)]
+
+    def bounds(self, start: int, end: int):
+        i = bisect_left(self.breaks, start)
+        sentence_start = self.breaks[i - 1] + 1 if i > 0 else 0
+        j = bisect_left(self.breaks, end)
+        sentence_end = self.breaks[j] if j < len(self.breaks) else len(self.text)
+        return sentence_start, sentence_end
+
+
+def governing_keyword(text: str, hits: KeywordHits, start: int, end: int, lower: int, upper: int):
+    """日付（text[start:end]）を修飾するキーワードのうち最も近いもの
+
+    同じ文にあるだけでは採用しない。日付の直前（つなぎの語だけを挟む）か、日付の直後の
+    近く（区切りの「：」を挟まず、キーワード自体が「休館日：」のような見出しでない）に
+    あるものに限る。会期・開催期間の見出しが付いた日付は修飾しない。
+    """
+    if EVENT_LABEL_PATTERN.search(text, max(lower, start - EVENT_LABEL_LOOKBEHIND), start):
+        return None, None
+    best = None
+    for keyword, kind in KEYWORD_KINDS.items():
+        positions = hits.get(keyword)
+        if not positions:
+            continue
+        i = bisect_left(positions, max(lower, start - MAX_LEADING_GAP - len(keyword)))
+        j = bisect_right(positions, min(upper, end + MAX_TRAILING_GAP))
+        for pos in positions[i:j]:
+            keyword_end = pos + len(keyword)
+            if keyword_end > upper:
+                continue
+            if pos >= end:
+                gap = text[end:pos]
+                if any(mark in gap for mark in ":："):
+                    continue
+                if _LABEL_SUFFIX_PATTERN.match(text, keyword_end):
+                    continue
+                distance = pos - end
+            elif keyword_end <= start:
+                if _LEADING_GAP_PATTERN.fullmatch(text, keyword_end, start) is None:
+                    continue
+                distance = start - keyword_end
+            else:
+                distance = 0
+            # 同じ距離なら長いキーワード（臨時休館 > 休館）を採用
+            if best is None or (distance, -len(keyword)) < (best[2], -len(best[0])):
+                best = (keyword, kind, distance)
+    return (best[0], best[1]) if best else (None, None)
+
+
+def _safe_date(year: int, month: int, day: int) -> Optional[date]:
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def extract_date_mentions(text: str, reference_year: int, hits: Optional[KeywordHits] = None) -> List[DateMention]:
+    """テキストから日付言及を1回の走査で抽出"""
+    if hits is None:
+        hits = closure_scanner.scan(text)
+    locator = _SentenceLocator(text)
+    mentions: List[DateMention] = []
+
+    def add(start_date: date, end_date: date, start: int, end: int, anchor: Optional[int] = None):
+        # 月別リストの日付は行頭（anchor）を修飾するキーワードに従う
+        lower, upper = locator.bounds(start, end)
+        keyword_start = start if anchor is None else anchor
+        keyword, kind = governing_keyword(text, hits, keyword_start, max(end, keyword_start), lower, upper)
+        mentions.append(DateMention(
+            start_date, end_date, start, end, text[start:end],
+            text[lower:upper].strip(), keyword, kind
+        ))
+
+    # 年の記載がない日付は直前に出てきた年を引き継ぐ
+    current_year = reference_year
+    for match in DATE_MENTION_PATTERN.finditer(text):
+        g = match.groupdict()
+        if g["month"]:
+            if g["era"]:
+                current_year = era_to_year(g["era"], g["era_year"])
+            elif g["year"]:
+                current_year = int(g["year"])
+            year, month, day = current_year, int(g["month"]), int(g["day"])
+        elif g["sy"]:
+            current_year = int(g["sy"])
+            year, month, day = current_year, int(g["sm"]), int(g["sd"])
+        else:
+            year, month, day = current_year, int(g["m2"]), int(g["d2"])
+
+        start_date = _safe_date(year, month, day)
+        if not start_date:
+            continue
+
+        end_date = start_date
+        if g["range_day"]:
+            end_month = int(g["range_month"]) if g["range_month"] else month
+            end_year = year + 1 if end_month < month else year
+            candidate = _safe_date(end_year, end_month, int(g["range_day"]))
+            if candidate and start_date <= candidate <= start_date + timedelta(days=MAX_RANGE_DAYS):
+                end_date = candidate
+
+        add(start_date, end_date, match.start(), match.end())
+
+    # 「10月 4(土)-10(金),14(火)」形式の月別リスト
+    for match in MONTH_LINE_PATTERN.finditer(text):
+        month = int(match.group(1))
+        body_start = match.start(2)
+        body = match.group(2)
+        range_spans = []
+        for range_match in DAY_RANGE_WITH_WEEKDAY_PATTERN.finditer(body):
+            start_date = _safe_date(reference_year, month, int(range_match.group(1)))
+            end_date = _safe_date(reference_year, month, int(range_match.group(2)))
+            if start_date and end_date and start_date <= end_date:
+                add(start_date, end_date, body_start + range_match.start(), body_start + range_match.end(),
+                    match.start())
+                range_spans.append((range_match.start(), range_match.end()))
+        for day_match in DAY_WITH_WEEKDAY_PATTERN.finditer(body):
+            if any(s <= day_match.start() < e for s, e in range_spans):
+                continue
+            day = _safe_date(reference_year, month, int(day_match.group(1)))
+            if day:
+                add(day, day, body_start + day_match.start(), body_start + day_match.end(), match.start())
+
+    return mentions
+
+
+def build_date_index(text: str, reference_year: int, hits: Optional[KeywordHits] = None) -> DateIndex:
+    """文書単位の日付インデックスを作成"""
+    return DateIndex(extract_date_mentions(text, reference_year, hits))
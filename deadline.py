@@ -0,0 +1,84 @@
+"""リクエスト単位の締め切り
+
+lambda_handler（Lambda の残り実行時間）や invoke_proper で作成し、contextvars で
+エージェントのツール・FacilityScraper・Bedrock 呼び出しまで伝える。
+各層は固定のタイムアウトを残り時間で切り詰めて使い、間に合わない通信・モデル呼び出しは
+行わずに DeadlineExceeded を送出する（呼び出し側はキャッシュやルールベースの判定に切り替える）。
+締め切りが設定されていなければ従来の固定タイムアウトのまま動作する。
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+# これより残り時間が短ければ通信・モデル呼び出しを始めない（秒）
+MIN_FETCH_SECONDS = 0.5
+MIN_MODEL_SECONDS = 2.0
+
+
+class DeadlineExceeded(TimeoutError):
+    """締め切りまでに処理を終えられない"""
+
+
+class Deadline:
+    """締め切り時刻（time.monotonic() 基準）"""
+    __slots__ = ("expires_at",)
+
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        return cls(time.monotonic() + seconds)
+
+    @classmethod
+    def from_lambda_context(cls, context: Any, margin: float, default: float) -> "Deadline":
+        """Lambda の残り実行時間から margin 秒を引いた締め切り（context がなければ default 秒後）"""
+        if hasattr(context, "get_remaining_time_in_millis"):
+            return cls.after(context.get_remaining_time_in_millis() / 1000 - margin)
+        return cls.after(default)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def __repr__(self) -> str:
+        return f"Deadline(remaining={self.remaining():.2f}s)"
+
+
+_current: contextvars.ContextVar = contextvars.ContextVar("request_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """現在の処理の締め切り（未設定なら None）"""
+    return _current.get()
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """このブロック内の締め切りを設定（None なら外側の締め切りのまま）"""
+    if deadline is None:
+        yield current_deadline()
+        return
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def timeout_for(limit: float, minimum: float = MIN_FETCH_SECONDS) -> float:
+    """固定のタイムアウト limit を締め切りまでの残り時間で切り詰める
+
+    Raises:
+        DeadlineExceeded: 残り時間が minimum 秒未満の場合
+    """
+    deadline = current_deadline()
+    if deadline is None:
+        return limit
+    remaining = deadline.remaining()
+    if remaining < minimum:
+        raise DeadlineExceeded(f"{remaining:.2f}s left, {minimum}s needed")
+    return min(limit, remaining)
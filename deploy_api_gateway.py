@@ -8,7 +8,7 @@ import sys
 import json
 import boto3
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from botocore.exceptions import ClientError
 from api_gateway_cors import configure_api_cors
 
@@ -162,7 +162,32 @@ class APIGatewayDeployer:
             resource_id: Resource ID
             lambda_arn: Lambda function ARN
         """
-        print("Creating POST method with CORS support")
+        self._create_proxy_method(api_id, resource_id, lambda_arn, 'POST', ['200', '202', '400', '429', '500'])
+    
+    def create_get_method(self, api_id: str, resource_id: str, lambda_arn: str) -> None:
+        """
+        Create GET method for asynchronous job status polling (?jobId=...)
+        
+        Args:
+            api_id: API Gateway ID
+            resource_id: Resource ID
+            lambda_arn: Lambda function ARN
+        """
+        self._create_proxy_method(api_id, resource_id, lambda_arn, 'GET', ['200', '400', '404', '500'])
+    
+    def _create_proxy_method(self, api_id: str, resource_id: str, lambda_arn: str,
+                             http_method: str, status_codes: List[str]) -> None:
+        """
+        Create a Lambda proxy method with CORS response headers
+        
+        Args:
+            api_id: API Gateway ID
+            resource_id: Resource ID
+            lambda_arn: Lambda function ARN
+            http_method: HTTP method
+            status_codes: Method response status codes
+        """
+        print(f"Creating {http_method} method with CORS support")
         
         # Lambda integration URI
         lambda_uri = f"arn:aws:apigateway:{self.region}:lambda:path/2015-03-31/functions/{lambda_arn}/invocations"
@@ -172,18 +197,18 @@ class APIGatewayDeployer:
             self.apigateway_client.put_method(
                 restApiId=api_id,
                 resourceId=resource_id,
-                httpMethod='POST',
+                httpMethod=http_method,
                 authorizationType='NONE',
                 requestParameters={}
             )
             
             # Create method responses for different status codes
-            for status_code in ['200', '400', '429', '500']:
+            for status_code in status_codes:
                 try:
                     self.apigateway_client.put_method_response(
                         restApiId=api_id,
                         resourceId=resource_id,
-                        httpMethod='POST',
+                        httpMethod=http_method,
                         statusCode=status_code,
                         responseParameters={
                             'method.response.header.Access-Control-Allow-Origin': True,
@@ -200,22 +225,22 @@ class APIGatewayDeployer:
             self.apigateway_client.put_integration(
                 restApiId=api_id,
                 resourceId=resource_id,
-                httpMethod='POST',
+                httpMethod=http_method,
                 type='AWS_PROXY',
                 integrationHttpMethod='POST',
                 uri=lambda_uri
             )
             
-            print("Created POST method with Lambda integration and CORS support")
+            print(f"Created {http_method} method with Lambda integration and CORS support")
             
         except ClientError as e:
             if 'already exists' in str(e):
-                print("POST method already exists, updating integration")
+                print(f"{http_method} method already exists, updating integration")
                 # Update integration
                 self.apigateway_client.put_integration(
                     restApiId=api_id,
                     resourceId=resource_id,
-                    httpMethod='POST',
+                    httpMethod=http_method,
                     type='AWS_PROXY',
                     integrationHttpMethod='POST',
                     uri=lambda_uri
@@ -243,7 +268,7 @@ class APIGatewayDeployer:
         account_id = sts_client.get_caller_identity()['Account']
         
         # Source ARN for the permission
-        source_arn = f"arn:aws:execute-api:{self.region}:{account_id}:{api_id}/*/POST/query"
+        source_arn = f"arn:aws:execute-api:{self.region}:{account_id}:{api_id}/*/*/query"
         
         try:
             self.lambda_client.add_permission(
@@ -331,6 +356,9 @@ class APIGatewayDeployer:
             # Create POST method
             self.create_post_method(api_id, query_resource_id, lambda_arn)
             
+            # Create GET method (asynchronous job status)
+            self.create_get_method(api_id, query_resource_id, lambda_arn)
+            
             # Configure CORS for the resource
             print("Configuring CORS for API Gateway...")
             allowed_origins = self._get_allowed_origins()
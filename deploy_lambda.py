@@ -18,22 +18,48 @@ class LambdaDeployer:
         self.region = region
         self.lambda_client = boto3.client('lambda', region_name=region)
         self.iam_client = boto3.client('iam', region_name=region)
+        self.dynamodb_client = boto3.client('dynamodb', region_name=region)
         
         # Configuration
         self.function_name = 'kanazawa-cultural-facility-demo'
         self.handler = 'lambda_handler.lambda_handler'
         self.runtime = 'python3.9'
-        self.timeout = 30
+        # API Gateway still cuts synchronous requests at 29s (request deadlines are capped at
+        # config.API_GATEWAY_TIMEOUT_SECONDS); the longer limit is for async job workers
+        self.timeout = 300
         self.memory_size = 512
+        # Shared job store: async job workers run in separate invocations, so without it
+        # long-running requests are rejected (must match the kzpass-* IAM resource)
+        self.job_table = os.getenv('JOB_TABLE') or 'kzpass-jobs'
         
         # Files to include in deployment package
         self.include_files = [
             'lambda_handler.py',
             'cors_config.py',
             'rate_limiter.py',
+            'rate_limit_store.py',
             'agent.py',
             'config.py',
-            'facility_scraper.py'
+            'facility_scraper.py',
+            'charset_resolver.py',
+            'closure_patterns.py',
+            'date_index.py',
+            'scraped_document.py',
+            'period_parser.py',
+            'text_normalizer.py',
+            'prompt_context.py',
+            'boilerplate.py',
+            'prompts.py',
+            'prompt_cache.py',
+            'fast_path.py',
+            'response_cache.py',
+            'job_store.py',
+            'concurrency_limiter.py',
+            'model_invoker.py',
+            'deadline.py',
+            'idempotency_store.py',
+            'tool_results.py',
+            'closure_models.py'
         ]
     
     def create_deployment_package(self, package_path: str = 'lambda_deployment.zip') -> str:
@@ -134,9 +160,67 @@ class LambdaDeployer:
                 PolicyDocument=json.dumps(bedrock_policy)
             )
             
+            # Asynchronous jobs: self-invocation of the worker and the shared job/response tables
+            jobs_policy = {
+                "Version": "2012-10-17",
+                "Statement": [
+                    {
+                        "Effect": "Allow",
+                        "Action": "lambda:InvokeFunction",
+                        "Resource": f"arn:aws:lambda:{self.region}:*:function:{self.function_name}"
+                    },
+                    {
+                        "Effect": "Allow",
+                        "Action": [
+                            "dynamodb:GetItem",
+                            "dynamodb:PutItem",
+                            "dynamodb:UpdateItem",
+                            "dynamodb:DeleteItem"
+                        ],
+                        "Resource": f"arn:aws:dynamodb:{self.region}:*:table/kzpass-*"
+                    }
+                ]
+            }
+            
+            self.iam_client.put_role_policy(
+                RoleName=role_name,
+                PolicyName='AsyncJobAccess',
+                PolicyDocument=json.dumps(jobs_policy)
+            )
+            
             print(f"Created execution role: {role_arn}")
             return role_arn
     
+    def create_job_table(self) -> str:
+        """
+        Create the DynamoDB table for async jobs (partition key job_id, TTL on expires_at)
+        
+        Returns:
+            Table name
+        """
+        try:
+            self.dynamodb_client.describe_table(TableName=self.job_table)
+            print(f"Using existing job table: {self.job_table}")
+            return self.job_table
+            
+        except self.dynamodb_client.exceptions.ResourceNotFoundException:
+            print(f"Creating job table: {self.job_table}")
+            
+            self.dynamodb_client.create_table(
+                TableName=self.job_table,
+                AttributeDefinitions=[{'AttributeName': 'job_id', 'AttributeType': 'S'}],
+                KeySchema=[{'AttributeName': 'job_id', 'KeyType': 'HASH'}],
+                BillingMode='PAY_PER_REQUEST'
+            )
+            self.dynamodb_client.get_waiter('table_exists').wait(TableName=self.job_table)
+            self.dynamodb_client.update_time_to_live(
+                TableName=self.job_table,
+                TimeToLiveSpecification={'Enabled': True, 'AttributeName': 'expires_at'}
+            )
+            
+            print(f"Created job table: {self.job_table}")
+            return self.job_table
+    
     def deploy_function(self, package_path: str, role_arn: str) -> Dict[str, Any]:
         """
         Deploy Lambda function
@@ -161,6 +245,18 @@ class LambdaDeployer:
             )
             print("Updated existing Lambda function")
             
+            # Point functions deployed before the job table existed at it
+            configuration = self.lambda_client.get_function_configuration(FunctionName=self.function_name)
+            variables = configuration.get('Environment', {}).get('Variables', {})
+            if variables.get('JOB_TABLE') != self.job_table:
+                self.lambda_client.get_waiter('function_updated').wait(FunctionName=self.function_name)
+                variables['JOB_TABLE'] = self.job_table
+                self.lambda_client.update_function_configuration(
+                    FunctionName=self.function_name,
+                    Environment={'Variables': variables}
+                )
+                print(f"Set JOB_TABLE={self.job_table}")
+            
         except self.lambda_client.exceptions.ResourceNotFoundException:
             # Create new function
             response = self.lambda_client.create_function(
@@ -175,7 +271,16 @@ class LambdaDeployer:
                 Environment={
                     'Variables': {
                         'CORS_ALLOWED_ORIGINS': '*',  # Configure for production
-                        'BEDROCK_AGENTCORE_MEMORY_ID': os.getenv('BEDROCK_AGENTCORE_MEMORY_ID', '')
+                        'BEDROCK_AGENTCORE_MEMORY_ID': os.getenv('BEDROCK_AGENTCORE_MEMORY_ID', ''),
+                        # Shared DynamoDB tables (the job table is created by create_job_table)
+                        'JOB_TABLE': self.job_table,
+                        'RESPONSE_CACHE_TABLE': os.getenv('RESPONSE_CACHE_TABLE', ''),
+                        'BOILERPLATE_TABLE': os.getenv('BOILERPLATE_TABLE', ''),
+                        # Without IDEMPOTENCY_TABLE each container keeps its own SQLite store,
+                        # so retries routed to another container are not deduplicated
+                        'IDEMPOTENCY_TABLE': os.getenv('IDEMPOTENCY_TABLE', ''),
+                        # Shared rate limit buckets across instances (e.g. redis://host:6379/0)
+                        'RATE_LIMIT_REDIS_URL': os.getenv('RATE_LIMIT_REDIS_URL', '')
                     }
                 }
             )
@@ -191,12 +296,19 @@ class LambdaDeployer:
             Deployment result
         """
         try:
+            for variable in ('IDEMPOTENCY_TABLE', 'BOILERPLATE_TABLE'):
+                if not os.getenv(variable):
+                    print(f"⚠️  {variable} is not set: its state stays per container on Lambda")
+            
             # Create deployment package
             package_path = self.create_deployment_package()
             
             # Create execution role
             role_arn = self.create_execution_role()
             
+            # Create the shared job table
+            self.create_job_table()
+            
             # Deploy function
             function_config = self.deploy_function(package_path, role_arn)
             
@@ -1,21 +1,106 @@
 """施設情報スクレイピング機能"""
 import requests
-from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 from dateutil.parser import parse
-import re
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import logging
-import boto3
 import json
-from config import FACILITIES, REQUEST_TIMEOUT, USER_AGENT, REGION, MODEL_ID
+from config import (
+    FACILITIES, REQUEST_TIMEOUT, USER_AGENT, REGION, MODEL_ID, DOCUMENT_CACHE_TTL, PROMPT_CONTEXT_TOKEN_BUDGET,
+    PAGE_TEXT_MAX_CHARS
+)
+from charset_resolver import decode_response
+from closure_patterns import (
+    WEEKDAY_JP, DAISETZ_MONTH_BLOCK_PATTERNS, DAISETZ_DAY_PATTERN, DAISETZ_RANGE_PATTERN,
+    JSON_BLOCK_PATTERN, TEMP_OPEN_LINE_PATTERN, TEMP_CLOSE_LINE_PATTERN
+)
+from scraped_document import DocumentCache, ScrapedDocument
+from period_parser import find_closure_period
+from text_normalizer import normalize_text
+from prompt_context import build_prompt_context, estimate_tokens
+from boilerplate import boilerplate_learner
+from concurrency_limiter import concurrency_limiter
+from model_invoker import model_invoker
+from deadline import timeout_for
+from closure_models import (
+    Evidence, Signal, Verdict,
+    SIGNAL_SITE, SIGNAL_PERIOD, SIGNAL_AI, SIGNAL_SPECIAL_PAGE, SIGNAL_MANUAL, SIGNAL_NEWS
+)
+
+# 期間表現による休館判定を採用する信頼度（AI判定と同じ基準）
+PERIOD_CONFIDENCE_THRESHOLD = 0.7
+
+# AI判定を採用する信頼度
+AI_CONFIDENCE_THRESHOLD = 0.7
+
+# 専用ページ解析の結果から確定させる判定（理由の目印, 休館か, site_status, 確定時の理由, 情報源）
+# 鈴木大拙館のiframeページはページを取得できれば開館日と報告するため、開館側は確定に使わない（AI解析の材料のみ）
+SPECIAL_PAGE_RULES = (
+    ("休館日カレンダーによる休館", True, "calendar_detected_closed", "休館日カレンダーによる確定休館", "専用ページ解析"),
+    ("予約カレンダーによる休館日", True, "reservation_calendar_closed", "予約カレンダーによる確定休館", "予約状況ページ解析"),
+    ("iframe休館日情報による", True, "iframe_detected_closed", "iframe休館日情報による確定休館", "iframe専用解析"),
+    ("休館日カレンダー確認済み：開館日", False, "calendar_detected_open", "休館日カレンダー確認済み：開館日", "専用ページ解析"),
+    ("予約カレンダー確認済み：開館日", False, "reservation_calendar_open", "予約カレンダー確認済み：開館日", "予約状況ページ解析"),
+)
 
 logger = logging.getLogger(__name__)
 
+
+class _SiteFindings:
+    """公式サイトの解析結果（判定に使った根拠・AI解析・お知らせ欄の記載）"""
+    __slots__ = ("has_closure", "site_status", "details", "ai", "news", "error")
+
+    def __init__(self, site_status: str = "unknown", error: Optional[str] = None):
+        self.has_closure = False
+        self.site_status = site_status
+        self.details: List[Signal] = []
+        self.ai: Optional[Signal] = None
+        self.news: List[Signal] = []
+        self.error = error
+
+    @property
+    def signals(self) -> List[Signal]:
+        """判定結果に残す根拠（判定に使った根拠、AI解析、お知らせ欄の順）"""
+        signals = list(self.details)
+        if self.ai is not None and self.ai not in self.details:
+            signals.append(self.ai)
+        signals.extend(self.news)
+        return signals
+
+    @property
+    def ai_confident(self) -> bool:
+        """AI解析が判定を採用できる信頼度で完了したか"""
+        return (self.ai is not None and self.ai.confidence is not None
+                and self.ai.confidence > AI_CONFIDENCE_THRESHOLD)
+
+
 class FacilityScraper:
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+        # HTTPセッションは初回利用時に作成（コールドスタート短縮）
+        self._session = None
+        
+        # 取得済みページのキャッシュ（同一ページの再取得・再解析を避ける）
+        self.documents = DocumentCache(DOCUMENT_CACHE_TTL)
+    
+    @property
+    def session(self) -> requests.Session:
+        """SSL設定を緩和したHTTPセッション"""
+        if self._session is None:
+            self._session = self._create_session()
+        return self._session
+    
+    @property
+    def bedrock_client(self):
+        """共有の Bedrock クライアント（作成に失敗した場合は None）"""
+        try:
+            return model_invoker.client(REGION)
+        except Exception as e:
+            logger.warning(f"Bedrock client initialization failed: {e}")
+            return None
+    
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        session.headers.update({
             'User-Agent': USER_AGENT,
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'ja,en-US;q=0.7,en;q=0.3',
@@ -47,20 +132,37 @@ class FacilityScraper:
                 kwargs['ssl_context'] = context
                 return super().init_poolmanager(*args, **kwargs)
         
-        self.session.mount('https://', SSLAdapter())
-        self.session.verify = False
+        session.mount('https://', SSLAdapter())
+        session.verify = False
+        return session
+    
+    def _fetch_document(self, url: str, raise_for_status: bool = False) -> Optional[ScrapedDocument]:
+        """ページを取得（キャッシュ済みならそれを返す）"""
+        document = self.documents.get(url)
+        if document is not None:
+            return document
+        
+        # 応答時間と 429/503 を同時実行数の適応制御に渡す
+        with concurrency_limiter.track('scrape') as call:
+            response = self.session.get(url, timeout=timeout_for(REQUEST_TIMEOUT))
+            call.throttled = response.status_code in (429, 503)
+        if raise_for_status:
+            response.raise_for_status()
+        elif response.status_code != 200:
+            return None
         
-        # Bedrock クライアントの初期化
-        try:
-            self.bedrock_client = boto3.client('bedrock-runtime', region_name=REGION)
-        except Exception as e:
-            logger.warning(f"Bedrock client initialization failed: {e}")
-            self.bedrock_client = None
+        document = ScrapedDocument(url, decode_response(response))
+        self.documents.put(document)
+        return document
     
     def get_facility_closure_info(self, facility_name: str, target_date: str) -> Dict:
-        """指定施設の休館情報を取得"""
+        """指定施設の休館情報を取得（Verdict.to_dict() の形）"""
+        return self.get_facility_verdict(facility_name, target_date).to_dict()
+    
+    def get_facility_verdict(self, facility_name: str, target_date: str) -> Verdict:
+        """指定施設の休館判定"""
         if facility_name not in FACILITIES:
-            return {"error": f"施設 '{facility_name}' は対象外です"}
+            return Verdict(facility_name, target_date, error=f"施設 '{facility_name}' は対象外です")
         
         facility_info = FACILITIES[facility_name]
         
@@ -76,27 +178,31 @@ class FacilityScraper:
             is_regular_closed = self._check_regular_closure(facility_name, target_dt, target_weekday)
             
             # 公式サイトから臨時休館情報を取得（施設名も渡す）
-            special_closure_info = self._scrape_special_closures(
+            findings = self._scrape_special_closures(
                 facility_info["url"], 
                 facility_info["selector"],
                 target_dt,
                 facility_name  # 施設名を追加
             )
             
-            return {
-                "facility": facility_name,
-                "date": target_date,
-                "weekday": target_weekday,
-                "is_regular_closed": is_regular_closed,
-                "regular_closed_days": facility_info["regular_closed"],
-                "special_closures": special_closure_info,
-                "is_closed": is_regular_closed or special_closure_info["has_closure"],
-                "closure_reason": self._get_closure_reason(is_regular_closed, special_closure_info)
-            }
+            return Verdict(
+                facility_name,
+                target_date,
+                weekday=target_weekday,
+                is_closed=is_regular_closed or findings.has_closure,
+                reason=self._get_closure_reason(is_regular_closed, findings),
+                confidence=self._get_confidence(findings),
+                source=self._get_source(findings),
+                signals=findings.signals,
+                is_regular_closed=is_regular_closed,
+                regular_closed_days=facility_info["regular_closed"],
+                site_status=findings.site_status,
+                notes={"site_error": findings.error} if findings.error else None
+            )
             
         except Exception as e:
             logger.error(f"Error getting closure info for {facility_name}: {e}")
-            return {"error": f"情報取得エラー: {str(e)}"}
+            return Verdict(facility_name, target_date, error=f"情報取得エラー: {str(e)}")
     
     def _check_regular_closure(self, facility_name: str, target_dt: datetime, target_weekday: str) -> bool:
         """施設固有の定休日判定"""
@@ -115,16 +221,19 @@ class FacilityScraper:
         
         return False
     
-    def _ai_analyze_closure_info(self, facility_name: str, scraped_text: str, target_date: datetime) -> Dict:
-        """AIを使用して休館情報を解析"""
+    def _ai_analyze_closure_info(self, facility_name: str, scraped_text: str, target_date: datetime) -> Signal:
+        """AIを使用して休館情報を解析（解析できなければ closed が None の Signal）"""
         if not self.bedrock_client:
-            return {"ai_analysis": False, "error": "Bedrock client not available"}
+            return Signal(SIGNAL_AI, None, "AI解析エラー: Bedrock client not available", source="AI解析")
         
         try:
             # 対象日付の情報
             target_date_str = target_date.strftime("%Y年%m月%d日")
             target_weekday = ["月曜日", "火曜日", "水曜日", "木曜日", "金曜日", "土曜日", "日曜日"][target_date.weekday()]
             
+            # 関連度の高い段落だけをトークン予算内で抽出
+            context_text = build_prompt_context(scraped_text, target_date.date(), PROMPT_CONTEXT_TOKEN_BUDGET)
+            
             # AIに送信するプロンプト（改善版）
             prompt = f"""あなたは文化施設の開館・休館情報を正確に判定する専門家です。
 以下の{facility_name}の公式サイト情報を基に、{target_date_str}（{target_weekday}）の開館状況を判定してください。
@@ -134,7 +243,7 @@ class FacilityScraper:
 対象日: {target_date_str}（{target_weekday}）
 
 【サイト情報】
-{scraped_text[:4000]}
+{context_text}
 
 【判定基準】
 1. 長期休館（工事・改修・リニューアル等）
@@ -182,49 +291,39 @@ class FacilityScraper:
                 ]
             }
             
-            response = self.bedrock_client.invoke_model(
-                modelId=MODEL_ID,
-                body=json.dumps(body)
-            )
-            
-            response_body = json.loads(response['body'].read())
+            # 共通サービス経由（実行枠・再試行・集計）
+            response_body = model_invoker.invoke('scraper_ai_analysis', MODEL_ID, body, region=REGION)
             ai_response = response_body['content'][0]['text']
             
-            # JSONレスポンスを解析
+            # JSONレスポンスを解析（生の応答は根拠として参照だけ保持）
+            raw_response = Evidence("bedrock", ai_response)
             try:
                 # JSONブロックを抽出
-                json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
+                json_match = JSON_BLOCK_PATTERN.search(ai_response)
                 if json_match:
                     ai_result = json.loads(json_match.group())
-                    return {
-                        "ai_analysis": True,
-                        "is_closed": ai_result.get("is_closed", False),
-                        "reason": ai_result.get("reason", ""),
-                        "confidence": ai_result.get("confidence", 0.0),
-                        "detected_info": ai_result.get("detected_info", ""),
-                        "analysis_details": ai_result.get("analysis_details", ""),
-                        "raw_response": ai_response
-                    }
+                    logger.debug(f"AI analysis for {facility_name} used {estimate_tokens(context_text)} context tokens")
+                    return Signal(
+                        SIGNAL_AI,
+                        bool(ai_result.get("is_closed", False)),
+                        ai_result.get("reason") or "",
+                        confidence=float(ai_result.get("confidence", 0.0)),
+                        source="AI解析",
+                        evidence=raw_response,
+                        detail=ai_result.get("detected_info", "")
+                    )
                 else:
-                    return {
-                        "ai_analysis": True,
-                        "error": "JSON format not found in AI response",
-                        "raw_response": ai_response
-                    }
+                    return Signal(SIGNAL_AI, None, "AI解析エラー: JSON format not found in AI response",
+                                  source="AI解析", evidence=raw_response)
                     
-            except json.JSONDecodeError as e:
-                return {
-                    "ai_analysis": True,
-                    "error": f"JSON decode error: {e}",
-                    "raw_response": ai_response
-                }
+            except (json.JSONDecodeError, TypeError, ValueError) as e:
+                return Signal(SIGNAL_AI, None, f"AI解析エラー: JSON decode error: {e}",
+                              source="AI解析", evidence=raw_response)
                 
         except Exception as e:
             logger.error(f"AI analysis error for {facility_name}: {e}")
-            return {
-                "ai_analysis": False,
-                "error": str(e)
-            }
+            return Signal(SIGNAL_AI, None, f"AI解析エラー: {str(e)}", source="AI解析")
+    
     def _get_facility_specific_pages(self, facility_name: str) -> List[str]:
         """施設固有の特殊ページを取得"""
         specific_pages = []
@@ -328,106 +427,81 @@ class FacilityScraper:
         
         return additional_pages
     
-    def _parse_daisetz_iframe_page(self, url: str, target_date: datetime) -> Dict:
-        """鈴木大拙館のiframe休館日ページを専用解析"""
+    def _parse_daisetz_iframe_page(self, url: str, target_date: datetime) -> Tuple[bool, bool, List[Signal]]:
+        """鈴木大拙館のiframe休館日ページを専用解析
+        
+        Returns:
+            (ページを確認できたか, 対象日が休館か, 対象日の根拠)
+        """
         try:
-            response = self.session.get(url, timeout=REQUEST_TIMEOUT)
-            if response.status_code != 200:
-                return {"error": f"Failed to access {url}"}
+            document = self._fetch_document(url)
+            if document is None:
+                logger.debug(f"Failed to access {url}")
+                return False, False, []
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            full_text = soup.get_text()
-            
-            # 休館日情報を探す
-            closure_info = {
-                "has_specific_closure": False,
-                "details": [],
-                "raw_content": full_text[:1000],  # デバッグ用
-                "iframe_found": True
-            }
+            full_text = document.text
+            signals: List[Signal] = []
+            has_specific_closure = False
             
             target_month = target_date.month
             target_day = target_date.day
-            target_year = target_date.year
             
             # 「休館日のご案内」セクションを検索
             if "休館日のご案内" in full_text:
-                closure_info["iframe_found"] = True
-                
                 # 対象月の休館日を詳細解析
-                month_patterns = {
-                    10: r'10月\s*([^\n]+?)(?=\n11月|\nお知らせ)',
-                    11: r'11月\s*([^\n]+?)(?=\n12月|\nお知らせ)',
-                    12: r'12月\s*([^\n]+?)(?=\nお知らせ|$)'
-                }
-                
-                if target_month in month_patterns:
-                    import re
-                    pattern = month_patterns[target_month]
-                    match = re.search(pattern, full_text, re.DOTALL)
+                if target_month in DAISETZ_MONTH_BLOCK_PATTERNS:
+                    match = DAISETZ_MONTH_BLOCK_PATTERNS[target_month].search(full_text)
                     
                     if match:
                         month_text = match.group(1).strip()
+                        # 対象月の記載箇所をページ本文への参照として残す
+                        month_evidence = Evidence(url, full_text, match.start(1), match.end(1))
                         
                         # 個別の日付をチェック（例: 14(火), 20(月)）
-                        day_pattern = f'(?:^|,|\\s){target_day}\\('
-                        if re.search(day_pattern, month_text):
-                            closure_info["has_specific_closure"] = True
-                            closure_info["details"].append({
-                                "date": target_date.strftime("%Y-%m-%d"),
-                                "reason": f"iframe休館日情報による休館（{target_month}月{target_day}日）",
-                                "source": "iframe専用解析",
-                                "confidence": 1.0,
-                                "month_text": month_text
-                            })
+                        listed_days = {int(day) for day in DAISETZ_DAY_PATTERN.findall(month_text)}
+                        if target_day in listed_days:
+                            has_specific_closure = True
+                            signals.append(Signal(
+                                SIGNAL_SPECIAL_PAGE, True,
+                                f"iframe休館日情報による休館（{target_month}月{target_day}日）",
+                                confidence=1.0, source="iframe専用解析", evidence=month_evidence
+                            ))
                         
                         # 範囲指定の場合の特別処理（まず範囲をチェック）
-                        range_patterns = [
-                            r'(\d+)\([^)]+\)-(\d+)\([^)]+\)'  # 4(土)-10(金)
-                        ]
-                        
-                        range_found = False
-                        for range_pattern in range_patterns:
-                            range_matches = re.findall(range_pattern, month_text)
-                            for start_day, end_day in range_matches:
-                                start_day, end_day = int(start_day), int(end_day)
-                                if start_day <= target_day <= end_day:
-                                    closure_info["has_specific_closure"] = True
-                                    closure_info["details"].append({
-                                        "date": target_date.strftime("%Y-%m-%d"),
-                                        "reason": f"iframe休館日情報による連続休館（{target_month}月{start_day}-{end_day}日）",
-                                        "source": "iframe専用解析",
-                                        "confidence": 1.0,
-                                        "range_info": f"{start_day}-{end_day}"
-                                    })
-                                    range_found = True
-                                    break
-                            if range_found:
+                        # 例: 4(土)-10(金)
+                        for start_day, end_day in DAISETZ_RANGE_PATTERN.findall(month_text):
+                            start_day, end_day = int(start_day), int(end_day)
+                            if start_day <= target_day <= end_day:
+                                has_specific_closure = True
+                                signals.append(Signal(
+                                    SIGNAL_SPECIAL_PAGE, True,
+                                    f"iframe休館日情報による連続休館（{target_month}月{start_day}-{end_day}日）",
+                                    confidence=1.0, source="iframe専用解析", evidence=month_evidence,
+                                    detail=f"{start_day}-{end_day}"
+                                ))
                                 break
             
-            return closure_info
+            return True, has_specific_closure, signals
             
         except Exception as e:
             logger.error(f"Error parsing Daisetz iframe page: {e}")
-            return {"error": str(e)}
+            return False, False, []
     
-    def _parse_noh_museum_reservation_page(self, url: str, target_date: datetime) -> Dict:
-        """金沢能楽美術館の予約状況ページを専用解析"""
+    def _parse_noh_museum_reservation_page(self, url: str, target_date: datetime) -> Tuple[bool, bool, List[Signal]]:
+        """金沢能楽美術館の予約状況ページを専用解析
+        
+        Returns:
+            (カレンダーを確認できたか, 対象日が休館か, 対象日の根拠)
+        """
         try:
-            response = self.session.get(url, timeout=REQUEST_TIMEOUT)
-            if response.status_code != 200:
-                return {"error": f"Failed to access {url}"}
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            full_text = soup.get_text()
+            document = self._fetch_document(url)
+            if document is None:
+                logger.debug(f"Failed to access {url}")
+                return False, False, []
             
-            # 休館日情報を探す
-            closure_info = {
-                "has_specific_closure": False,
-                "details": [],
-                "raw_content": full_text[:1000],  # デバッグ用
-                "calendar_found": False
-            }
+            soup = document.soup
+            signals: List[Signal] = []
+            has_specific_closure = False
             
             target_month = target_date.month
             target_day = target_date.day
@@ -436,194 +510,152 @@ class FacilityScraper:
             # カレンダー要素を検索
             calendar_elements = soup.select('#calendar, .rsv-calendar, .rsv-tp-box-2')
             
-            if calendar_elements:
-                closure_info["calendar_found"] = True
+            for calendar in calendar_elements:
+                calendar_text = calendar.get_text()
                 
-                for calendar in calendar_elements:
-                    calendar_text = calendar.get_text()
+                # 対象月のカレンダーが表示されているかチェック
+                month_pattern = f"{target_year}年{target_month}月"
+                if month_pattern in calendar_text:
+                    calendar_evidence = Evidence(url, calendar_text, 0, 500)
                     
-                    # 対象月のカレンダーが表示されているかチェック
-                    month_pattern = f"{target_year}年{target_month}月"
-                    if month_pattern in calendar_text:
-                        
-                        # 対象日が「休館日」として表示されているかチェック
-                        day_patterns = [
-                            f"{target_day}休館日",
-                            f"{target_day} 休館日",
-                            f"休館日{target_day}",
-                            f"休館日 {target_day}"
+                    # 対象日が「休館日」として表示されているかチェック
+                    day_patterns = [
+                        f"{target_day}休館日",
+                        f"{target_day} 休館日",
+                        f"休館日{target_day}",
+                        f"休館日 {target_day}"
+                    ]
+                    
+                    if any(pattern in calendar_text for pattern in day_patterns):
+                        has_specific_closure = True
+                        signals.append(Signal(
+                            SIGNAL_SPECIAL_PAGE, True,
+                            f"予約カレンダーによる休館日（{target_month}月{target_day}日）",
+                            confidence=1.0, source="予約状況ページ解析", evidence=calendar_evidence
+                        ))
+                    else:
+                        # 対象日が数字として存在すれば開館日として記録
+                        day_exists_patterns = [
+                            f" {target_day} ",
+                            f">{target_day}<",
+                            f"{target_day}日"
                         ]
                         
-                        for pattern in day_patterns:
-                            if pattern in calendar_text:
-                                closure_info["has_specific_closure"] = True
-                                closure_info["details"].append({
-                                    "date": target_date.strftime("%Y-%m-%d"),
-                                    "reason": f"予約カレンダーによる休館日（{target_month}月{target_day}日）",
-                                    "source": "予約状況ページ解析",
-                                    "confidence": 1.0,
-                                    "calendar_text": calendar_text[:500]
-                                })
-                                break
-                        
-                        # 休館日でない場合は開館日として記録
-                        if not closure_info["has_specific_closure"]:
-                            # 対象日が数字として存在するかチェック（開館日の可能性）
-                            day_exists_patterns = [
-                                f" {target_day} ",
-                                f">{target_day}<",
-                                f"{target_day}日"
-                            ]
-                            
-                            for pattern in day_exists_patterns:
-                                if pattern in calendar_text:
-                                    closure_info["details"].append({
-                                        "date": target_date.strftime("%Y-%m-%d"),
-                                        "reason": f"予約カレンダー確認済み：開館日（{target_month}月{target_day}日）",
-                                        "source": "予約状況ページ解析",
-                                        "confidence": 1.0,
-                                        "is_open": True
-                                    })
-                                    break
-                        
-                        break  # 対象月が見つかったので終了
-            
-            # 全体テキストからも休館情報を検索
-            closure_keywords = ["休館日", "休館", "臨時休館", "閉館"]
-            for keyword in closure_keywords:
-                if keyword in full_text:
-                    # キーワード周辺のテキストを抽出
-                    lines = full_text.split('\n')
-                    for i, line in enumerate(lines):
-                        if keyword in line and str(target_day) in line:
-                            context_start = max(0, i-1)
-                            context_end = min(len(lines), i+2)
-                            context = '\n'.join(lines[context_start:context_end]).strip()
-                            
-                            closure_info["details"].append({
-                                "keyword": keyword,
-                                "context": context,
-                                "line": line.strip(),
-                                "source": "テキスト解析"
-                            })
+                        if any(pattern in calendar_text for pattern in day_exists_patterns):
+                            signals.append(Signal(
+                                SIGNAL_SPECIAL_PAGE, False,
+                                f"予約カレンダー確認済み：開館日（{target_month}月{target_day}日）",
+                                confidence=1.0, source="予約状況ページ解析", evidence=calendar_evidence
+                            ))
+                    
+                    break  # 対象月が見つかったので終了
             
-            return closure_info
+            return bool(calendar_elements), has_specific_closure, signals
             
         except Exception as e:
             logger.error(f"Error parsing Noh Museum reservation page: {e}")
-            return {"error": str(e)}
+            return False, False, []
     
-    def _parse_kanazawa21_closure_page(self, url: str, target_date: datetime) -> Dict:
-        """金沢21世紀美術館の休館日ページを専用解析"""
+    def _parse_kanazawa21_closure_page(self, url: str, target_date: datetime) -> Tuple[bool, bool, List[Signal]]:
+        """金沢21世紀美術館の休館日ページを専用解析
+        
+        Returns:
+            (休館日カレンダーを確認できたか, 対象日が休館か, 対象日の根拠)
+        """
         try:
-            response = self.session.get(url, timeout=REQUEST_TIMEOUT)
-            if response.status_code != 200:
-                return {"error": f"Failed to access {url}"}
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            full_text = soup.get_text()
+            document = self._fetch_document(url)
+            if document is None:
+                logger.debug(f"Failed to access {url}")
+                return False, False, []
             
-            # 休館日情報を探す
-            closure_info = {
-                "has_specific_closure": False,
-                "details": [],
-                "raw_content": full_text[:1000],  # デバッグ用
-                "closure_calendar_found": False
-            }
+            soup = document.soup
+            full_text = document.text
+            signals: List[Signal] = []
+            has_specific_closure = False
             
             target_month = target_date.month
             target_day = target_date.day
             target_year = target_date.year
             
-            # 「2025（令和7）年1月〜2026（令和8）年3月の休館日」セクションを検索
-            if "2025（令和7）年1月〜2026（令和8）年3月の休館日" in full_text:
-                closure_info["closure_calendar_found"] = True
-                
-                # テーブルから休館日を詳細解析
-                tables = soup.find_all('table')
-                
-                for table in tables:
-                    rows = table.find_all('tr')
-                    
-                    for row in rows:
-                        cells = row.find_all(['td', 'th'])
-                        if len(cells) >= 2:
-                            month_cell = cells[0].get_text(strip=True)
-                            dates_cell = cells[1].get_text(strip=True)
+            # 「2025（令和7）年1月〜2026（令和8）年3月の休館日」セクションを検索（正規化済みテキスト）
+            if "2025(令和7)年1月〜2026(令和8)年3月の休館日" not in full_text:
+                return False, False, []
+            
+            # テーブルから休館日を詳細解析
+            month_patterns = [
+                f"{target_month}月",
+                f"{target_year}年{target_month}月"
+            ]
+            day_patterns = [
+                f"{target_day}日",
+                f" {target_day}日",
+                f"/{target_day}日",
+                f"{target_day}日("
+            ]
+            
+            for table in soup.find_all('table'):
+                for row in table.find_all('tr'):
+                    cells = row.find_all(['td', 'th'])
+                    if len(cells) >= 2:
+                        month_cell = normalize_text(cells[0].get_text(strip=True))
+                        
+                        # 対象月の行だけ休館日の列を読む
+                        if any(pattern in month_cell for pattern in month_patterns):
+                            dates_cell = normalize_text(cells[1].get_text(strip=True))
                             
-                            # 対象月かチェック
-                            month_patterns = [
-                                f"{target_month}月",
-                                f"{target_year}年{target_month}月"
-                            ]
+                            # 対象日が休館日に含まれるかチェック
+                            if any(pattern in dates_cell for pattern in day_patterns):
+                                has_specific_closure = True
+                                signals.append(Signal(
+                                    SIGNAL_SPECIAL_PAGE, True,
+                                    f"休館日カレンダーによる休館（{target_month}月{target_day}日）",
+                                    confidence=1.0, source="専用ページ解析", evidence=Evidence(url, dates_cell)
+                                ))
                             
-                            if any(pattern in month_cell for pattern in month_patterns):
-                                # この行が対象月の休館日情報
-                                closure_info["details"].append({
-                                    "month": target_month,
-                                    "closure_dates_text": dates_cell,
-                                    "source": "休館日カレンダー"
-                                })
-                                
-                                # 対象日が休館日に含まれるかチェック
-                                day_patterns = [
-                                    f"{target_day}日",
-                                    f" {target_day}日",
-                                    f"/{target_day}日",
-                                    f"{target_day}日("
-                                ]
-                                
-                                for pattern in day_patterns:
-                                    if pattern in dates_cell:
-                                        closure_info["has_specific_closure"] = True
-                                        closure_info["details"].append({
-                                            "date": target_date.strftime("%Y-%m-%d"),
-                                            "reason": f"休館日カレンダーによる休館（{target_month}月{target_day}日）",
-                                            "source": "専用ページ解析",
-                                            "confidence": 1.0,
-                                            "calendar_text": dates_cell
-                                        })
-                                        break
-                                
-                                break  # 対象月が見つかったので終了
+                            break  # 対象月が見つかったので終了
+            
+            # 臨時開館日・臨時休館日もチェック
+            if "臨時開館日" in full_text or "臨時休館日" in full_text:
+                target_date_text = f"{target_year}年{target_month}月{target_day}日"
                 
-                # 臨時開館日・臨時休館日もチェック
-                if "臨時開館日" in full_text or "臨時休館日" in full_text:
-                    # 臨時開館日のパターン
-                    temp_open_pattern = rf"臨時開館日.*?{target_year}年{target_month}月{target_day}日"
-                    if re.search(temp_open_pattern, full_text):
+                # 臨時開館日の行に対象日があるか
+                for line in TEMP_OPEN_LINE_PATTERN.findall(full_text):
+                    if target_date_text in line:
                         # 臨時開館日の場合、休館判定を取り消し
-                        closure_info["has_specific_closure"] = False
-                        closure_info["details"].append({
-                            "date": target_date.strftime("%Y-%m-%d"),
-                            "reason": f"臨時開館日（{target_month}月{target_day}日）",
-                            "source": "専用ページ解析",
-                            "confidence": 1.0,
-                            "special_note": "通常休館日だが臨時開館"
-                        })
-                    
-                    # 臨時休館日のパターン
-                    temp_close_pattern = rf"臨時休館日.*?{target_year}年{target_month}月{target_day}日"
-                    if re.search(temp_close_pattern, full_text):
-                        closure_info["has_specific_closure"] = True
-                        closure_info["details"].append({
-                            "date": target_date.strftime("%Y-%m-%d"),
-                            "reason": f"臨時休館日（{target_month}月{target_day}日）",
-                            "source": "専用ページ解析",
-                            "confidence": 1.0,
-                            "special_note": "通常開館日だが臨時休館"
-                        })
+                        has_specific_closure = False
+                        signals.append(Signal(
+                            SIGNAL_SPECIAL_PAGE, False, f"臨時開館日（{target_month}月{target_day}日）",
+                            confidence=1.0, source="専用ページ解析", evidence=Evidence(url, line),
+                            detail="通常休館日だが臨時開館"
+                        ))
+                        break
+                
+                # 臨時休館日の行に対象日があるか
+                for line in TEMP_CLOSE_LINE_PATTERN.findall(full_text):
+                    if target_date_text in line:
+                        has_specific_closure = True
+                        signals.append(Signal(
+                            SIGNAL_SPECIAL_PAGE, True, f"臨時休館日（{target_month}月{target_day}日）",
+                            confidence=1.0, source="専用ページ解析", evidence=Evidence(url, line),
+                            detail="通常開館日だが臨時休館"
+                        ))
+                        break
             
-            return closure_info
+            return True, has_specific_closure, signals
             
         except Exception as e:
             logger.error(f"Error parsing Kanazawa21 closure page: {e}")
-            return {"error": str(e)}
+            return False, False, []
     
-    def _scrape_multiple_pages(self, urls: List[str], facility_name: str = "", target_date: datetime = None) -> str:
-        """複数ページから情報を取得（施設固有の解析を含む）"""
+    def _scrape_multiple_pages(self, urls: List[str], facility_name: str = "",
+                               target_date: datetime = None) -> Tuple[str, List[Signal]]:
+        """複数ページから情報を取得（施設固有の解析を含む）
+        
+        Returns:
+            (結合したページ本文, 専用ページ解析の根拠)
+        """
         combined_text = ""
-        special_analysis_results = []
+        special_analysis_results: List[Signal] = []
         
         for url in urls:
             try:
@@ -632,431 +664,279 @@ class FacilityScraper:
                     "鈴木大拙館" in facility_name and 
                     target_date):
                     
-                    special_result = self._parse_daisetz_iframe_page(url, target_date)
+                    found, has_specific_closure, signals = self._parse_daisetz_iframe_page(url, target_date)
                     
                     # 特殊解析結果を保存
-                    if special_result.get("has_specific_closure"):
-                        special_analysis_results.extend([d for d in special_result["details"] if "date" in d])
-                    elif special_result.get("iframe_found"):
+                    if has_specific_closure:
+                        special_analysis_results.extend(signals)
+                    elif found:
                         # iframeが見つかったが対象日は休館日ではない場合
-                        special_analysis_results.append({
-                            "date": target_date.strftime("%Y-%m-%d"),
-                            "reason": "iframe休館日情報確認済み：開館日",
-                            "source": "iframe専用解析",
-                            "confidence": 1.0,
-                            "is_open": True
-                        })
+                        special_analysis_results.append(Signal(
+                            SIGNAL_SPECIAL_PAGE, False, "iframe休館日情報確認済み：開館日",
+                            confidence=1.0, source="iframe専用解析"
+                        ))
                     
-                    # 通常のテキスト取得も行う
-                    response = self.session.get(url, timeout=REQUEST_TIMEOUT)
-                    if response.status_code == 200:
-                        soup = BeautifulSoup(response.content, 'html.parser')
-                        text = soup.get_text()
-                        combined_text += f"\n--- {url} (鈴木大拙館iframe解析済み) ---\n{text[:1500]}\n"
+                    # 通常のテキスト取得も行う（専用解析で取得済みのページを再利用）
+                    document = self._fetch_document(url)
+                    if document is not None:
+                        text = document.content_text[:PAGE_TEXT_MAX_CHARS]
+                        combined_text += f"\n--- {url} (鈴木大拙館iframe解析済み) ---\n{text}\n"
                 
                 # 金沢能楽美術館の予約状況ページの場合
                 elif ("kanazawa-noh-museum.gr.jp/reservation" in url and 
                     "金沢能楽美術館" in facility_name and 
                     target_date):
                     
-                    special_result = self._parse_noh_museum_reservation_page(url, target_date)
+                    found, has_specific_closure, signals = self._parse_noh_museum_reservation_page(url, target_date)
                     
                     # 特殊解析結果を保存
-                    if special_result.get("has_specific_closure"):
-                        special_analysis_results.extend([d for d in special_result["details"] if "date" in d])
-                    elif special_result.get("calendar_found"):
+                    if has_specific_closure:
+                        special_analysis_results.extend(signals)
+                    elif found:
                         # カレンダーが見つかったが対象日は休館日ではない場合
-                        open_details = [d for d in special_result["details"] if d.get("is_open")]
-                        if open_details:
-                            special_analysis_results.extend(open_details)
+                        special_analysis_results.extend(signal for signal in signals if signal.closed is False)
                     
-                    # 通常のテキスト取得も行う
-                    response = self.session.get(url, timeout=REQUEST_TIMEOUT)
-                    if response.status_code == 200:
-                        soup = BeautifulSoup(response.content, 'html.parser')
-                        text = soup.get_text()
-                        combined_text += f"\n--- {url} (能楽美術館専用解析済み) ---\n{text[:1500]}\n"
+                    # 通常のテキスト取得も行う（専用解析で取得済みのページを再利用）
+                    document = self._fetch_document(url)
+                    if document is not None:
+                        text = document.content_text[:PAGE_TEXT_MAX_CHARS]
+                        combined_text += f"\n--- {url} (能楽美術館専用解析済み) ---\n{text}\n"
                 
                 # 金沢21世紀美術館の特殊ページの場合
                 elif ("kanazawa21.jp/data_list.php" in url and 
                     "金沢21世紀美術館" in facility_name and 
                     target_date):
                     
-                    special_result = self._parse_kanazawa21_closure_page(url, target_date)
+                    found, has_specific_closure, signals = self._parse_kanazawa21_closure_page(url, target_date)
                     
                     # 特殊解析結果を保存（休館・開館両方）
-                    if special_result.get("has_specific_closure"):
-                        special_analysis_results.extend([d for d in special_result["details"] if "date" in d])
-                    elif special_result.get("closure_calendar_found"):
+                    if has_specific_closure:
+                        special_analysis_results.extend(signals)
+                    elif found:
                         # カレンダーが見つかったが対象日は休館日ではない場合
-                        special_analysis_results.append({
-                            "date": target_date.strftime("%Y-%m-%d"),
-                            "reason": "休館日カレンダー確認済み：開館日",
-                            "source": "専用ページ解析",
-                            "confidence": 1.0,
-                            "is_open": True
-                        })
+                        special_analysis_results.append(Signal(
+                            SIGNAL_SPECIAL_PAGE, False, "休館日カレンダー確認済み：開館日",
+                            confidence=1.0, source="専用ページ解析"
+                        ))
                     
-                    # 通常のテキスト取得も行う
-                    response = self.session.get(url, timeout=REQUEST_TIMEOUT)
-                    if response.status_code == 200:
-                        soup = BeautifulSoup(response.content, 'html.parser')
-                        text = soup.get_text()
-                        combined_text += f"\n--- {url} (特殊解析済み) ---\n{text[:1500]}\n"
+                    # 通常のテキスト取得も行う（専用解析で取得済みのページを再利用）
+                    document = self._fetch_document(url)
+                    if document is not None:
+                        text = document.content_text[:PAGE_TEXT_MAX_CHARS]
+                        combined_text += f"\n--- {url} (特殊解析済み) ---\n{text}\n"
                 else:
                     # 通常のページ処理
-                    response = self.session.get(url, timeout=REQUEST_TIMEOUT)
-                    if response.status_code == 200:
-                        soup = BeautifulSoup(response.content, 'html.parser')
-                        text = soup.get_text()
-                        combined_text += f"\n--- {url} ---\n{text[:2000]}\n"
+                    document = self._fetch_document(url)
+                    if document is not None:
+                        text = document.content_text[:PAGE_TEXT_MAX_CHARS]
+                        combined_text += f"\n--- {url} ---\n{text}\n"
                         
             except Exception as e:
                 logger.debug(f"Failed to fetch {url}: {e}")
                 continue
         
-        # 特殊解析結果をテキストに追加
+        # 特殊解析結果をテキストに追加（AI解析のプロンプトにも含める）
         if special_analysis_results:
             combined_text += "\n--- 特殊解析結果 ---\n"
             for result in special_analysis_results:
-                combined_text += f"検出: {result['reason']}\n"
+                combined_text += f"検出: {result.reason}\n"
         
-        return combined_text
+        return combined_text, special_analysis_results
     
-    def _get_manual_closure_info(self, facility_name: str, target_date: datetime) -> Dict:
-        """手動で設定された重要な休館情報を取得"""
+    def _get_manual_closure_info(self, facility_name: str, target_date: datetime) -> Optional[Signal]:
+        """手動で設定された重要な休館情報を取得（該当しなければ None）"""
+        # 公式サイトの告知文をそのまま登録し、期間は期間表現パーサーで解釈する
         manual_closures = {
-            "金沢ふるさと偉人館": {
-                "closure_period": {
-                    "start": datetime(2025, 9, 1),
-                    "end": datetime(2025, 12, 15),  # 12月中旬を15日と仮定
-                    "reason": "令和7年9月から12月中旬（予定）まで、工事のため休館"
-                }
-            }
+            "金沢ふるさと偉人館": "令和7年9月から12月中旬（予定）まで、工事のため休館"
         }
         
         if facility_name in manual_closures:
-            closure_info = manual_closures[facility_name]
-            if "closure_period" in closure_info:
-                period = closure_info["closure_period"]
-                if period["start"] <= target_date <= period["end"]:
-                    return {
-                        "has_manual_closure": True,
-                        "reason": period["reason"],
-                        "confidence": 1.0,
-                        "source": "手動設定（公式サイト情報）"
-                    }
-        
-        return {"has_manual_closure": False}
+            notice = manual_closures[facility_name]
+            period = find_closure_period(notice, target_date.date(), datetime.now().date())
+            if period:
+                return Signal(
+                    SIGNAL_MANUAL, True, notice,
+                    confidence=period.confidence_for(target_date.date()),
+                    source="手動設定（公式サイト情報）",
+                    evidence=Evidence("manual", notice)
+                )
+        
+        return None
     
-    def _scrape_special_closures(self, url: str, selector: str, target_date: datetime, facility_name: str = "") -> Dict:
+    def _scrape_special_closures(self, url: str, selector: str, target_date: datetime,
+                                 facility_name: str = "") -> _SiteFindings:
         """開館・休館情報をスクレイピング（定休日情報も含む）"""
         try:
-            response = self.session.get(url, timeout=REQUEST_TIMEOUT)
-            response.raise_for_status()
+            document = self._fetch_document(url, raise_for_status=True)
+            soup = document.soup
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # 全体のテキストから情報を取得
-            full_text = soup.get_text()
+            # 全体のテキストから情報を取得（ホスト共通の定型文は除去済み）
+            full_text = document.content_text
             
             # 指定されたセレクタからも情報を取得
             news_elements = soup.select(selector)
             
-            closure_info = {
-                "has_closure": False,
-                "details": [],
-                "scraped_content": [],
-                "site_status": "unknown"
-            }
-            
-            # 開館・休館関連キーワード
-            closure_keywords = ["休館", "休業", "臨時休館", "閉館", "休み", "定休"]
-            open_keywords = ["開館", "営業", "本日開館", "開いて"]
+            findings = _SiteFindings()
             
-            # 曜日ベースの定休日情報を検索
-            weekday_patterns = [
-                r'月曜日.*?休館',
-                r'火曜日.*?休館', 
-                r'水曜日.*?休館',
-                r'木曜日.*?休館',
-                r'金曜日.*?休館',
-                r'土曜日.*?休館',
-                r'日曜日.*?休館',
-                r'休館.*?月曜日',
-                r'定休.*?月曜日',
-                r'定休.*?木曜日'
-            ]
+            # キーワードを1回だけ走査し、以降の判定で位置情報を使い回す
+            hits = document.keyword_hits
             
             # 対象日の曜日
-            weekday_jp = ["月曜日", "火曜日", "水曜日", "木曜日", "金曜日", "土曜日", "日曜日"]
-            target_weekday = weekday_jp[target_date.weekday()]
+            target_weekday = WEEKDAY_JP[target_date.weekday()]
             
-            # サイト全体から定休日情報を検索
-            for pattern in weekday_patterns:
-                if re.search(pattern, full_text):
-                    if target_weekday in pattern:
-                        closure_info["has_closure"] = True
-                        closure_info["details"].append({
-                            "date": target_date.strftime("%Y-%m-%d"),
-                            "reason": f"定休日（{target_weekday}）"
-                        })
-                        closure_info["site_status"] = "regular_closed"
-                        break
+            # サイト全体から定休日情報を検索（曜日ベース）
+            if target_weekday in hits.regular_closure_weekdays():
+                findings.has_closure = True
+                findings.details.append(Signal(SIGNAL_SITE, True, f"定休日（{target_weekday}）", source=url))
+                findings.site_status = "regular_closed"
             
             # 「本日開館」「本日休館」などの直接的な表現を検索
-            today_patterns = [
-                r'本日.*?開館',
-                r'本日.*?休館',
-                r'今日.*?開館',
-                r'今日.*?休館'
-            ]
-            
-            for pattern in today_patterns:
-                match = re.search(pattern, full_text)
-                if match:
-                    matched_text = match.group()
-                    if "開館" in matched_text and "休館" not in matched_text:
-                        closure_info["site_status"] = "open_today"
-                        closure_info["has_closure"] = False
-                    elif "休館" in matched_text:
-                        closure_info["has_closure"] = True
-                        closure_info["site_status"] = "closed_today"
-                        closure_info["details"].append({
-                            "date": target_date.strftime("%Y-%m-%d"),
-                            "reason": "本日休館"
-                        })
-                    break
-            
-            # ニュースエリアから特定日付の休館情報を検索
+            today_status = hits.today_status(full_text)
+            if today_status == "open":
+                findings.site_status = "open_today"
+                findings.has_closure = False
+            elif today_status == "closed":
+                findings.has_closure = True
+                findings.site_status = "closed_today"
+                findings.details.append(Signal(SIGNAL_SITE, True, "本日休館", source=url))
+            
+            # ニュースエリアの内容を記録（判定には使わない）
             for element in news_elements[:10]:
-                text = element.get_text(strip=True)
-                closure_info["scraped_content"].append(text[:200])
-                
-                if any(keyword in text for keyword in closure_keywords):
-                    # 日付パターンを検索
-                    date_patterns = [
-                        r'(\d{1,2})月(\d{1,2})日',
-                        r'(\d{4})年(\d{1,2})月(\d{1,2})日',
-                        r'(\d{1,2})/(\d{1,2})',
-                        r'(\d{4})/(\d{1,2})/(\d{1,2})'
-                    ]
-                    
-                    for pattern in date_patterns:
-                        matches = re.findall(pattern, text)
-                        for match in matches:
-                            try:
-                                if len(match) == 2:
-                                    month, day = int(match[0]), int(match[1])
-                                    closure_date = datetime(target_date.year, month, day)
-                                elif len(match) == 3:
-                                    if '/' in pattern:
-                                        year, month, day = int(match[0]), int(match[1]), int(match[2])
-                                    else:
-                                        year, month, day = int(match[0]), int(match[1]), int(match[2])
-                                    closure_date = datetime(year, month, day)
-                                else:
-                                    continue
-                                
-                                if closure_date.date() == target_date.date():
-                                    closure_info["has_closure"] = True
-                                    closure_info["details"].append({
-                                        "date": closure_date.strftime("%Y-%m-%d"),
-                                        "reason": text[:100]
-                                    })
-                                    
-                            except (ValueError, TypeError):
-                                continue
+                element_text = boilerplate_learner.remove(url, normalize_text(element.get_text(strip=True)))
+                if element_text:
+                    findings.news.append(Signal(
+                        SIGNAL_NEWS, None, "お知らせ欄の記載", source=url,
+                        evidence=Evidence(url, element_text, 0, 200)
+                    ))
+            
+            # ページの日付インデックスから対象日の休館言及を検索（ページごとに1回だけ作成）
+            date_index = document.date_index(target_date.year)
+            for mention in date_index.closure_mentions(target_date.date()):
+                findings.has_closure = True
+                findings.details.append(Signal(
+                    SIGNAL_SITE, True, mention.sentence[:100], source=url,
+                    evidence=Evidence(url, full_text, mention.start, mention.end)
+                ))
             
             # 追加ページから情報を取得（施設固有の解析を含む）
             additional_pages = self._get_additional_pages(url, facility_name)
-            additional_text = self._scrape_multiple_pages(additional_pages, facility_name, target_date)
-            
-            # 全テキストを結合
-            combined_text = full_text + additional_text
-            
-            # AI解析を実行（より多くの情報を使用）
-            ai_analysis = self._ai_analyze_closure_info(
-                facility_name,
-                combined_text,
-                target_date
-            )
-            
-            closure_info["ai_analysis"] = ai_analysis
-            
-            # 特殊解析結果を統合（最優先）
-            special_closure_detected = False
-            special_open_detected = False
-            
-            # additional_textから特殊解析結果を抽出
-            if "鈴木大拙館iframe解析済み" in additional_text:
-                # iframe解析結果を直接確認
-                lines = additional_text.split('\n')
-                for line in lines:
-                    if "iframe休館日情報による" in line and "休館" in line:
-                        closure_info["has_closure"] = True
-                        closure_info["site_status"] = "iframe_detected_closed"
-                        closure_info["details"].append({
-                            "date": target_date.strftime("%Y-%m-%d"),
-                            "reason": "iframe休館日情報による確定休館",
-                            "confidence": 1.0,
-                            "source": "iframe専用解析"
-                        })
-                        special_closure_detected = True
-                        break
-            elif "特殊解析結果" in additional_text:
-                lines = additional_text.split('\n')
-                for line in lines:
-                    if "休館日カレンダーによる休館" in line:
-                        closure_info["has_closure"] = True
-                        closure_info["site_status"] = "calendar_detected_closed"
-                        closure_info["details"].append({
-                            "date": target_date.strftime("%Y-%m-%d"),
-                            "reason": "休館日カレンダーによる確定休館",
-                            "confidence": 1.0,
-                            "source": "専用ページ解析"
-                        })
-                        special_closure_detected = True
-                        break
-                    elif "予約カレンダーによる休館日" in line:
-                        closure_info["has_closure"] = True
-                        closure_info["site_status"] = "reservation_calendar_closed"
-                        closure_info["details"].append({
-                            "date": target_date.strftime("%Y-%m-%d"),
-                            "reason": "予約カレンダーによる確定休館",
-                            "confidence": 1.0,
-                            "source": "予約状況ページ解析"
-                        })
-                        special_closure_detected = True
-                        break
-                    elif "iframe休館日情報による" in line:
-                        closure_info["has_closure"] = True
-                        closure_info["site_status"] = "iframe_detected_closed"
-                        closure_info["details"].append({
-                            "date": target_date.strftime("%Y-%m-%d"),
-                            "reason": "iframe休館日情報による確定休館",
-                            "confidence": 1.0,
-                            "source": "iframe専用解析"
-                        })
-                        special_closure_detected = True
-                        break
-                    elif "休館日カレンダー確認済み：開館日" in line:
-                        closure_info["site_status"] = "calendar_detected_open"
-                        special_open_detected = True
-                        break
-                    elif "予約カレンダー確認済み：開館日" in line:
-                        closure_info["site_status"] = "reservation_calendar_open"
-                        special_open_detected = True
-                        break
-                    elif "iframe休館日情報確認済み：開館日" in line:
-                        closure_info["site_status"] = "iframe_detected_open"
-                        special_open_detected = True
+            additional_text, special_signals = self._scrape_multiple_pages(additional_pages, facility_name, target_date)
+            
+            # 全テキストを結合（期間表現の解析・段落の採点の対象を1ページあたり PAGE_TEXT_MAX_CHARS に抑える）
+            combined_text = full_text[:PAGE_TEXT_MAX_CHARS] + additional_text
+            
+            # 「9月から12月中旬まで休館」のような期間表現で休館が確定すればAI解析を省略
+            period = find_closure_period(combined_text, target_date.date(), datetime.now().date())
+            period_confidence = period.confidence_for(target_date.date()) if period else 0.0
+            if period_confidence <= PERIOD_CONFIDENCE_THRESHOLD:
+                period = None
+                # AI解析を実行（より多くの情報を使用）
+                findings.ai = self._ai_analyze_closure_info(
+                    facility_name,
+                    combined_text,
+                    target_date
+                )
+            
+            # 特殊解析結果を統合（最優先）。最初に該当した専用ページの結果で確定させる
+            special = None
+            for signal in special_signals:
+                for marker, closed, site_status, reason, source in SPECIAL_PAGE_RULES:
+                    if marker in signal.reason:
+                        special = Signal(SIGNAL_SPECIAL_PAGE, closed, reason, confidence=1.0, source=source,
+                                         evidence=signal.evidence,
+                                         detail=signal.reason if signal.reason != reason else "")
+                        findings.site_status = site_status
                         break
+                if special is not None:
+                    break
             
-            # AI解析結果を統合（特殊解析がない場合のみ）
-            if not special_closure_detected and not special_open_detected:
-                if ai_analysis.get("ai_analysis") and ai_analysis.get("confidence", 0) > 0.7:
-                    if ai_analysis.get("is_closed"):
-                        closure_info["has_closure"] = True
-                        closure_info["site_status"] = "ai_detected_closed"
-                        closure_info["details"].append({
-                            "date": target_date.strftime("%Y-%m-%d"),
-                            "reason": ai_analysis.get("reason", "AI検出による休館"),
-                            "confidence": ai_analysis.get("confidence", 0),
-                            "detected_info": ai_analysis.get("detected_info", "")
-                        })
-                    elif not closure_info["has_closure"]:
+            if special is None:
+                # 期間表現・AI解析結果を統合（特殊解析がない場合のみ）
+                if period:
+                    findings.has_closure = True
+                    findings.site_status = "period_detected_closed"
+                    findings.details.append(Signal(
+                        SIGNAL_PERIOD, True, period.sentence[:100],
+                        confidence=period_confidence, source="期間表現解析",
+                        evidence=Evidence(url, period.sentence),
+                        detail=f"{period.start.isoformat()}〜{period.end.isoformat()}"
+                    ))
+                elif findings.ai_confident:
+                    if findings.ai.closed:
+                        findings.has_closure = True
+                        findings.site_status = "ai_detected_closed"
+                        findings.details.append(findings.ai)
+                    elif not findings.has_closure:
                         # 正規表現で休館が検出されず、AIが開館と判定した場合
-                        closure_info["site_status"] = "ai_detected_open"
-            elif special_open_detected:
+                        findings.site_status = "ai_detected_open"
+            elif special.closed:
+                findings.has_closure = True
+                findings.details.append(special)
+            else:
                 # 特殊解析で開館が確定した場合、他の休館判定を上書き
-                closure_info["has_closure"] = False
-                if closure_info["site_status"] == "reservation_calendar_open":
-                    closure_info["details"] = [{
-                        "date": target_date.strftime("%Y-%m-%d"),
-                        "reason": "予約カレンダー確認済み：開館日",
-                        "confidence": 1.0,
-                        "source": "予約状況ページ解析"
-                    }]
-                elif closure_info["site_status"] == "iframe_detected_open":
-                    closure_info["details"] = [{
-                        "date": target_date.strftime("%Y-%m-%d"),
-                        "reason": "iframe休館日情報確認済み：開館日",
-                        "confidence": 1.0,
-                        "source": "iframe専用解析"
-                    }]
-                else:
-                    closure_info["details"] = [{
-                        "date": target_date.strftime("%Y-%m-%d"),
-                        "reason": "休館日カレンダー確認済み：開館日",
-                        "confidence": 1.0,
-                        "source": "専用ページ解析"
-                    }]
+                findings.has_closure = False
+                findings.details = [special]
             
-            return closure_info
+            return findings
             
         except Exception as e:
             logger.error(f"Error scraping {url}: {e}")
             
             # サイトアクセスに失敗した場合、手動設定の休館情報をチェック
-            manual_info = self._get_manual_closure_info(facility_name, target_date)
+            manual = self._get_manual_closure_info(facility_name, target_date)
             
-            if manual_info["has_manual_closure"]:
-                return {
-                    "has_closure": True,
-                    "details": [{
-                        "date": target_date.strftime("%Y-%m-%d"),
-                        "reason": manual_info["reason"],
-                        "confidence": manual_info["confidence"],
-                        "source": manual_info["source"]
-                    }],
-                    "error": str(e),
-                    "site_status": "manual_override",
-                    "ai_analysis": {
-                        "ai_analysis": True,
-                        "is_closed": True,
-                        "reason": manual_info["reason"],
-                        "confidence": manual_info["confidence"],
-                        "detected_info": f"手動設定による情報: {manual_info['reason']}",
-                        "analysis_details": f"サイトアクセスエラーのため手動設定情報を使用。{manual_info['source']}"
-                    }
-                }
+            if manual is not None:
+                findings = _SiteFindings("manual_override", error=str(e))
+                findings.has_closure = True
+                findings.details.append(manual)
             else:
-                return {
-                    "has_closure": False,
-                    "details": [],
-                    "error": str(e),
-                    "site_status": "error"
-                }
+                findings = _SiteFindings("error", error=str(e))
+            return findings
     
-    def _get_closure_reason(self, is_regular_closed: bool, special_info: Dict) -> str:
+    def _get_closure_reason(self, is_regular_closed: bool, findings: _SiteFindings) -> str:
         """休館理由を取得"""
         reasons = []
         
         if is_regular_closed:
             reasons.append("定休日")
         
-        if special_info["has_closure"]:
-            for detail in special_info["details"]:
-                if "confidence" in detail:
-                    # AI解析または手動設定による結果
-                    confidence = detail["confidence"]
-                    reason = detail["reason"]
-                    source = detail.get("source", "AI検出")
-                    reasons.append(f"{source} (信頼度{confidence:.1f}): {reason}")
+        if findings.has_closure:
+            for signal in findings.details:
+                if signal.confidence is not None:
+                    # AI解析・期間表現・専用ページ解析・手動設定による結果
+                    label = "AI検出" if signal.kind == SIGNAL_AI else signal.source
+                    reason = signal.reason or "AI検出による休館"
+                    reasons.append(f"{label} (信頼度{signal.confidence:.1f}): {reason}")
                 else:
                     # 正規表現による結果
-                    reasons.append(f"臨時休館: {detail['reason']}")
+                    reasons.append(f"臨時休館: {signal.reason}")
         
         # AI解析で開館と判定された場合の情報も追加
-        ai_analysis = special_info.get("ai_analysis", {})
-        if (ai_analysis.get("ai_analysis") and 
-            not special_info["has_closure"] and 
-            ai_analysis.get("confidence", 0) > 0.7):
-            reasons.append(f"AI判定 (信頼度{ai_analysis.get('confidence', 0):.1f}): 開館予定")
+        if findings.ai_confident and not findings.has_closure:
+            reasons.append(f"AI判定 (信頼度{findings.ai.confidence:.1f}): 開館予定")
         
         return " / ".join(reasons) if reasons else "開館予定"
     
+    @staticmethod
+    def _get_confidence(findings: _SiteFindings) -> Optional[float]:
+        """判定の信頼度（判定に使った根拠の最大値、なければAI判定の値）"""
+        values = [signal.confidence for signal in findings.details if signal.confidence is not None]
+        if not values and findings.ai is not None and findings.ai.confidence is not None:
+            values = [findings.ai.confidence]
+        return max(values) if values else None
+    
+    @staticmethod
+    def _get_source(findings: _SiteFindings) -> str:
+        """判定の情報源（サイトにアクセスできなければ基本ルール）"""
+        if findings.site_status == "error":
+            return "基本ルール（公式サイトアクセス不可）"
+        for signal in findings.details:
+            if signal.confidence is not None and signal.source:
+                return signal.source
+        if findings.ai is not None and findings.ai.confidence is not None:
+            return findings.ai.source
+        return "公式サイト"
+    
     def get_all_facilities_status(self, target_date: str) -> List[Dict]:
         """全施設の休館状況を取得"""
         results = []
@@ -0,0 +1,313 @@
+"""定型質問の高速応答
+
+「兼六園は明日開いてる？」「Is Kenrokuen open tomorrow?」のような
+(施設, 日付) / (全施設, 日付) の単純な問い合わせを判定し、
+エージェント（LLM）を通さずに休館判定エンジンの結果からテンプレートで回答する。
+それ以外の自由な質問は None を返してエージェントに回す。
+"""
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from closure_models import Verdict
+from config import FACILITIES, JOB_MAX_RANGE_DAYS
+from text_normalizer import normalize_text
+
+# 施設名 → (英語名, 別名)
+FACILITY_ALIASES: Dict[str, tuple] = {
+    "鈴木大拙館": ("D.T. Suzuki Museum", ["大拙館", "D.T. Suzuki", "DT Suzuki", "Suzuki Museum", "Daisetz"]),
+    "金沢21世紀美術館": ("21st Century Museum of Contemporary Art, Kanazawa",
+                    ["21世紀美術館", "21美", "21st Century Museum", "Kanazawa 21"]),
+    "いしかわ生活工芸ミュージアム": ("Ishikawa Living Craft Museum", ["生活工芸ミュージアム", "Living Craft"]),
+    "武家屋敷跡 野村家": ("Nomura Samurai House", ["野村家", "武家屋敷跡野村家", "Nomura"]),
+    "国指定重要文化財 成巽閣": ("Seisonkaku", ["成巽閣", "せいそんかく", "Seisonkaku"]),
+    "石川県立歴史博物館": ("Ishikawa Prefectural Museum of History", ["歴史博物館", "歴博", "Museum of History"]),
+    "国立工芸館": ("National Crafts Museum", ["工芸館", "National Crafts Museum", "Crafts Museum"]),
+    "特別名勝 兼六園": ("Kenrokuen Garden", ["兼六園", "けんろくえん", "Kenrokuen", "Kenroku-en"]),
+    "金沢城公園": ("Kanazawa Castle Park", ["金沢城", "Kanazawa Castle"]),
+    "前田土佐守家資料館": ("Maeda Tosanokami Family Museum", ["土佐守家資料館", "土佐守家", "Maeda Tosanokami"]),
+    "金沢市老舗記念館": ("Kanazawa Shinise Memorial Hall", ["老舗記念館", "Shinise"]),
+    "石川県立美術館": ("Ishikawa Prefectural Museum of Art", ["県立美術館", "Prefectural Museum of Art"]),
+    "金沢くらしの博物館": ("Kanazawa Kurashi Museum", ["くらしの博物館", "Kurashi"]),
+    "金沢能楽美術館": ("Kanazawa Noh Museum", ["能楽美術館", "Noh Museum"]),
+    "金沢市立中村記念美術館": ("Nakamura Memorial Museum", ["中村記念美術館", "Nakamura"]),
+    "加賀本多博物館": ("Kaga Honda Museum", ["本多博物館", "Honda Museum"]),
+    "金沢ふるさと偉人館": ("Kanazawa Furusato Ijin-kan", ["偉人館", "Ijin-kan", "Ijinkan"]),
+    "石川四高記念文化交流館": ("Ishikawa Shiko Memorial Cultural Exchange Hall",
+                     ["四高記念文化交流館", "四高記念", "Shiko Memorial"]),
+}
+
+# 別名（小文字）→ 施設名。長い別名から照合する
+_ALIASES = sorted(
+    ((alias.lower(), name) for name, (english, aliases) in FACILITY_ALIASES.items()
+     for alias in [name, english] + aliases),
+    key=lambda item: len(item[0]), reverse=True
+)
+
+# 全施設を対象とする表現
+ALL_FACILITIES_MARKERS = ["全施設", "すべての施設", "全ての施設", "全部の施設", "どの施設", "どこが",
+                          "all facilities", "all the facilities", "which facilities", "every facility"]
+
+# 複数日にわたる期間の表現（全施設と組み合わさると非同期ジョブで処理）
+# 「から」「まで」「〜」は単日の問い合わせにも現れるので含めない（日付が2つあれば範囲として扱う）
+PERIOD_MARKERS = ["ゴールデンウィーク", "golden week", "シルバーウィーク", "年末年始", "お盆", "連休",
+                  "今週", "来週", "再来週", "日間", "週間", "か月", "ヶ月"]
+_PERIOD_WORD_PATTERN = re.compile(r'\bgw\b|\b(?:this|next) (?:week|month)\b|\b\d+\s*(?:days|weeks)\b')
+
+# 開館・休館を尋ねる表現
+STATUS_MARKERS = ["開いて", "開館", "休館", "休み", "やって", "営業", "閉ま", "入れ",
+                  "open", "closed", "close"]
+
+# 自由な質問（エージェントに回す）の表現
+OPEN_ENDED_MARKERS = ["なぜ", "どうして", "理由", "料金", "値段", "アクセス", "行き方", "駐車", "おすすめ",
+                      "時間", "何時", "展示", "イベント", "混雑", "比較", "違い", "パス",
+                      "why", "how", "price", "fee", "ticket", "access", "parking", "recommend",
+                      "hours", "what time", "exhibition", "event", "crowd", "compare", "pass"]
+
+# _normalize_date が解釈できる日付表現
+_RELATIVE_DATES = {
+    "今日": "今日", "本日": "今日", "today": "今日",
+    "明日": "明日", "あした": "明日", "tomorrow": "明日",
+    "明後日": "明後日", "あさって": "明後日", "day after tomorrow": "明後日",
+}
+_DATE_PATTERN = re.compile(
+    r'\d{4}-\d{1,2}-\d{1,2}|\d{4}/\d{1,2}/\d{1,2}|\d{4}年\d{1,2}月\d{1,2}日|\d{1,2}月\d{1,2}日|'
+    + '|'.join(sorted((re.escape(k) for k in _RELATIVE_DATES), key=len, reverse=True)),
+    re.IGNORECASE
+)
+
+# _DATE_PATTERN 以外の日付らしい表現（曜日・M/D・英語の月名・週・序数日・「と」「、」の後の2日目など）。
+# 含まれていれば高速応答せずエージェントに回す（「今日」として答えない）
+_DATE_LIKE_PATTERN = re.compile(
+    r'[月火水木金土日]曜|平日|土日|祝日|週末|今週|来週|再来週|先週|今月|来月|年末|年始|連休|昨日|'
+    r'\d{1,2}\s*/\s*\d{1,2}|\d{1,4}\s*[年月日]|\d{1,2}(?:st|nd|rd|th)\b|'
+    r'\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?\s*\d|'
+    r'\b(?:january|february|march|april|june|july|august|september|october|november|december)\b|'
+    r'\b(?:mon|tues?|wed(?:nes)?|thu(?:rs)?|fri|sat(?:ur)?|sun)(?:day)?s?\b|'
+    r'\bweek(?:end)?s?\b|\byesterday\b|\btonight\b|\bholidays?\b',
+    re.IGNORECASE
+)
+
+# 高速応答の対象とする質問の最大文字数
+MAX_QUERY_LENGTH = 80
+
+# 期間表現（「来週」「連休」など）で日数が特定できないときの見積もり日数
+PERIOD_ESTIMATE_DAYS = 7
+
+_WEEKDAY_EN = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+_WEEKDAY_JA = ["月", "火", "水", "木", "金", "土", "日"]
+_KANA = re.compile(r'[\u3040-\u30FF]')
+_LATIN = re.compile(r'[A-Za-z]')
+
+
+class Intent:
+    """定型の問い合わせ"""
+    __slots__ = ("facilities", "all_facilities", "date_expression", "language")
+
+    def __init__(self, facilities: List[str], all_facilities: bool, date_expression: str, language: str):
+        self.facilities = facilities
+        self.all_facilities = all_facilities
+        self.date_expression = date_expression
+        self.language = language
+
+
+class QueryWork:
+    """問い合わせの処理量の見積もり（レート制限のコスト計算用）"""
+    __slots__ = ("facilities", "days", "needs_agent")
+
+    def __init__(self, facilities: int, days: int, needs_agent: bool):
+        self.facilities = facilities
+        self.days = days
+        self.needs_agent = needs_agent
+
+
+def _clean_query(query: str) -> str:
+    text = normalize_text(query)
+    # 英語の指示文（detect_language_and_enhance_query が付与）は除く
+    return text.split("[INSTRUCTION:")[0].strip()
+
+
+def resolve_facilities(text: str) -> List[str]:
+    """質問中の施設名（長い別名を優先し、照合済みの部分は除外）"""
+    facilities: List[str] = []
+    remaining = text.lower()
+    for alias, name in _ALIASES:
+        if alias in remaining:
+            remaining = remaining.replace(alias, " ")
+            if name not in facilities:
+                facilities.append(name)
+    return facilities
+
+
+def find_date_expressions(text: str) -> List[str]:
+    """質問中の日付表現（相対表現は「今日」「明日」「明後日」に統一）"""
+    return [_RELATIVE_DATES.get(expression.lower(), expression) for expression in _DATE_PATTERN.findall(text)]
+
+
+def resolve_date(expression: str, today: Optional[datetime] = None) -> Optional[str]:
+    """日付表現を YYYY-MM-DD に変換（_normalize_date と同じ規則。解釈できなければ None）"""
+    today = today or datetime.now()
+    relative = {"今日": 0, "明日": 1, "明後日": 2}
+    if expression in relative:
+        return (today + timedelta(days=relative[expression])).strftime("%Y-%m-%d")
+    try:
+        match = re.match(r'(\d{4})年(\d{1,2})月(\d{1,2})日', expression)
+        if match:
+            return datetime(int(match.group(1)), int(match.group(2)), int(match.group(3))).strftime("%Y-%m-%d")
+        match = re.match(r'(\d{1,2})月(\d{1,2})日', expression)
+        if match:
+            target = datetime(today.year, int(match.group(1)), int(match.group(2)))
+            # 過去の日付の場合は来年とする（当日は今年）
+            if target.date() < today.date():
+                target = datetime(today.year + 1, target.month, target.day)
+            return target.strftime("%Y-%m-%d")
+        return datetime.strptime(expression.replace("/", "-"), "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def detect_language(text: str) -> str:
+    """かなを含むか英字を含まなければ日本語（「Is 兼六園 open?」は英語）"""
+    return "ja" if _KANA.search(text) or not _LATIN.search(text) else "en"
+
+
+def parse_intent(query: str) -> Optional[Intent]:
+    """定型の (施設, 日付) / (全施設, 日付) の問い合わせなら Intent を返す"""
+    text = _clean_query(query)
+    if not text or len(text) > MAX_QUERY_LENGTH:
+        return None
+
+    lowered = text.lower()
+    if any(marker in lowered for marker in OPEN_ENDED_MARKERS):
+        return None
+    if not any(marker in lowered for marker in STATUS_MARKERS):
+        return None
+
+    facilities = resolve_facilities(text)
+    all_facilities = any(marker in lowered for marker in ALL_FACILITIES_MARKERS)
+    if all_facilities == bool(facilities) or len(facilities) > 1:
+        return None
+
+    dates = find_date_expressions(text)
+    if len(dates) > 1:
+        return None
+    # 解釈できない日付表現が残っていれば、日付の指定がないとみなして今日と答えない
+    if _DATE_LIKE_PATTERN.search(_DATE_PATTERN.sub(" ", text)):
+        return None
+    date_expression = dates[0] if dates else "今日"
+
+    return Intent(facilities, all_facilities, date_expression, detect_language(text))
+
+
+def estimate_work(query: str) -> QueryWork:
+    """施設数 × 日数と、エージェント（LLM）が必要かを質問文から見積もる"""
+    text = _clean_query(query)
+    lowered = text.lower()
+    if any(marker in lowered for marker in ALL_FACILITIES_MARKERS):
+        facilities = len(FACILITIES)
+    else:
+        facilities = max(1, len(resolve_facilities(text)))
+
+    dates = sorted(filter(None, (resolve_date(expression) for expression in find_date_expressions(text))))
+    if len(dates) > 1:
+        days = (datetime.strptime(dates[-1], "%Y-%m-%d") - datetime.strptime(dates[0], "%Y-%m-%d")).days + 1
+    elif _mentions_period(lowered):
+        days = PERIOD_ESTIMATE_DAYS
+    else:
+        days = 1
+
+    return QueryWork(facilities, min(days, JOB_MAX_RANGE_DAYS), parse_intent(query) is None)
+
+
+def is_long_running_query(query: str) -> bool:
+    """全施設 × 複数日の問い合わせ（API Gateway のタイムアウトを超えうる）"""
+    text = _clean_query(query)
+    lowered = text.lower()
+    if not any(marker in lowered for marker in ALL_FACILITIES_MARKERS):
+        return False
+    return len(find_date_expressions(text)) > 1 or _mentions_period(lowered)
+
+
+def _mentions_period(lowered: str) -> bool:
+    """複数日にわたる期間の表現を含むか"""
+    return any(marker in lowered for marker in PERIOD_MARKERS) or bool(_PERIOD_WORD_PATTERN.search(lowered))
+
+
+def _format_date(date_str: str, language: str) -> str:
+    dt = datetime.strptime(date_str, "%Y-%m-%d")
+    if language == "ja":
+        return f"{dt.year}年{dt.month}月{dt.day}日（{_WEEKDAY_JA[dt.weekday()]}）"
+    return f"{dt.strftime('%B')} {dt.day}, {dt.year} ({_WEEKDAY_EN[dt.weekday()]})"
+
+
+def _facility_label(name: str, language: str) -> str:
+    if language == "ja" or name not in FACILITY_ALIASES:
+        return name
+    return f"{FACILITY_ALIASES[name][0]} ({name})"
+
+
+def _render_facility(name: str, date_str: str, verdict: Verdict, language: str) -> str:
+    date_text = _format_date(date_str, language)
+    reason = verdict.reason
+    if language == "ja":
+        if verdict.is_closed:
+            lines = [f"🔴 {name}は{date_text}は休館日です。", f"理由: {reason}"]
+        else:
+            lines = [f"🟢 {name}は{date_text}は開館しています。"]
+        lines.append("※最新情報は各施設の公式サイトでご確認ください。")
+    else:
+        label = _facility_label(name, language)
+        if verdict.is_closed:
+            lines = [f"🔴 {label} is closed on {date_text}.", f"Reason: {reason}"]
+        else:
+            lines = [f"🟢 {label} is open on {date_text}."]
+        lines.append("Please check the official website for the latest information.")
+    return "\n".join(lines)
+
+
+def _render_all(summary: Dict, language: str) -> str:
+    date_text = _format_date(summary["date"], language)
+    closed = summary.get("closed_facilities", [])
+    opened = summary.get("open_facilities", [])
+    if language == "ja":
+        lines = [f"{date_text}の休館状況（全{summary.get('total_facilities', len(FACILITIES))}施設）",
+                 f"🔴 休館（{len(closed)}施設）: {'、'.join(closed) if closed else 'なし'}",
+                 f"🟢 開館（{len(opened)}施設）: {'、'.join(opened) if opened else 'なし'}",
+                 "※最新情報は各施設の公式サイトでご確認ください。"]
+    else:
+        closed_labels = [_facility_label(name, language) for name in closed]
+        open_labels = [_facility_label(name, language) for name in opened]
+        lines = [f"Facility status on {date_text} ({summary.get('total_facilities', len(FACILITIES))} facilities)",
+                 f"🔴 Closed ({len(closed)}): {', '.join(closed_labels) if closed_labels else 'none'}",
+                 f"🟢 Open ({len(opened)}): {', '.join(open_labels) if open_labels else 'none'}",
+                 "Please check each official website for the latest information."]
+    return "\n".join(lines)
+
+
+def answer(intent: Intent) -> Optional[str]:
+    """休館判定エンジンの結果からテンプレートで回答（判定できなければ None）"""
+    date_str = resolve_date(intent.date_expression)
+    if date_str is None:
+        return None
+
+    # 判定エンジン（スクレイパー・施設別判定）は初回利用時に読み込む
+    from agent import all_facilities_closure_summary, facility_closure_verdict
+
+    if intent.all_facilities:
+        summary = all_facilities_closure_summary(date_str)
+        if "error" in summary:
+            return None
+        return _render_all(summary, intent.language)
+
+    verdict = facility_closure_verdict(intent.facilities[0], date_str)
+    if verdict.error is not None or verdict.is_closed is None:
+        return None
+    return _render_facility(intent.facilities[0], date_str, verdict, intent.language)
+
+
+def try_fast_path(query: str) -> Optional[str]:
+    """定型質問なら回答を返す。それ以外は None（エージェントで処理）"""
+    intent = parse_intent(query)
+    if intent is None:
+        return None
+    return answer(intent)
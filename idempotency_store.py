@@ -0,0 +1,167 @@
+"""冪等キーのストア
+
+フロントエンドは論理的な問い合わせ1件ごとに Idempotency-Key を付けて送り、タイムアウトや
+通信エラーの再送でも同じキーを使う。最初のリクエストがキーを確保して処理中の記録を作り、
+完了後に応答を保存する。再送は処理中なら完了を待ち、完了済みなら保存した応答を返すため、
+同じ問い合わせのスクレイピングやモデル呼び出しを繰り返さない。
+IDEMPOTENCY_TABLE があれば DynamoDB（Lambda のコンテナ間で共有）、なければ SQLite ファイル。
+SQLite はコンテナごとのファイルなので、Lambda で再送を重複排除するには IDEMPOTENCY_TABLE が必要。
+"""
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from config import IDEMPOTENCY_LEASE_SECONDS, IDEMPOTENCY_STORE_PATH, IDEMPOTENCY_TABLE, IDEMPOTENCY_TTL, REGION
+
+# 記録の状態
+IN_FLIGHT = "in_flight"
+COMPLETED = "completed"
+
+
+def new_record(key: str, fingerprint: str) -> Dict[str, Any]:
+    """処理中の記録（処理したリクエストが落ちても IDEMPOTENCY_LEASE_SECONDS 後に失効する）"""
+    now = time.time()
+    return {
+        "key": key,
+        "fingerprint": fingerprint,
+        "status": IN_FLIGHT,
+        "response": None,
+        "created_at": now,
+        "expires_at": now + IDEMPOTENCY_LEASE_SECONDS,
+    }
+
+
+class SQLiteIdempotencyStore:
+    """単一コンテナ・ローカル用の冪等キーストア"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS requests (key TEXT PRIMARY KEY, data TEXT, expires_at REAL)"
+            )
+        return self._conn
+
+    def claim(self, key: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """キーを確保する（確保できれば None、既に記録があればその記録）"""
+        record = new_record(key, fingerprint)
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM requests WHERE expires_at <= ?", (record["created_at"],))
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO requests (key, data, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(record, ensure_ascii=False), record["expires_at"])
+            )
+            conn.commit()
+            if cursor.rowcount == 1:
+                return None
+            row = conn.execute("SELECT data FROM requests WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def complete(self, key: str, response: Dict[str, Any]) -> None:
+        """応答を保存し、IDEMPOTENCY_TTL の間は再送に返す"""
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT data FROM requests WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return
+            record = json.loads(row[0])
+            record.update(status=COMPLETED, response=response, expires_at=time.time() + IDEMPOTENCY_TTL)
+            conn.execute("UPDATE requests SET data = ?, expires_at = ? WHERE key = ?",
+                         (json.dumps(record, ensure_ascii=False), record["expires_at"], key))
+            conn.commit()
+
+    def release(self, key: str) -> None:
+        """処理に失敗したキーを解放する（次の再送がもう一度処理する）"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM requests WHERE key = ?", (key,))
+            conn.commit()
+
+
+class DynamoDBIdempotencyStore:
+    """DynamoDB の冪等キーストア（パーティションキー idempotency_key、TTL属性は expires_at）"""
+
+    def __init__(self, table_name: str, region: str):
+        self.table_name = table_name
+        self.region = region
+        self._table = None
+
+    @property
+    def table(self):
+        if self._table is None:
+            import boto3
+            self._table = boto3.resource('dynamodb', region_name=self.region).Table(self.table_name)
+        return self._table
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        item = self.table.get_item(Key={"idempotency_key": key}, ConsistentRead=True).get("Item")
+        if not item or int(item["expires_at"]) <= time.time():
+            return None
+        return {
+            "key": key,
+            "fingerprint": item["fingerprint"],
+            "status": item["status"],
+            "response": json.loads(item["response"]) if item.get("response") else None,
+            "created_at": float(item["created_at"]),
+            "expires_at": float(item["expires_at"]),
+        }
+
+    def claim(self, key: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """キーを確保する（確保できれば None、既に記録があればその記録）"""
+        record = new_record(key, fingerprint)
+        try:
+            # 記録がないか失効していれば確保する（TTL による削除は遅れることがある）
+            self.table.put_item(
+                Item={
+                    "idempotency_key": key,
+                    "fingerprint": fingerprint,
+                    "status": IN_FLIGHT,
+                    "created_at": int(record["created_at"]),
+                    "expires_at": int(record["expires_at"]),
+                },
+                ConditionExpression="attribute_not_exists(idempotency_key) OR expires_at <= :now",
+                ExpressionAttributeValues={":now": int(record["created_at"])}
+            )
+            return None
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            return self._get(key)
+
+    def complete(self, key: str, response: Dict[str, Any]) -> None:
+        """応答を保存し、IDEMPOTENCY_TTL の間は再送に返す"""
+        try:
+            # 確保できなかった（ストア障害時の）キーに記録を作らない
+            self.table.update_item(
+                Key={"idempotency_key": key},
+                UpdateExpression="SET #s = :s, #r = :r, expires_at = :e",
+                ConditionExpression="attribute_exists(idempotency_key)",
+                ExpressionAttributeNames={"#s": "status", "#r": "response"},
+                ExpressionAttributeValues={
+                    ":s": COMPLETED,
+                    ":r": json.dumps(response, ensure_ascii=False),
+                    ":e": int(time.time() + IDEMPOTENCY_TTL),
+                }
+            )
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            pass
+
+    def release(self, key: str) -> None:
+        """処理に失敗したキーを解放する（次の再送がもう一度処理する）"""
+        self.table.delete_item(Key={"idempotency_key": key})
+
+
+def _create_idempotency_store():
+    if IDEMPOTENCY_TABLE:
+        return DynamoDBIdempotencyStore(IDEMPOTENCY_TABLE, REGION)
+    return SQLiteIdempotencyStore(IDEMPOTENCY_STORE_PATH)
+
+
+# プロセス全体の冪等キーストア
+idempotency_store = _create_idempotency_store()
@@ -0,0 +1,261 @@
+"""非同期ジョブのストア
+
+長時間かかる問い合わせ（全施設×期間など）をジョブとして登録し、
+バックグラウンドのワーカーが進捗・途中結果・最終結果を書き込む。
+ワーカーは claim で queued → running を条件付きで切り替えてリース（lease_expires_at）を記録し、
+リースを過ぎても running のままのジョブは job_view が失敗として返す。
+JOB_TABLE があれば DynamoDB（Lambda のコンテナ間で共有）、なければ SQLite ファイル。
+"""
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from config import (
+    JOB_MAX_RESULT_BYTES, JOB_START_TIMEOUT_SECONDS, JOB_STORE_PATH, JOB_TABLE, JOB_TTL, REGION
+)
+
+# ジョブの状態
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+FINISHED_STATUSES = (JOB_SUCCEEDED, JOB_FAILED)
+
+# JSON として保存するフィールド
+_JSON_FIELDS = ("request", "progress", "partial", "result")
+# 時刻のフィールド
+_TIME_FIELDS = ("created_at", "updated_at", "expires_at", "lease_expires_at")
+
+# 中断したジョブの応答
+STALE_JOB_ERROR = "The job stopped before finishing. Please try again."
+
+
+def new_job(kind: str, request: Dict[str, Any], total: int) -> Dict[str, Any]:
+    """登録前のジョブ"""
+    now = time.time()
+    return {
+        "job_id": uuid.uuid4().hex,
+        "kind": kind,
+        "status": JOB_QUEUED,
+        "request": request,
+        "progress": {"done": 0, "total": total},
+        "partial": [],
+        "result": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+        "expires_at": now + JOB_TTL,
+        "lease_expires_at": None,
+        "truncated": False,
+    }
+
+
+class SQLiteJobStore:
+    """単一コンテナ・ローカル用のジョブストア"""
+
+    shared = False
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs (job_id TEXT PRIMARY KEY, data TEXT, expires_at REAL)"
+            )
+        return self._conn
+
+    def create(self, job: Dict[str, Any]) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM jobs WHERE expires_at <= ?", (time.time(),))
+            conn.execute(
+                "INSERT INTO jobs (job_id, data, expires_at) VALUES (?, ?, ?)",
+                (job["job_id"], json.dumps(job, ensure_ascii=False), job["expires_at"])
+            )
+            conn.commit()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT data, expires_at FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return json.loads(row[0])
+
+    def claim(self, job_id: str, lease_expires_at: float) -> Optional[Dict[str, Any]]:
+        """queued のジョブを running にして返す（他のワーカーが開始済みなら None）"""
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            job = json.loads(row[0])
+            if job["status"] != JOB_QUEUED or job["expires_at"] <= time.time():
+                return None
+            job.update(status=JOB_RUNNING, lease_expires_at=lease_expires_at, updated_at=time.time())
+            conn.execute("UPDATE jobs SET data = ? WHERE job_id = ?",
+                         (json.dumps(job, ensure_ascii=False), job_id))
+            conn.commit()
+            return job
+
+    def update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None:
+                return
+            job = json.loads(row[0])
+            job.update(fields, updated_at=time.time())
+            conn.execute("UPDATE jobs SET data = ? WHERE job_id = ?",
+                         (json.dumps(job, ensure_ascii=False), job_id))
+            conn.commit()
+
+
+class DynamoDBJobStore:
+    """DynamoDB のジョブストア（パーティションキー job_id、TTL属性は expires_at）"""
+
+    shared = True
+
+    def __init__(self, table_name: str, region: str):
+        self.table_name = table_name
+        self.region = region
+        self._table = None
+
+    @property
+    def table(self):
+        if self._table is None:
+            import boto3
+            self._table = boto3.resource('dynamodb', region_name=self.region).Table(self.table_name)
+        return self._table
+
+    @staticmethod
+    def _to_item(fields: Dict[str, Any]) -> Dict[str, Any]:
+        item = {}
+        for name, value in fields.items():
+            if name in _JSON_FIELDS:
+                item[name] = json.dumps(value, ensure_ascii=False)
+            elif isinstance(value, float):
+                # DynamoDB は float を受け付けないため秒単位の整数で保存
+                item[name] = int(value)
+            else:
+                item[name] = value
+        return item
+
+    def create(self, job: Dict[str, Any]) -> None:
+        self.table.put_item(Item=self._to_item(job))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        item = self.table.get_item(Key={"job_id": job_id}).get("Item")
+        if not item or int(item["expires_at"]) <= time.time():
+            return None
+        job = {}
+        for name, value in item.items():
+            if name in _JSON_FIELDS:
+                job[name] = json.loads(value)
+            elif name in _TIME_FIELDS:
+                job[name] = float(value) if value is not None else None
+            else:
+                job[name] = value
+        return job
+
+    def claim(self, job_id: str, lease_expires_at: float) -> Optional[Dict[str, Any]]:
+        """queued のジョブを条件付き更新で running にして返す（他のワーカーが開始済みなら None）"""
+        try:
+            self.table.update_item(
+                Key={"job_id": job_id},
+                UpdateExpression="SET #s = :running, lease_expires_at = :lease, updated_at = :now",
+                ConditionExpression="#s = :queued",
+                ExpressionAttributeNames={"#s": "status"},
+                ExpressionAttributeValues={":running": JOB_RUNNING, ":queued": JOB_QUEUED,
+                                           ":lease": int(lease_expires_at), ":now": int(time.time())},
+            )
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            return None
+        return self.get(job_id)
+
+    def update(self, job_id: str, **fields) -> None:
+        fields["updated_at"] = time.time()
+        item = self._to_item(fields)
+        names = {f"#f{i}": name for i, name in enumerate(item)}
+        values = {f":v{i}": value for i, value in enumerate(item.values())}
+        self.table.update_item(
+            Key={"job_id": job_id},
+            UpdateExpression="SET " + ", ".join(f"#f{i} = :v{i}" for i in range(len(item))),
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values
+        )
+
+
+def is_stale(job: Dict[str, Any], now: Optional[float] = None) -> bool:
+    """ワーカーが開始しなかった、またはリースを過ぎても終わっていないジョブか"""
+    now = now if now is not None else time.time()
+    if job["status"] == JOB_QUEUED:
+        return now > job["created_at"] + JOB_START_TIMEOUT_SECONDS
+    if job["status"] == JOB_RUNNING:
+        lease_expires_at = job.get("lease_expires_at")
+        return lease_expires_at is not None and now > lease_expires_at
+    return False
+
+
+def job_view(job: Dict[str, Any], now: Optional[float] = None) -> Dict[str, Any]:
+    """API で返すジョブの内容（完了前は途中結果、完了後は最終結果。中断したジョブは失敗）"""
+    status = JOB_FAILED if is_stale(job, now) else job["status"]
+    view = {
+        "jobId": job["job_id"],
+        "kind": job["kind"],
+        "status": status,
+        "progress": job["progress"],
+        "createdAt": job["created_at"],
+        "updatedAt": job["updated_at"],
+    }
+    if status == JOB_SUCCEEDED:
+        view["result"] = job["result"]
+    elif status == JOB_FAILED:
+        view["error"] = job["error"] if job["status"] == JOB_FAILED else STALE_JOB_ERROR
+        view["partial"] = job["partial"]
+    else:
+        view["partial"] = job["partial"]
+    if job.get("truncated"):
+        view["truncated"] = True
+    return view
+
+
+def _json_size(value: Any) -> int:
+    return len(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+
+def append_partial(store, job: Dict[str, Any], item: Any) -> None:
+    """途中結果を1件追加して進捗を更新（ジョブの書き込みはワーカー1つのみ）
+
+    途中結果の合計が JOB_MAX_RESULT_BYTES を超える場合は、施設ごとの詳細（details）を
+    除いた要約だけを記録し、それでも超えるなら記録せずに truncated を立てる。
+    """
+    partial: List[Any] = job["partial"]
+    used = _json_size(partial)
+    if used + _json_size(item) > JOB_MAX_RESULT_BYTES and isinstance(item, dict) and "details" in item:
+        item = {name: value for name, value in item.items() if name != "details"}
+        job["truncated"] = True
+    if used + _json_size(item) > JOB_MAX_RESULT_BYTES:
+        job["truncated"] = True
+    else:
+        partial.append(item)
+    job["progress"]["done"] += 1
+    store.update(job["job_id"], partial=partial, progress=job["progress"], truncated=job["truncated"])
+
+
+def _create_job_store():
+    if JOB_TABLE:
+        return DynamoDBJobStore(JOB_TABLE, REGION)
+    return SQLiteJobStore(JOB_STORE_PATH)
+
+
+# プロセス全体のジョブストア
+job_store = _create_job_store()
@@ -2,15 +2,65 @@
 Lambda function for Kanazawa Cultural Facility Agent Demo Interface
 Interfaces with Amazon Bedrock AgentCore to handle facility closure queries
 """
+import contextvars
+import hashlib
+import importlib
 import json
 import os
+import queue
+import re
+import threading
 import time
-from datetime import datetime
-from typing import Dict, Any
-import boto3
-from botocore.exceptions import ClientError
-from cors_config import cors_config, create_cors_response, handle_preflight_request
-from rate_limiter import check_request_rate_limit
+import uuid
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterator, Optional, Tuple
+from cors_config import (
+    cors_config, create_cors_response, create_sse_response, format_sse_event, handle_preflight_request
+)
+from rate_limiter import check_request_rate_limit, request_cost
+from concurrency_limiter import AdaptiveConcurrencyLimiter, OverloadedError, concurrency_limiter, is_throttle_error
+from prompts import ENHANCED_FACILITY_CONTEXT, ENHANCED_SYSTEM_PROMPT, FALLBACK_SYSTEM_PROMPT
+from fast_path import (
+    estimate_work, find_date_expressions, is_long_running_query, resolve_date, resolve_facilities, try_fast_path
+)
+from text_normalizer import normalize_text
+from prompt_cache import cache_min_tokens, cached_request_body, cached_system_blocks, prompt_cache_stats
+from model_invoker import PRIORITY_BACKGROUND, model_cancellation, model_invoker, model_priority
+from deadline import Deadline, DeadlineExceeded, current_deadline, deadline_scope
+from response_cache import build_cache_key, response_cache, ttl_for
+from job_store import JOB_SUCCEEDED, JOB_FAILED, append_partial, job_store, job_view, new_job
+from idempotency_store import COMPLETED, idempotency_store
+from config import (
+    API_GATEWAY_TIMEOUT_SECONDS, FACILITIES, JOB_LEASE_GRACE_SECONDS, JOB_MAX_RANGE_DAYS, JOB_TIME_BUDGET_SECONDS
+)
+
+# Answer routes whose responses are reused from the response cache
+CACHEABLE_ROUTES = ('fast_path', 'agent')
+
+# Batch requests: maximum items per call and concurrent workers
+MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', '20'))
+BATCH_MAX_WORKERS = int(os.getenv('BATCH_MAX_WORKERS', '4'))
+
+# Suggested polling interval for asynchronous jobs (seconds)
+JOB_POLL_INTERVAL = 2
+
+# Start the direct Bedrock path when the agent has produced no output after this many seconds
+AGENT_HEDGE_DELAY = float(os.getenv('AGENT_HEDGE_DELAY', '8'))
+# Time kept back from the Lambda deadline to build and return the response
+DEADLINE_MARGIN_SECONDS = 1.0
+# Time budget when there is no Lambda context (local server, job threads)
+DEFAULT_TIME_BUDGET_SECONDS = 60.0
+DEADLINE_MESSAGE = "Sorry, the answer is taking longer than expected. Please try again in a moment."
+DEADLINE_TRUNCATED_NOTE = "\n\n(The answer was cut short because it took too long.)"
+
+# Idempotency keys: accepted format, request fields that differ between retries,
+# how often a retry checks whether the first attempt has finished, and how long it waits
+# before answering 409 so the client retries later (seconds, well under the gateway limit)
+IDEMPOTENCY_KEY_PATTERN = re.compile(r'^[A-Za-z0-9_.:-]{1,128}$')
+IDEMPOTENCY_IGNORED_FIELDS = ('timestamp', 'attempt')
+IDEMPOTENCY_POLL_INTERVAL = 0.5
+IDEMPOTENCY_MAX_WAIT_SECONDS = 5.0
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
@@ -24,6 +74,15 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         API Gateway response with CORS headers
     """
     try:
+        # Asynchronous job worker invocation (self-invoked with InvocationType=Event)
+        if event.get('job_worker'):
+            run_job(event['job_worker'], worker_deadline(context))
+            return {'statusCode': 200, 'body': json.dumps({'jobId': event['job_worker']})}
+        
+        # Scheduled warm-up invocation: initialize heavy clients off the request path
+        if is_warm_up_event(event):
+            return {'statusCode': 200, 'body': json.dumps(warm_up())}
+        
         # Get request origin for CORS validation
         origin = event.get('headers', {}).get('Origin')
         
@@ -31,6 +90,10 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         if cors_config.is_preflight_request(event):
             return handle_preflight_request(origin)
         
+        # Job status polling: GET ?jobId=...
+        if event.get('httpMethod') == 'GET':
+            return handle_job_status(event, origin)
+        
         # Parse request body
         if not event.get('body'):
             return create_cors_response(400, {'error': 'No query provided'}, origin)
@@ -40,79 +103,883 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         except json.JSONDecodeError:
             return create_cors_response(400, {'error': 'Invalid request format'}, origin)
         
-        query = body.get('query', '').strip()
-        if not query:
-            return create_cors_response(400, {'error': 'Please enter a question'}, origin)
+        # Retries of one logical query carry the same Idempotency-Key and
+        # attach to the first attempt instead of running it again
+        idempotency_key = get_idempotency_key(event)
+        if idempotency_key is None:
+            return handle_query_request(body, event, context, origin)
+        if not IDEMPOTENCY_KEY_PATTERN.match(idempotency_key):
+            return create_cors_response(400, {'error': 'Invalid Idempotency-Key'}, origin)
         
-        # Input validation
-        if len(query) > 1000:
-            return create_cors_response(400, {'error': 'Question must be 1000 characters or less'}, origin)
+        replay = begin_idempotent_request(idempotency_key, body, event, request_deadline(context))
+        if replay is not None:
+            return replay
+        response = None
+        try:
+            response = handle_query_request(body, event, context, origin)
+            return response
+        finally:
+            finish_idempotent_request(idempotency_key, event, response)
         
-        # Rate limiting
-        client_ip = get_client_ip(event)
-        rate_allowed, rate_headers, rate_message = check_request_rate_limit(client_ip)
+    except OverloadedError as e:
+        # Shed before any agent work: the client retries after Retry-After
+        print(f"Shed agent execution: {json.dumps(concurrency_limiter.snapshot())}")
+        response = create_cors_response(503, {
+            'error': e.message,
+            'retryAfter': e.retry_after
+        }, event.get('headers', {}).get('Origin'))
+        response['headers']['Retry-After'] = str(e.retry_after)
+        return response
+    except Exception as e:
+        print(f"Lambda handler error: {str(e)}")
+        origin = event.get('headers', {}).get('Origin')
+        return create_cors_response(500, {
+            'error': 'A server error occurred. Please try again later.'
+        }, origin)
+
+def handle_query_request(body: Dict[str, Any], event: Dict[str, Any], context: Any,
+                         origin: Optional[str]) -> Dict[str, Any]:
+    """
+    Answer a POST request: a single query, a batch, or a date-range job
+    
+    Args:
+        body: Parsed request body
+        event: API Gateway event
+        context: Lambda context
+        origin: Request origin
         
-        if not rate_allowed:
-            # Create response with rate limit headers
-            response = create_cors_response(429, {
-                'error': rate_message
+    Returns:
+        API Gateway response with CORS headers
+    """
+    # Date-range job: {"range": {"start": ..., "end": ..., "facilities": [...]}}
+    if 'range' in body:
+        return handle_range_request(body['range'], event, context, origin)
+    
+    # Batch request: {"queries": [...]} or {"items": [{"facility": ..., "date": ...}, ...]}
+    if 'queries' in body or 'items' in body:
+        return handle_batch_request(body, event, context, origin)
+    
+    query = body.get('query', '').strip()
+    if not query:
+        return create_cors_response(400, {'error': 'Please enter a question'}, origin)
+    
+    # Input validation
+    if len(query) > 1000:
+        return create_cors_response(400, {'error': 'Question must be 1000 characters or less'}, origin)
+    
+    # Rate limiting, weighted by the estimated work of the question
+    client_ip = get_client_ip(event)
+    rate_allowed, rate_headers, rate_message = check_request_rate_limit(client_ip, estimate_query_cost(query))
+    
+    if not rate_allowed:
+        # Create response with rate limit headers
+        response = create_cors_response(429, {
+            'error': rate_message
+        }, origin)
+        # Add rate limit headers
+        response['headers'].update(rate_headers)
+        return response
+    
+    # Long all-facility/date-range questions run as a job instead of holding the request open.
+    # Without a shared job store on Lambda they are answered within the request deadline
+    if (body.get('async') or is_long_running_query(query)) and jobs_available(context):
+        response = submit_job('query', {'query': query}, 1, context, origin)
+        response['headers'].update(rate_headers)
+        return response
+    
+    # Streaming mode: the answer is returned as Server-Sent Events. The API Gateway proxy
+    # integration cannot stream a Python Lambda response, so the events are buffered into
+    # one body here; local_server.py writes them to the client as they are produced
+    if body.get('stream'):
+        sse_body = ''.join(format_sse_event(name, data)
+                           for name, data in stream_query_events(query, request_deadline(context)))
+        response = create_sse_response(200, sse_body, origin)
+        response['headers'].update(rate_headers)
+        return response
+    
+    start_time = time.time()
+    response_text, cache_meta = answer_query(query, deadline=request_deadline(context))
+    response_time = round(time.time() - start_time, 2)
+    
+    # Return successful response with rate limit headers
+    response = create_cors_response(200, {
+        'response': response_text,
+        'responseTime': response_time,
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'cache': cache_meta
+    }, origin)
+    # Add rate limit headers to show remaining quota
+    response['headers'].update(rate_headers)
+    return response
+
+def get_idempotency_key(event: Dict[str, Any]) -> Optional[str]:
+    """
+    Idempotency-Key header of the request (header names are case-insensitive)
+    
+    Args:
+        event: API Gateway event
+        
+    Returns:
+        Header value, or None when the request has no key
+    """
+    for name, value in (event.get('headers') or {}).items():
+        if name.lower() == 'idempotency-key':
+            return str(value).strip()
+    return None
+
+def request_fingerprint(body: Any) -> str:
+    """
+    Hash of the request body without the fields that change between retries
+    
+    Args:
+        body: Parsed request body
+        
+    Returns:
+        SHA-256 hex digest
+    """
+    if isinstance(body, dict):
+        body = {name: value for name, value in body.items() if name not in IDEMPOTENCY_IGNORED_FIELDS}
+    return hashlib.sha256(json.dumps(body, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+def begin_idempotent_request(key: str, body: Any, event: Dict[str, Any],
+                             deadline: Deadline) -> Optional[Dict[str, Any]]:
+    """
+    Claim an idempotency key, or wait for the attempt that holds it
+    
+    Keys are scoped to the client IP. A retry that finds the first attempt still
+    in flight polls for up to IDEMPOTENCY_MAX_WAIT_SECONDS, then answers 409 with
+    Retry-After; if that attempt fails and releases the key, the retry claims it
+    and runs the request itself.
+    
+    Args:
+        key: Idempotency-Key header value
+        body: Parsed request body
+        event: API Gateway event
+        deadline: How long a retry may wait for the first attempt
+        
+    Returns:
+        None when this request holds the key and must run (then call finish_idempotent_request),
+        otherwise the response to return: the stored response, 409 while still in flight, or 422
+    """
+    origin = event.get('headers', {}).get('Origin')
+    scoped_key = f"{get_client_ip(event)}:{key}"
+    fingerprint = request_fingerprint(body)
+    wait = Deadline(min(deadline.expires_at, Deadline.after(IDEMPOTENCY_MAX_WAIT_SECONDS).expires_at))
+    while True:
+        try:
+            record = idempotency_store.claim(scoped_key, fingerprint)
+        except Exception as e:
+            # Without the store the request still runs, only without deduplication
+            print(f"Idempotency store error: {str(e)}")
+            return None
+        if record is None:
+            return None
+        if record['fingerprint'] != fingerprint:
+            return create_cors_response(422, {
+                'error': 'Idempotency-Key was already used for a different request'
+            }, origin)
+        if record['status'] == COMPLETED:
+            print(f"Replaying stored response for idempotency key {key}")
+            response = dict(record['response'])
+            response['headers'] = {**response.get('headers', {}), 'Idempotent-Replayed': 'true'}
+            return response
+        if wait.remaining() < IDEMPOTENCY_POLL_INTERVAL:
+            response = create_cors_response(409, {
+                'error': 'This request is still being processed. Please try again shortly.',
+                'retryAfter': JOB_POLL_INTERVAL
             }, origin)
-            # Add rate limit headers
-            response['headers'].update(rate_headers)
+            response['headers']['Retry-After'] = str(JOB_POLL_INTERVAL)
             return response
+        time.sleep(IDEMPOTENCY_POLL_INTERVAL)
+
+def finish_idempotent_request(key: str, event: Dict[str, Any], response: Optional[Dict[str, Any]]) -> None:
+    """
+    Store the response for retries of a claimed key, or release the key when the request failed
+    
+    Args:
+        key: Idempotency-Key header value
+        event: API Gateway event
+        response: Response returned to the client (None when the request raised)
+    """
+    scoped_key = f"{get_client_ip(event)}:{key}"
+    try:
+        if is_replayable_response(response):
+            idempotency_store.complete(scoped_key, response)
+        else:
+            # Errors are not replayed: the next retry runs the request again
+            idempotency_store.release(scoped_key)
+    except Exception as e:
+        print(f"Idempotency store error: {str(e)}")
+
+def is_replayable_response(response: Optional[Dict[str, Any]]) -> bool:
+    """
+    Whether a response may be returned to retries of the same request
+    
+    Errors, including error events in a 200 event stream, and answers cut off
+    at the deadline are not stored, so a retry runs the request again.
+    
+    Args:
+        response: API Gateway response (None when the request raised)
         
-        # Process query with AgentCore
-        start_time = time.time()
-        response_text = process_agent_query(query)
-        response_time = round(time.time() - start_time, 2)
+    Returns:
+        True for a complete successful response
+    """
+    if response is None or not 200 <= response['statusCode'] < 300:
+        return False
+    if not response.get('headers', {}).get('Content-Type', '').startswith('text/event-stream'):
+        return json.loads(response['body']).get('cache', {}).get('route') != 'timeout'
+    for message in response['body'].split('\n\n'):
+        if not message:
+            continue
+        name_line, data_line = message.split('\n', 1)
+        data = json.loads(data_line[len('data: '):])
+        if name_line == 'event: error' or data.get('cache', {}).get('route') == 'timeout':
+            return False
+    return True
+
+def answer_query(query: str, session_id: str = 'demo_session',
+                 deadline: Optional[Deadline] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    Answer a query, serving identical questions (same language, facilities and date) from the response cache
+    
+    Args:
+        query: User query string
+        session_id: Agent session used on a cache miss
+        deadline: Deadline by which the answer must be ready (see request_deadline)
         
-        # Return successful response with rate limit headers
-        response = create_cors_response(200, {
-            'response': response_text,
-            'responseTime': response_time,
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
-        }, origin)
-        # Add rate limit headers to show remaining quota
+    Returns:
+        Tuple of (response text, cache metadata)
+    """
+    cache_key, cache_parts = build_cache_key(query, get_query_language(query))
+    cached, cache_meta = response_cache.get(cache_key)
+    if cached is not None:
+        return cached['response'], cache_meta
+    
+    # Process query with AgentCore
+    response_text, route = process_agent_query(query, session_id, deadline)
+    cache_meta['route'] = route
+    if route in CACHEABLE_ROUTES:
+        response_cache.put(cache_key, {'response': response_text, 'route': route}, ttl_for(cache_parts))
+    return response_text, cache_meta
+
+def handle_batch_request(body: Dict[str, Any], event: Dict[str, Any], context: Any,
+                         origin: Optional[str]) -> Dict[str, Any]:
+    """
+    Answer several questions in one call
+    
+    Items run concurrently and share the response cache, the scraped page cache
+    and a small pool of agent sessions. Rate limiting charges the sum of the item costs.
+    With "async": true the batch runs as a job instead.
+    
+    Args:
+        body: Parsed request body with 'queries' (strings) or 'items' (facility/date pairs)
+        event: API Gateway event
+        context: Lambda context
+        origin: Request origin
+        
+    Returns:
+        API Gateway response with results in request order (202 with a job for async batches)
+    """
+    items = body.get('queries') if 'queries' in body else body.get('items')
+    if not isinstance(items, list) or not items:
+        return create_cors_response(400, {'error': 'Batch must contain at least one item'}, origin)
+    if len(items) > MAX_BATCH_SIZE:
+        return create_cors_response(400, {'error': f'Batch must contain {MAX_BATCH_SIZE} items or fewer'}, origin)
+    
+    cost = sum(estimate_item_cost(item) for item in items)
+    rate_allowed, rate_headers, rate_message = check_request_rate_limit(get_client_ip(event), cost)
+    if not rate_allowed:
+        response = create_cors_response(429, {'error': rate_message}, origin)
+        response['headers'].update(rate_headers)
+        return response
+    
+    if body.get('async') and jobs_available(context):
+        response = submit_job('batch', {'items': items}, len(items), context, origin)
         response['headers'].update(rate_headers)
         return response
+    
+    start_time = time.time()
+    deadline = request_deadline(context)
+    workers = min(BATCH_MAX_WORKERS, len(items))
+    # Agent sessions (and their conversation memory) belong to this request only
+    request_id = (event.get('requestContext') or {}).get('requestId') or uuid.uuid4().hex
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(
+            lambda indexed: answer_batch_item(indexed[1], f"batch_{request_id}_{indexed[0]}", deadline),
+            enumerate(items)
+        ))
+    for index, result in enumerate(results):
+        result['index'] = index
+    
+    response = create_cors_response(200, {
+        'results': results,
+        'count': len(results),
+        'succeeded': sum(1 for result in results if result['status'] == 'ok'),
+        'responseTime': round(time.time() - start_time, 2),
+        'timestamp': datetime.utcnow().isoformat() + 'Z'
+    }, origin)
+    response['headers'].update(rate_headers)
+    return response
+
+def estimate_query_cost(query: str) -> int:
+    """
+    Rate limit cost of a question from its parsed intent
+    
+    Args:
+        query: User query string
+        
+    Returns:
+        Weighted cost (facility count x date count, doubled when the agent is needed)
+    """
+    work = estimate_work(query)
+    return request_cost(work.facilities, work.days, work.needs_agent)
+
+def estimate_item_cost(item: Any) -> int:
+    """
+    Rate limit cost of one batch item (structured facility/date items are single engine lookups)
+    
+    Args:
+        item: Query string, {"query": ...} or {"facility": ..., "date": ...}
+        
+    Returns:
+        Weighted cost of the item
+    """
+    if isinstance(item, dict) and 'facility' in item:
+        return request_cost(1, 1, needs_agent=False)
+    query = item.get('query', '') if isinstance(item, dict) else item
+    if not isinstance(query, str) or not query.strip() or len(query) > 1000:
+        # Rejected without any work
+        return 1
+    return estimate_query_cost(query)
+
+def answer_batch_item(item: Any, session_id: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+    """
+    Answer one batch item; failures are reported per item instead of failing the batch
+    
+    Args:
+        item: Query string, {"query": ...} or {"facility": ..., "date": ...}
+        session_id: Agent session for this item (not shared with other requests)
+        deadline: Shared deadline of the batch request
+        
+    Returns:
+        Result with 'status' ('ok' or 'error')
+    """
+    try:
+        if isinstance(item, dict) and 'facility' in item:
+            # Page fetches that cannot finish in time fall back to the rule-based closure data
+            with deadline_scope(deadline):
+                return answer_facility_date(str(item.get('facility', '')), str(item.get('date', '')))
         
+        query = item.get('query', '') if isinstance(item, dict) else item
+        if not isinstance(query, str) or not query.strip():
+            return {'status': 'error', 'error': 'Please enter a question'}
+        if len(query) > 1000:
+            return {'status': 'error', 'error': 'Question must be 1000 characters or less'}
+        
+        response_text, cache_meta = answer_query(query.strip(), session_id, deadline)
+        return {'status': 'ok', 'response': response_text, 'cache': cache_meta}
+    except OverloadedError as e:
+        return {'status': 'error', 'error': e.message, 'retryAfter': e.retry_after}
     except Exception as e:
-        print(f"Lambda handler error: {str(e)}")
-        origin = event.get('headers', {}).get('Origin')
-        return create_cors_response(500, {
-            'error': 'A server error occurred. Please try again later.'
+        print(f"Batch item error: {str(e)}")
+        return {'status': 'error', 'error': 'A server error occurred while processing this item.'}
+
+def answer_facility_date(facility: str, date: str) -> Dict[str, Any]:
+    """
+    Answer a structured (facility, date) item directly from the closure engine
+    
+    Args:
+        facility: Facility name or alias (Japanese or English)
+        date: YYYY-MM-DD, YYYY/MM/DD, M月D日, or a relative date (今日/明日/today/tomorrow)
+        
+    Returns:
+        Result with the closure data for the facility and date
+    """
+    facilities = resolve_facilities(normalize_text(facility))
+    if len(facilities) != 1:
+        return {'status': 'error', 'error': f'Unknown facility: {facility}'}
+    dates = find_date_expressions(normalize_text(date))
+    date_str = resolve_date(dates[0]) if len(dates) == 1 else None
+    if date_str is None:
+        return {'status': 'error', 'error': f'Invalid date: {date}'}
+    name = facilities[0]
+    
+    cache_key, cache_parts = build_cache_key(f"{name} {date_str}", 'data')
+    cached, cache_meta = response_cache.get(cache_key)
+    if cached is not None:
+        closure = cached['result']
+    else:
+        from agent import facility_closure_verdict
+        verdict = facility_closure_verdict(name, date_str)
+        if verdict.error is not None:
+            return {'status': 'error', 'error': verdict.error, 'facility': name, 'date': date_str}
+        closure = verdict.to_dict()
+        cache_meta['route'] = 'engine'
+        response_cache.put(cache_key, {'result': closure, 'route': 'engine'}, ttl_for(cache_parts))
+    
+    return {'status': 'ok', 'facility': name, 'date': date_str, 'result': closure, 'cache': cache_meta}
+
+def handle_range_request(range_spec: Any, event: Dict[str, Any], context: Any,
+                         origin: Optional[str]) -> Dict[str, Any]:
+    """
+    Submit a closure lookup over a date range as an asynchronous job
+    
+    Args:
+        range_spec: {"start": ..., "end": ..., "facilities": [...]} (all facilities when omitted)
+        event: API Gateway event
+        context: Lambda context
+        origin: Request origin
+        
+    Returns:
+        202 response with the job, or a 400/429 error
+    """
+    if not isinstance(range_spec, dict):
+        return create_cors_response(400, {'error': 'Invalid range'}, origin)
+    
+    dates = []
+    for key in ('start', 'end'):
+        expressions = find_date_expressions(normalize_text(str(range_spec.get(key, ''))))
+        dates.append(resolve_date(expressions[0]) if len(expressions) == 1 else None)
+    start, end = dates
+    if start is None or end is None or end < start:
+        return create_cors_response(400, {'error': 'Range needs a valid start and end date'}, origin)
+    start_date = datetime.strptime(start, '%Y-%m-%d')
+    days = (datetime.strptime(end, '%Y-%m-%d') - start_date).days + 1
+    if days > JOB_MAX_RANGE_DAYS:
+        return create_cors_response(400, {'error': f'Range must be {JOB_MAX_RANGE_DAYS} days or shorter'}, origin)
+    
+    facilities = []
+    for facility in range_spec.get('facilities') or []:
+        resolved = resolve_facilities(normalize_text(str(facility)))
+        if len(resolved) != 1:
+            return create_cors_response(400, {'error': f'Unknown facility: {facility}'}, origin)
+        facilities.append(resolved[0])
+    
+    # Engine lookups only: weighted by facilities x days
+    cost = request_cost(len(facilities) or len(FACILITIES), days, needs_agent=False)
+    rate_allowed, rate_headers, rate_message = check_request_rate_limit(get_client_ip(event), cost)
+    if not rate_allowed:
+        response = create_cors_response(429, {'error': rate_message}, origin)
+        response['headers'].update(rate_headers)
+        return response
+    
+    request = {
+        'dates': [(start_date + timedelta(days=offset)).strftime('%Y-%m-%d') for offset in range(days)],
+        'facilities': facilities
+    }
+    response = submit_job('range', request, days, context, origin)
+    response['headers'].update(rate_headers)
+    return response
+
+def jobs_available(context: Any) -> bool:
+    """
+    Check whether jobs can run in the background
+    
+    On Lambda a job needs the shared job store (JOB_TABLE, provisioned by deploy_lambda.py):
+    the worker runs in another invocation and status polls may reach any container.
+    
+    Args:
+        context: Lambda context
+        
+    Returns:
+        True when jobs can be submitted
+    """
+    return not getattr(context, 'function_name', None) or job_store.shared
+
+def submit_job(kind: str, request: Dict[str, Any], total: int, context: Any,
+               origin: Optional[str]) -> Dict[str, Any]:
+    """
+    Store a new job, start its worker and return 202 without waiting for the work
+    
+    Without a shared job store on Lambda (see jobs_available) the job is rejected with 501
+    rather than run inside the request, which API Gateway would cut off.
+    
+    Args:
+        kind: 'query', 'batch' or 'range'
+        request: Work description stored with the job
+        total: Number of work units for progress reporting
+        context: Lambda context
+        origin: Request origin
+        
+    Returns:
+        202 response with the job id and current status (501 when jobs are unavailable)
+    """
+    if not jobs_available(context):
+        return create_cors_response(501, {
+            'error': 'Long-running requests are not available on this deployment. '
+                     'Please ask about a shorter period or fewer facilities.'
         }, origin)
+    job = new_job(kind, request, total)
+    job_store.create(job)
+    dispatch_job(job['job_id'], context)
+    
+    body = job_view(job)
+    body['pollInterval'] = JOB_POLL_INTERVAL
+    response = create_cors_response(202, body, origin)
+    response['headers']['Location'] = f"?jobId={job['job_id']}"
+    return response
 
-def process_agent_query(query: str) -> str:
+def dispatch_job(job_id: str, context: Any) -> None:
+    """
+    Start the worker for a job
+    
+    On Lambda (which requires a shared job store, see jobs_available) the function invokes
+    itself asynchronously, so the work survives after this response is returned.
+    On the local server the job runs on a background thread.
+    
+    Args:
+        job_id: Job to run
+        context: Lambda context
+    """
+    function_name = getattr(context, 'function_name', None)
+    if function_name:
+        import boto3
+        boto3.client('lambda', region_name=os.getenv('AWS_REGION', 'us-west-2')).invoke(
+            FunctionName=function_name,
+            InvocationType='Event',
+            Payload=json.dumps({'job_worker': job_id}).encode('utf-8')
+        )
+    else:
+        deadline = Deadline.after(JOB_TIME_BUDGET_SECONDS)
+        threading.Thread(target=run_job, args=(job_id, deadline), daemon=True).start()
+
+def run_job(job_id: str, deadline: Deadline) -> None:
+    """
+    Execute a job, writing progress and partial results as each unit finishes
+    
+    Args:
+        job_id: Job to run
+        deadline: Deadline of the worker invocation or job thread
+    """
+    # Claim the job with a conditional update so a duplicate async invoke does not run it
+    # twice, and record a lease so a worker that crashes or times out shows up as failed
+    job = job_store.claim(job_id, deadline.expires_at + JOB_LEASE_GRACE_SECONDS)
+    if job is None:
+        # Unknown, expired, or already picked up by another worker
+        return
+    
+    try:
+        # Model calls made by jobs queue behind interactive requests
+        with model_priority(PRIORITY_BACKGROUND), deadline_scope(deadline):
+            request = job['request']
+            if job['kind'] == 'query':
+                response_text, cache_meta = answer_query(request['query'], f"job_{job_id}", deadline)
+                result = {'response': response_text, 'cache': cache_meta}
+            elif job['kind'] == 'batch':
+                for index, item in enumerate(request['items']):
+                    item_result = answer_batch_item(item, f"job_{job_id}_{index}", deadline)
+                    item_result['index'] = index
+                    append_partial(job_store, job, item_result)
+                result = {'results': job['partial']}
+            else:
+                for date_str in request['dates']:
+                    append_partial(job_store, job, check_day(date_str, request['facilities']))
+                result = {'days': job['partial']}
+        
+        job['progress']['done'] = job['progress']['total']
+        # The result carries the partial results, so drop them to keep the item within its size limit
+        job_store.update(job_id, status=JOB_SUCCEEDED, result=result, partial=[], progress=job['progress'])
+    except Exception as e:
+        print(f"Job {job_id} failed: {str(e)}")
+        job_store.update(job_id, status=JOB_FAILED, error='An error occurred while processing the job.')
+
+def check_day(date_str: str, facilities: list) -> Dict[str, Any]:
+    """
+    Closure status of the given facilities (all facilities when empty) on one day
+    
+    Args:
+        date_str: Date (YYYY-MM-DD)
+        facilities: Facility names
+        
+    Returns:
+        Day summary with closed and open facilities
+    """
+    from agent import all_facilities_closure_summary, facility_closure_verdict
+    
+    if not facilities:
+        summary = all_facilities_closure_summary(date_str)
+        if 'error' in summary:
+            return {'date': date_str, 'error': summary['error']}
+        return {
+            'date': date_str,
+            'closed_facilities': summary['closed_facilities'],
+            'open_facilities': summary['open_facilities'],
+            'details': [verdict.to_dict() for verdict in summary['details']]
+        }
+    
+    details = [dict(facility_closure_verdict(name, date_str).to_dict(), facility=name) for name in facilities]
+    return {
+        'date': date_str,
+        'closed_facilities': [result['facility'] for result in details if result.get('is_closed')],
+        'open_facilities': [result['facility'] for result in details if not result.get('is_closed')],
+        'details': details
+    }
+
+def handle_job_status(event: Dict[str, Any], origin: Optional[str]) -> Dict[str, Any]:
+    """
+    Return the status, progress and partial or final result of a job
+    
+    Args:
+        event: API Gateway event with ?jobId=...
+        origin: Request origin
+        
+    Returns:
+        API Gateway response with the job
+    """
+    params = event.get('queryStringParameters') or {}
+    job_id = params.get('jobId')
+    if not job_id:
+        return create_cors_response(400, {'error': 'jobId is required'}, origin)
+    
+    job = job_store.get(job_id)
+    if job is None:
+        return create_cors_response(404, {'error': 'Job not found or expired'}, origin)
+    
+    body = job_view(job)
+    if body['status'] not in (JOB_SUCCEEDED, JOB_FAILED):
+        body['pollInterval'] = JOB_POLL_INTERVAL
+    return create_cors_response(200, body, origin)
+
+def is_warm_up_event(event: Dict[str, Any]) -> bool:
+    """
+    Check whether the event is a warm-up ping (EventBridge schedule or {"warmup": true})
+    
+    Args:
+        event: Lambda event
+        
+    Returns:
+        True for warm-up invocations
+    """
+    return bool(event.get('warmup')) or event.get('source') == 'aws.events'
+
+def warm_up() -> Dict[str, Any]:
+    """
+    Pre-initialize the agent stack and Bedrock clients outside the request path
+    
+    Returns:
+        Initialization timings per component
+    """
+    timings = {}
+    start = time.time()
+    try:
+        import agent
+        timings['agent_import'] = round(time.time() - start, 3)
+        timings.update(agent.warm_up())
+    except Exception as e:
+        timings['agent_import'] = f"error: {e}"
+    
+    start = time.time()
+    try:
+        # Load botocore for the direct Bedrock paths
+        importlib.import_module('boto3')
+        timings['boto3_import'] = round(time.time() - start, 3)
+    except Exception as e:
+        timings['boto3_import'] = f"error: {e}"
+    
+    return {'warmed': True, 'timings': timings}
+
+def process_agent_query(query: str, session_id: str = 'demo_session',
+                        deadline: Optional[Deadline] = None) -> Tuple[str, str]:
     """
     Process the query using existing AgentCore implementation from agent.py
-    Falls back to enhanced Bedrock if agent.py is not available
+    Simple facility/date lookups take the deterministic fast path first;
+    the enhanced Bedrock path is hedged in when the agent is slow or fails
     
     Args:
         query: User query string
+        session_id: Agent session to use
+        deadline: Deadline bounding the whole chain (default: the current one, else DEFAULT_TIME_BUDGET_SECONDS)
         
     Returns:
-        Agent response text
+        Tuple of (response text, route: 'fast_path', 'agent', 'bedrock' or 'timeout')
+        
+    Raises:
+        OverloadedError: When the agent execution is shed or Bedrock is throttling
     """
+    deadline = deadline or current_deadline() or Deadline.after(DEFAULT_TIME_BUDGET_SECONDS)
+    
+    # Plain (facility, date) / (all facilities, date) lookups are answered
+    # from the closure engine without an LLM agent loop
     try:
-        # Try to use the existing agent implementation
-        return process_with_existing_agent(query)
-        
-    except ImportError as e:
-        print(f"Agent import error: {str(e)}")
-        print("Falling back to enhanced Bedrock implementation")
-        return process_enhanced_bedrock(query)
+        with deadline_scope(deadline):
+            fast_response = try_fast_path(query)
+        if fast_response:
+            print("Answered via fast path")
+            return fast_response, 'fast_path'
     except Exception as e:
-        print(f"Agent processing error: {str(e)}")
-        print("Falling back to enhanced Bedrock implementation")
-        return process_enhanced_bedrock(query)
+        print(f"Fast path error: {str(e)}")
+    
+    # Agent executions run under the adaptive concurrency limit (each hedged path holds a permit)
+    try:
+        for route, text in run_hedged([
+            ('agent', lambda: [process_with_existing_agent(query, session_id)]),
+            ('bedrock', lambda: [process_enhanced_bedrock(query)])
+        ], deadline):
+            return text, route
+    except TimeoutError:
+        print("No answer before the request deadline")
+        return DEADLINE_MESSAGE, 'timeout'
+    return "An error occurred during processing. Please try again later.", 'bedrock'
+
+def request_deadline(context: Any) -> Deadline:
+    """
+    Deadline for answering a synchronous API request
+    
+    The Lambda timeout is sized for job workers, but API Gateway cuts synchronous
+    requests off after 29s, so the deadline is capped at API_GATEWAY_TIMEOUT_SECONDS.
+    
+    Args:
+        context: Lambda context (None or a context without remaining time outside Lambda)
+        
+    Returns:
+        The earlier of API_GATEWAY_TIMEOUT_SECONDS from now and DEADLINE_MARGIN_SECONDS
+        before the invocation times out
+    """
+    deadline = worker_deadline(context)
+    return Deadline(min(deadline.expires_at, Deadline.after(API_GATEWAY_TIMEOUT_SECONDS).expires_at))
+
+def worker_deadline(context: Any) -> Deadline:
+    """
+    Deadline for a job worker invocation, from the Lambda's remaining execution time
+    
+    Args:
+        context: Lambda context (None or a context without remaining time outside Lambda)
+        
+    Returns:
+        Deadline DEADLINE_MARGIN_SECONDS before the invocation times out
+    """
+    return Deadline.from_lambda_context(context, DEADLINE_MARGIN_SECONDS, DEFAULT_TIME_BUDGET_SECONDS)
 
-def process_with_existing_agent(query: str) -> str:
+def run_hedged(paths: list, deadline: Deadline, hedge_delay: float = AGENT_HEDGE_DELAY,
+               limiter: AdaptiveConcurrencyLimiter = concurrency_limiter) -> Iterator[Tuple[str, str]]:
+    """
+    Race answer paths and yield the output of the first one to produce any
+    
+    The first path starts immediately; the next one starts when the running
+    paths have produced no output for hedge_delay seconds, or as soon as they
+    have all failed. Once a path has produced output the others are cancelled
+    (their remaining Bedrock calls are skipped and their output discarded).
+    Each path runs under the deadline, so its fetches and model calls are
+    bounded by the remaining time.
+    
+    Each path thread holds its own concurrency permit until it actually finishes.
+    A cancelled agent path cannot stop its agent loop or tool fetches, so its
+    permit stays in flight until then. A hedge path only starts when a permit is
+    available.
+    
+    Args:
+        paths: (route, factory) pairs in order of preference; factory returns an iterable of text
+        deadline: Deadline by which output must be complete
+        hedge_delay: Seconds without output before the next path starts
+        limiter: Concurrency limiter the paths are admitted under
+        
+    Returns:
+        Iterator of (route, text) from the winning path
+        
+    Raises:
+        OverloadedError: When no path can be admitted, or a path hit throttling
+        TimeoutError: When the deadline passes (after any output already yielded)
+        Exception: Otherwise the last path's error if all fail
+    """
+    events: queue.Queue = queue.Queue()
+    pending = list(paths)
+    running: Dict[str, threading.Event] = {}
+    winner = None
+    last_error = None
+    
+    def produce(route: str, factory, cancel: threading.Event) -> None:
+        try:
+            with limiter.acquired(), model_cancellation(cancel), deadline_scope(deadline):
+                for text in factory():
+                    if cancel.is_set():
+                        return
+                    events.put((route, text, None))
+            events.put((route, None, None))
+        except Exception as e:
+            events.put((route, None, e))
+    
+    def start_next() -> bool:
+        """Start the next pending path if a permit is available"""
+        if not limiter.try_acquire():
+            return False
+        route, factory = pending.pop(0)
+        cancel = running[route] = threading.Event()
+        # Copy the caller's context so model priority and cancellation apply in the thread
+        threading.Thread(target=contextvars.copy_context().run, args=(produce, route, factory, cancel),
+                         daemon=True).start()
+        return True
+    
+    if not start_next():
+        raise OverloadedError(limiter.retry_after())
+    hedge_at = time.monotonic() + hedge_delay
+    try:
+        while running:
+            if deadline.expired():
+                raise TimeoutError("request deadline exceeded")
+            now = time.monotonic()
+            timeout = deadline.remaining()
+            if pending and winner is None:
+                timeout = min(timeout, max(0.0, hedge_at - now))
+            try:
+                route, text, error = events.get(timeout=timeout)
+            except queue.Empty:
+                if pending and winner is None and time.monotonic() >= hedge_at:
+                    print(f"No output after {hedge_delay}s, starting the {pending[0][0]} path")
+                    if not start_next():
+                        print("No permit available for the hedge path; waiting on the running path")
+                    hedge_at = time.monotonic() + hedge_delay
+                continue
+            if route not in running:
+                # Output of a cancelled path
+                continue
+            
+            if text is None:
+                # Path finished or failed
+                running.pop(route)
+                if winner is not None:
+                    if error is not None:
+                        raise error
+                    return
+                if error is not None:
+                    if is_throttle_error(error) or isinstance(error, (OverloadedError, CancelledError)):
+                        # Another model call would only add to the pressure
+                        raise error
+                    print(f"{route} path error: {str(error)}")
+                    last_error = error
+                if pending and not running:
+                    print(f"Falling back to the {pending[0][0]} path")
+                    if not start_next():
+                        raise OverloadedError(limiter.retry_after())
+                    hedge_at = time.monotonic() + hedge_delay
+                continue
+            
+            if winner is None:
+                winner = route
+                for other in [other for other in running if other != route]:
+                    running.pop(other).set()
+            yield route, text
+        
+        if last_error is not None:
+            raise last_error
+    finally:
+        for cancel in running.values():
+            cancel.set()
+
+class SimpleContext:
+    """Simple context object for the agent entrypoints"""
+    def __init__(self, session_id: str = 'demo_session'):
+        self.session_id = session_id
+        self.headers = {
+            'X-Amzn-Bedrock-AgentCore-Runtime-Custom-Actor-Id': 'user'
+        }
+
+def process_with_existing_agent(query: str, session_id: str = 'demo_session') -> str:
     """
     Process query using the existing agent.py implementation
     
     Args:
         query: User query string
+        session_id: Agent session to use
         
     Returns:
         Agent response text
@@ -124,20 +991,12 @@ def process_with_existing_agent(query: str) -> str:
     # Detect language and add language instruction
     enhanced_query = detect_language_and_enhance_query(query)
     
-    # Create a simple context object for the agent
-    class SimpleContext:
-        def __init__(self):
-            self.session_id = 'demo_session'
-            self.headers = {
-                'X-Amzn-Bedrock-AgentCore-Runtime-Custom-Actor-Id': 'user'
-            }
-    
     # Prepare payload for the agent
     payload = {
         "prompt": enhanced_query
     }
     
-    context = SimpleContext()
+    context = SimpleContext(session_id)
     
     # Call the existing agent implementation
     result = invoke_proper(payload, context)
@@ -192,6 +1051,41 @@ def detect_language_and_enhance_query(query: str) -> str:
         # No clear language detected - default to original
         return query
 
+def get_query_language(query: str) -> str:
+    """
+    Response language for a query, as decided by detect_language_and_enhance_query
+    
+    Args:
+        query: Original user query
+        
+    Returns:
+        'en' when an English instruction is added, otherwise 'ja'
+    """
+    return 'en' if detect_language_and_enhance_query(query) != query else 'ja'
+
+def build_enhanced_user_message(query: str) -> str:
+    """
+    Build the user message for the enhanced Bedrock path
+    
+    Args:
+        query: User query string
+        
+    Returns:
+        User message with an English instruction for English queries
+    """
+    has_japanese = any('\u3040' <= char <= '\u309F' or  # Hiragana
+                      '\u30A0' <= char <= '\u30FF' or   # Katakana
+                      '\u4E00' <= char <= '\u9FAF'       # Kanji
+                      for char in query)
+    
+    has_english = any('a' <= char.lower() <= 'z' for char in query)
+    
+    if has_english and not has_japanese:
+        # English query - add English instruction
+        return f"Question: {query}\n\nPlease respond in English with specific information about the facility's status on the requested date, including opening hours, closure reasons, and any special events."
+    # Japanese or mixed query - use original format
+    return f"Question: {query}"
+
 def process_enhanced_bedrock(query: str) -> str:
     """
     Enhanced Bedrock implementation with session-like memory simulation
@@ -202,89 +1096,34 @@ def process_enhanced_bedrock(query: str) -> str:
     Returns:
         Agent response text
     """
+    # botocore is imported on first use so preflight and cached responses skip it
+    from botocore.exceptions import ClientError
+    
     try:
         # Use Claude 3.7 Sonnet for better responses (similar to AgentCore)
         region = os.getenv('AWS_REGION', 'us-west-2')
-        bedrock_client = boto3.client('bedrock-runtime', region_name=region)
-        
-        # Enhanced system prompt with comprehensive facility information (18 facilities)
-        system_prompt = """You are a knowledgeable assistant specializing in cultural facilities covered by the Kanazawa Cultural Forest Pass (文化の森お出かけパス) in Ishikawa Prefecture, Japan. You provide information about all 18 official facilities.
-
-OFFICIAL FACILITIES (18 facilities from the Cultural Forest Pass):
-
-**Core Museums & Cultural Sites:**
-1. **D.T. Suzuki Museum (鈴木大拙館)** - Generally closed Mondays (open on holidays), 9:30-17:00
-2. **21st Century Museum of Contemporary Art, Kanazawa** - Generally open 10:00-18:00 (Fri/Sat until 20:00), closed Mondays except holidays
-3. **Ishikawa Living Craft Museum (いしかわ生活工芸ミュージアム)** - Traditional crafts display
-4. **Nomura Samurai House (武家屋敷跡 野村家)** - Historic samurai residence
-5. **Seisonkaku (国指定重要文化財 成巽閣)** - Important Cultural Property
-6. **Ishikawa Prefectural Museum of History** - 9:00-17:00, closed Mondays
-7. **National Crafts Museum (国立工芸館)** - National museum for crafts
-8. **Kenrokuen Garden (特別名勝 兼六園)** - Open year-round, one of Japan's three great gardens
-9. **Kanazawa Castle Park** - Historic castle grounds
-
-**Specialized Museums:**
-10. **Maeda Tosanokami Family Museum (前田土佐守家資料館)** - Closed Mondays (open on holidays)
-11. **Kanazawa Shinise Memorial Hall (金沢市老舗記念館)** - Traditional merchant house, closed Mondays
-12. **Ishikawa Prefectural Museum of Art** - 9:30-18:00, closed Mondays
-13. **Kanazawa Kurashi Museum (金沢くらしの博物館)** - Lifestyle museum, closed Mondays
-14. **Kanazawa Noh Museum** - 9:00-17:00, closed Mondays
-15. **Nakamura Memorial Museum (金沢市立中村記念美術館)** - 9:30-17:00, closed Mondays
-16. **Kaga Honda Museum (加賀本多博物館)** - Samurai family museum
-17. **Kanazawa Furusato Ijin-kan (金沢ふるさと偉人館)** - Local heroes museum
-18. **Ishikawa Shiko Memorial Cultural Exchange Hall (石川四高記念文化交流館)** - Cultural exchange facility
-
-GENERAL PATTERNS:
-- Most facilities: Closed Mondays (except national holidays), open holidays with Tuesday closure
-- Winter closure: December 29 - January 3 for most facilities
-- Hours: Generally 9:00-17:00 or 9:30-17:00 (entry 30 minutes before closing)
-- Special exhibitions may affect schedules
-
-RESPONSE GUIDELINES:
-- Provide specific information about these 18 official Cultural Forest Pass facilities
-- For current status or special events, always advise checking official websites
-- Mention that this is part of the Cultural Forest Pass system
-- Be conversational and informative
-- Respond in the language the user asks in (Japanese or English)
-- If asked about facilities not in this list, clarify these are the 18 official pass facilities"""
-
-        # Detect language and create appropriate user message
-        has_japanese = any('\u3040' <= char <= '\u309F' or  # Hiragana
-                          '\u30A0' <= char <= '\u30FF' or   # Katakana
-                          '\u4E00' <= char <= '\u9FAF'       # Kanji
-                          for char in query)
         
-        has_english = any('a' <= char.lower() <= 'z' for char in query)
-        
-        if has_english and not has_japanese:
-            # English query - add English instruction
-            user_message = f"Question: {query}\n\nPlease respond in English with specific information about the facility's status on the requested date, including opening hours, closure reasons, and any special events."
-        else:
-            # Japanese or mixed query - use original format
-            user_message = f"Question: {query}"
+        # Detect language and create appropriate user message
+        user_message = build_enhanced_user_message(query)
         
         # Use Claude 3.7 Sonnet for higher quality responses
         model_id = os.getenv('MODEL_ID', 'us.anthropic.claude-3-7-sonnet-20250219-v1:0')
         
-        request_body = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 400,  # Increased for more detailed responses
-            "temperature": 0.3,  # Lower temperature for more consistent responses
-            "system": system_prompt,
-            "messages": [
+        # Static facility facts are sent as a cached system prefix; the checkpoint follows the
+        # facility directory so the prefix reaches the model's minimum cacheable length
+        response_body = model_invoker.invoke('enhanced_bedrock', model_id, cached_request_body(
+            cached_system_blocks(ENHANCED_SYSTEM_PROMPT, ENHANCED_FACILITY_CONTEXT,
+                                 min_tokens=cache_min_tokens(model_id)),
+            [
                 {
                     "role": "user",
                     "content": user_message
                 }
-            ]
-        }
-        
-        response = bedrock_client.invoke_model(
-            modelId=model_id,
-            body=json.dumps(request_body)
-        )
-        
-        response_body = json.loads(response['body'].read())
+            ],
+            max_tokens=400,  # Increased for more detailed responses
+            temperature=0.3  # Lower temperature for more consistent responses
+        ), region=region)
+        print(f"Prompt cache stats: {json.dumps(prompt_cache_stats.snapshot())}")
         
         if 'content' in response_body and len(response_body['content']) > 0:
             return response_body['content'][0]['text']
@@ -297,14 +1136,19 @@ RESPONSE GUIDELINES:
         
         if error_code == 'AccessDeniedException':
             return "Access denied. Please contact the system administrator."
-        elif error_code == 'ThrottlingException':
-            return "Too many requests. Please wait and try again later."
+        elif is_throttle_error(e):
+            # Surfaced as 503 + Retry-After by the concurrency limiter
+            raise
         elif error_code == 'ValidationException':
             # Fallback to Haiku if Sonnet is not available
             return process_bedrock_fallback(query)
         else:
             return "A service error occurred. Please try again later."
             
+    except (OverloadedError, CancelledError, DeadlineExceeded):
+        # No model slot became free in time, the hedged request finished elsewhere,
+        # or there is no time left for the call
+        raise
     except Exception as e:
         print(f"Enhanced Bedrock processing error: {str(e)}")
         return process_bedrock_fallback(query)
@@ -319,48 +1163,30 @@ def process_bedrock_fallback(query: str) -> str:
     Returns:
         Agent response text
     """
+    # botocore is imported on first use so preflight and cached responses skip it
+    from botocore.exceptions import ClientError
+    
     try:
         # Use Bedrock directly as fallback
         region = os.getenv('AWS_REGION', 'us-west-2')
-        bedrock_client = boto3.client('bedrock-runtime', region_name=region)
         
-        # Create a simple prompt for facility information
-        system_prompt = """You are an assistant that provides information about cultural facilities in Kanazawa City, Japan.
-Please answer questions about the following facilities:
-- 21st Century Museum of Contemporary Art, Kanazawa
-- Kenrokuen Garden
-- Ishikawa Prefectural Museum of Art
-- Kanazawa Noh Museum
-- D.T. Suzuki Museum
-- Nakamura Memorial Museum
-- Ishikawa Prefectural Museum of History
-
-Provide general opening hours and closure information. For specific dates, please advise users to "check the official website for the latest information." Always respond in English."""
-
         # For fallback, always use simple format since it's already English-focused
         user_message = f"Question: {query}"
         
         # Use Claude 3 Haiku for cost-effective responses
         model_id = os.getenv('FALLBACK_MODEL_ID', 'anthropic.claude-3-haiku-20240307-v1:0')
         
-        request_body = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 300,
-            "system": system_prompt,
-            "messages": [
+        # Claude 3 Haiku does not support prompt caching, so no checkpoint is set here
+        response_body = model_invoker.invoke('bedrock_fallback', model_id, cached_request_body(
+            [{"type": "text", "text": FALLBACK_SYSTEM_PROMPT}],
+            [
                 {
                     "role": "user",
                     "content": user_message
                 }
-            ]
-        }
-        
-        response = bedrock_client.invoke_model(
-            modelId=model_id,
-            body=json.dumps(request_body)
-        )
-        
-        response_body = json.loads(response['body'].read())
+            ],
+            max_tokens=300
+        ), region=region)
         
         if 'content' in response_body and len(response_body['content']) > 0:
             return response_body['content'][0]['text']
@@ -373,15 +1199,171 @@ Provide general opening hours and closure information. For specific dates, pleas
         
         if error_code == 'AccessDeniedException':
             return "Access denied. Please contact the system administrator."
-        elif error_code == 'ThrottlingException':
-            return "Too many requests. Please wait and try again later."
+        elif is_throttle_error(e):
+            raise
         else:
             return "A service error occurred. Please try again later."
             
+    except (OverloadedError, CancelledError, DeadlineExceeded):
+        raise
     except Exception as e:
         print(f"Bedrock fallback processing error: {str(e)}")
         return "An error occurred during processing. Please try again later."
 
+class FinalAnswer(str):
+    """
+    Complete final assistant message at the end of a stream
+    
+    The agent streams its narration before tool calls as well as the answer, so the
+    joined fragments are not the answer. This item carries the final message for the
+    response cache and is not sent to the client.
+    """
+
+def stream_query_events(query: str, deadline: Optional[Deadline] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Answer a query as a sequence of SSE events
+    
+    Args:
+        query: User query string
+        deadline: Deadline bounding the answer (see request_deadline)
+        
+    Returns:
+        Iterator of (event name, data): 'token' events with text fragments,
+        then a 'done' event with response metadata (or an 'error' event)
+    """
+    start_time = time.time()
+    try:
+        cache_key, cache_parts = build_cache_key(query, get_query_language(query))
+        cached, cache_meta = response_cache.get(cache_key)
+        if cached is not None:
+            yield 'token', {'text': cached['response']}
+        else:
+            chunks = []
+            final_answer = None
+            route = None
+            for route, text in stream_agent_query(query, deadline):
+                if isinstance(text, FinalAnswer):
+                    final_answer = text
+                    continue
+                chunks.append(text)
+                yield 'token', {'text': text}
+            cache_meta['route'] = route
+            if route in CACHEABLE_ROUTES:
+                # Only the final message is cached, not the narration streamed before tool calls
+                answer = str(final_answer) if final_answer is not None else ''.join(chunks)
+                response_cache.put(cache_key, {'response': answer, 'route': route}, ttl_for(cache_parts))
+        
+        yield 'done', {
+            'responseTime': round(time.time() - start_time, 2),
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'cache': cache_meta
+        }
+    except OverloadedError as e:
+        print(f"Shed agent execution: {json.dumps(concurrency_limiter.snapshot())}")
+        yield 'error', {'error': e.message, 'retryAfter': e.retry_after}
+    except Exception as e:
+        print(f"Streaming error: {str(e)}")
+        yield 'error', {'error': 'A server error occurred. Please try again later.'}
+
+def stream_agent_query(query: str, deadline: Optional[Deadline] = None) -> Iterator[Tuple[str, str]]:
+    """
+    Streaming counterpart of process_agent_query
+    
+    Args:
+        query: User query string
+        deadline: Deadline bounding the whole chain (default: the current one, else DEFAULT_TIME_BUDGET_SECONDS)
+        
+    Returns:
+        Iterator of (route, text fragment); a 'timeout' fragment ends a stream cut off by the deadline
+    """
+    deadline = deadline or current_deadline() or Deadline.after(DEFAULT_TIME_BUDGET_SECONDS)
+    
+    try:
+        with deadline_scope(deadline):
+            fast_response = try_fast_path(query)
+        if fast_response:
+            print("Answered via fast path")
+            yield 'fast_path', fast_response
+            return
+    except Exception as e:
+        print(f"Fast path error: {str(e)}")
+    
+    # Each path holds a permit while it runs; the path that sends the first token wins
+    emitted = False
+    try:
+        for route, text in run_hedged([
+            ('agent', lambda: stream_with_existing_agent(query)),
+            ('bedrock', lambda: stream_enhanced_bedrock(query))
+        ], deadline):
+            emitted = True
+            yield route, text
+    except TimeoutError:
+        print("Stream cut off at the request deadline")
+        yield 'timeout', DEADLINE_TRUNCATED_NOTE if emitted else DEADLINE_MESSAGE
+
+def stream_with_existing_agent(query: str) -> Iterator[str]:
+    """
+    Stream the agent.py response text as it is generated
+    
+    Args:
+        query: User query string
+        
+    Returns:
+        Iterator of response text fragments, ending with the final message as a FinalAnswer
+    """
+    from agent import stream_proper
+    
+    emitted = False
+    for item in stream_proper({"prompt": detect_language_and_enhance_query(query)}, SimpleContext()):
+        if isinstance(item, dict):
+            if 'error' in item:
+                print(f"Agent returned error: {item['error']}")
+                raise Exception(f"Agent error: {item['error']}")
+            if item.get('response'):
+                # Non-incremental result: send the final text in one piece
+                yield FinalAnswer(item['response']) if emitted else item['response']
+            return
+        emitted = True
+        yield item
+
+def stream_enhanced_bedrock(query: str) -> Iterator[str]:
+    """
+    Stream the enhanced Bedrock response (InvokeModelWithResponseStream)
+    
+    Args:
+        query: User query string
+        
+    Returns:
+        Iterator of response text fragments
+    """
+    emitted = False
+    try:
+        region = os.getenv('AWS_REGION', 'us-west-2')
+        model_id = os.getenv('MODEL_ID', 'us.anthropic.claude-3-7-sonnet-20250219-v1:0')
+        
+        for text in model_invoker.stream('enhanced_bedrock_stream', model_id, cached_request_body(
+            cached_system_blocks(ENHANCED_SYSTEM_PROMPT, ENHANCED_FACILITY_CONTEXT,
+                                 min_tokens=cache_min_tokens(model_id)),
+            [
+                {
+                    "role": "user",
+                    "content": build_enhanced_user_message(query)
+                }
+            ],
+            max_tokens=400,
+            temperature=0.3
+        ), region=region):
+            emitted = True
+            yield text
+        print(f"Prompt cache stats: {json.dumps(prompt_cache_stats.snapshot())}")
+        
+    except Exception as e:
+        if emitted or is_throttle_error(e) or isinstance(e, (OverloadedError, CancelledError, DeadlineExceeded)):
+            raise
+        # The non-streaming path carries the error handling and Haiku fallback
+        print(f"Enhanced Bedrock streaming error: {str(e)}")
+        yield process_enhanced_bedrock(query)
+
 # CORS response function is now imported from cors_config.py
 
 def get_client_ip(event: Dict[str, Any]) -> str:
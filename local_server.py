@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Local development server for the demo interface
+
+Serves index.html and forwards /api/query (POST queries, GET job status) to
+lambda_handler; asynchronous jobs run on background threads. Requests with
+"stream": true are answered as Server-Sent Events written to the socket as each
+token arrives (Lambda behind API Gateway buffers the same events into one body).
+Streams with an Idempotency-Key are recorded like lambda_handler's responses,
+so a retry of the same query attaches to the running stream's result.
+
+Usage:
+    python local_server.py [--port 3000]
+    BEDROCK_STUB=1 python local_server.py   # offline, stub Bedrock responses
+"""
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+from cors_config import cors_config, create_sse_response, format_sse_event
+from deadline import Deadline
+from fast_path import is_long_running_query
+from lambda_handler import (
+    DEFAULT_TIME_BUDGET_SECONDS, IDEMPOTENCY_KEY_PATTERN, begin_idempotent_request, estimate_query_cost,
+    finish_idempotent_request, get_client_ip, get_idempotency_key, lambda_handler, stream_query_events
+)
+from rate_limiter import check_request_rate_limit
+
+INDEX_PATH = Path(__file__).parent / 'index.html'
+
+
+class LocalRequestHandler(BaseHTTPRequestHandler):
+    """Translates HTTP requests into API Gateway proxy events"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def _event(self, body: str = '') -> dict:
+        url = urlsplit(self.path)
+        return {
+            'httpMethod': self.command,
+            'path': url.path,
+            'queryStringParameters': dict(parse_qsl(url.query)) or None,
+            'headers': dict(self.headers.items()),
+            'body': body,
+            'requestContext': {'identity': {'sourceIp': self.client_address[0]}}
+        }
+
+    def _send_lambda_response(self, response: dict) -> None:
+        payload = response.get('body', '').encode('utf-8')
+        self.send_response(response['statusCode'])
+        for name, value in response.get('headers', {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _write_chunk(self, text: str) -> None:
+        data = text.encode('utf-8')
+        self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def _stream(self, query: str, rate_headers: dict) -> str:
+        """Write the answer as SSE chunks; returns the whole event stream"""
+        events = []
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Transfer-Encoding', 'chunked')
+        for name, value in {**cors_config.get_cors_headers(self.headers.get('Origin')), **rate_headers}.items():
+            self.send_header(name, value)
+        self.end_headers()
+        for name, data in stream_query_events(query):
+            events.append(format_sse_event(name, data))
+            self._write_chunk(events[-1])
+        self.wfile.write(b"0\r\n\r\n")
+        return ''.join(events)
+
+    def do_OPTIONS(self):
+        self._send_lambda_response(lambda_handler(self._event(), None))
+
+    def do_GET(self):
+        # Job status polling
+        if urlsplit(self.path).path == '/api/query':
+            self._send_lambda_response(lambda_handler(self._event(), None))
+            return
+        if self.path not in ('/', '/index.html'):
+            self.send_error(404)
+            return
+        payload = INDEX_PATH.read_bytes()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        if self.path != '/api/query':
+            self.send_error(404)
+            return
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8')
+        try:
+            request = json.loads(body) if body else {}
+        except json.JSONDecodeError:
+            request = {}
+        query = str(request.get('query', '')).strip()
+
+        # Invalid or rate-limited requests get lambda_handler's JSON error response
+        event = self._event(body)
+        key = get_idempotency_key(event)
+        if request.get('stream') and 0 < len(query) <= 1000 and not is_long_running_query(query) and \
+                (key is None or IDEMPOTENCY_KEY_PATTERN.match(key)):
+            if key is not None:
+                replay = begin_idempotent_request(key, request, event, Deadline.after(DEFAULT_TIME_BUDGET_SECONDS))
+                if replay is not None:
+                    self._send_lambda_response(replay)
+                    return
+            allowed, rate_headers, _ = check_request_rate_limit(get_client_ip(event), estimate_query_cost(query))
+            response = None
+            try:
+                if allowed:
+                    sse_body = self._stream(query, rate_headers)
+                    response = create_sse_response(200, sse_body, self.headers.get('Origin'))
+                    response['headers'].update(rate_headers)
+                    return
+            finally:
+                if key is not None:
+                    finish_idempotent_request(key, event, response)
+        self._send_lambda_response(lambda_handler(event, None))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local development server')
+    parser.add_argument('--port', type=int, default=3000, help='Port to listen on')
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('localhost', args.port), LocalRequestHandler)
+    print(f"Serving on http://localhost:{args.port} (API: /api/query)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
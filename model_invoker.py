@@ -0,0 +1,395 @@
+"""Bedrock 呼び出しの共通サービス
+
+施設サイトのAI解析・エージェントのサイト分析・Lambda の直接応答など、
+Bedrock の InvokeModel 呼び出しはすべてここを通す。
+
+- リージョンごとに1つのクライアントを共有（接続プールを再利用）
+- 同時実行数の上限と優先度付きの待ち行列（対話 > バックグラウンド）
+- ジッター付き指数バックオフの再試行（再試行の予算内のみ）
+- 呼び出し元ごとの応答時間・待ち時間・トークン数の集計
+
+FakeBedrockClient は遅延とスロットリングを再現するローカルのフェイク（検証・ベンチマーク用）。
+"""
+import contextvars
+import heapq
+import itertools
+import json
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from concurrency_limiter import OverloadedError, THROTTLE_ERROR_CODES, concurrency_limiter
+from config import MODEL_MAX_CONCURRENCY, REGION
+from deadline import MIN_MODEL_SECONDS, DeadlineExceeded, current_deadline, timeout_for
+from prompt_cache import StubBedrockClient, create_bedrock_client, prompt_cache_stats
+
+# 優先度（小さいほど先に実行）
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+# 実行枠の待ち時間の上限（超えたら OverloadedError）
+QUEUE_TIMEOUT_SECONDS = {PRIORITY_INTERACTIVE: 10.0, PRIORITY_BACKGROUND: 60.0}
+
+# 再試行: 最大試行回数とバックオフ（full jitter）
+MAX_ATTEMPTS = 3
+BACKOFF_BASE_SECONDS = 0.2
+BACKOFF_MAX_SECONDS = 2.0
+
+# モデル応答の読み取りタイムアウト（締め切りがあれば残り時間に合わせて下の段階から選ぶ）
+MODEL_READ_TIMEOUT_SECONDS = 60.0
+READ_TIMEOUT_STEPS = (2.0, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+# 再試行の予算: 呼び出し1回ごとに RETRY_BUDGET_RATIO 回分を積み立て、再試行1回で1回分を使う
+RETRY_BUDGET_RATIO = 0.1
+RETRY_BUDGET_CAPACITY = 10.0
+
+# 再試行する Bedrock のエラーコードと、接続・タイムアウト系の例外クラス名
+RETRYABLE_ERROR_CODES = THROTTLE_ERROR_CODES + ('ModelNotReadyException', 'InternalServerException',
+                                                'ModelTimeoutException')
+RETRYABLE_EXCEPTIONS = ('ReadTimeoutError', 'ConnectTimeoutError', 'EndpointConnectionError',
+                        'ConnectionClosedError')
+
+# 呼び出し元ごとに保持する応答時間のサンプル数（パーセンタイル用）
+LATENCY_SAMPLES = 256
+
+# 現在の処理の優先度（非同期ジョブは PRIORITY_BACKGROUND）
+_priority: contextvars.ContextVar = contextvars.ContextVar("model_priority", default=PRIORITY_INTERACTIVE)
+# 取り消し用のイベント（ヘッジで負けた処理はこれ以降の呼び出しを行わない）
+_cancel_event: contextvars.ContextVar = contextvars.ContextVar("model_cancel_event", default=None)
+
+
+@contextmanager
+def model_priority(priority: int) -> Iterator[None]:
+    """このブロック内の Bedrock 呼び出しの優先度を設定"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+@contextmanager
+def model_cancellation(event: threading.Event) -> Iterator[None]:
+    """event がセットされたら、このブロック内の Bedrock 呼び出しを CancelledError で打ち切る
+
+    実行中の HTTP 呼び出しは中断できないため、呼び出し前・再試行前・ストリームの各イベントで確認する。
+    """
+    token = _cancel_event.set(event)
+    try:
+        yield
+    finally:
+        _cancel_event.reset(token)
+
+
+def _check_cancelled() -> None:
+    event = _cancel_event.get()
+    if event is not None and event.is_set():
+        raise CancelledError()
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """再試行で回復しうるエラーか（スロットリング・一時的な障害・接続エラー）"""
+    response = getattr(error, 'response', None)
+    code = response.get('Error', {}).get('Code', '') if isinstance(response, dict) else ''
+    return code in RETRYABLE_ERROR_CODES or type(error).__name__ in RETRYABLE_EXCEPTIONS
+
+
+class PriorityGate:
+    """同時実行数の上限つきの実行枠（空きが出たら優先度の高い順、同じ優先度は到着順）"""
+
+    def __init__(self, slots: int):
+        self._condition = threading.Condition()
+        self._free = slots
+        self._waiting: list = []
+        self._sequence = itertools.count()
+
+    def acquire(self, priority: int, timeout: float) -> bool:
+        """実行枠を取得（timeout 秒以内に取れなければ False）"""
+        with self._condition:
+            ticket = (priority, next(self._sequence))
+            heapq.heappush(self._waiting, ticket)
+            deadline = time.monotonic() + timeout
+            while self._free == 0 or self._waiting[0] != ticket:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._condition.notify_all()
+                    return False
+                self._condition.wait(remaining)
+            heapq.heappop(self._waiting)
+            self._free -= 1
+            # 枠が残っていれば次の待機者も進める
+            self._condition.notify_all()
+            return True
+
+    def release(self) -> None:
+        with self._condition:
+            self._free += 1
+            self._condition.notify_all()
+
+    def queued(self) -> int:
+        with self._condition:
+            return len(self._waiting)
+
+
+class RetryBudget:
+    """再試行の予算（障害時に再試行が負荷を増幅しないよう、呼び出し数の一定割合に抑える）"""
+
+    def __init__(self, ratio: float = RETRY_BUDGET_RATIO, capacity: float = RETRY_BUDGET_CAPACITY):
+        self.ratio = ratio
+        self.capacity = capacity
+        self._tokens = capacity
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+
+class CallerMetrics:
+    """呼び出し元ごとの集計"""
+    __slots__ = ("calls", "errors", "retries", "queue_wait", "input_tokens", "output_tokens", "latencies")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.queue_wait = 0.0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.latencies: deque = deque(maxlen=LATENCY_SAMPLES)
+
+    def snapshot(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+
+        def percentile(fraction: float) -> float:
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * fraction))], 3) if latencies else 0.0
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "latency_p50": percentile(0.5),
+            "latency_p95": percentile(0.95),
+            "avg_queue_wait": round(self.queue_wait / self.calls, 3) if self.calls else 0.0,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+        }
+
+
+class ModelInvoker:
+    """Bedrock 呼び出しの共通サービス（プロセス全体で1つ）"""
+
+    def __init__(self, max_concurrency: int = MODEL_MAX_CONCURRENCY,
+                 client_factory: Callable[..., Any] = create_bedrock_client,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.max_concurrency = max_concurrency
+        self.client_factory = client_factory
+        self.sleep = sleep
+        self.gate = PriorityGate(max_concurrency)
+        self.retry_budget = RetryBudget()
+        self._clients: Dict[Tuple[str, float], Any] = {}
+        self._metrics: Dict[str, CallerMetrics] = {}
+        self._lock = threading.Lock()
+
+    def client(self, region: str = REGION, read_timeout: float = MODEL_READ_TIMEOUT_SECONDS):
+        """リージョン・読み取りタイムアウトごとの共有クライアント（初回利用時に作成）"""
+        key = (region, read_timeout)
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = self.client_factory(region, max_connections=self.max_concurrency,
+                                                         read_timeout=read_timeout)
+            return self._clients[key]
+
+    def _attempt_client(self, region: str):
+        """締め切りまでの残り時間に収まる読み取りタイムアウトのクライアント
+
+        Raises:
+            DeadlineExceeded: 残り時間がモデル呼び出しに足りない場合
+        """
+        budget = timeout_for(MODEL_READ_TIMEOUT_SECONDS, MIN_MODEL_SECONDS)
+        # 残り時間以下で最大の段階に丸めてクライアント数を抑える（最小段階は MIN_MODEL_SECONDS）
+        read_timeout = max(step for step in READ_TIMEOUT_STEPS if step <= budget)
+        return self.client(region, read_timeout)
+
+    def _caller_metrics(self, caller: str) -> CallerMetrics:
+        metrics = self._metrics.get(caller)
+        if metrics is None:
+            metrics = self._metrics[caller] = CallerMetrics()
+        return metrics
+
+    def _start(self, caller: str, region: str, request: Callable[[Any], Any]) -> Tuple[Any, float, float]:
+        """実行枠を取って request を実行し、(結果, 開始時刻, 待ち時間) を返す（実行枠は保持したまま）
+
+        再試行は予算内でのみ行い、バックオフ中は実行枠を手放す。
+        締め切りがあれば実行枠の待ち時間と読み取りタイムアウトを残り時間に収め、
+        残り時間が足りない試行・再試行は行わない。
+        """
+        priority = _priority.get()
+        self.retry_budget.deposit()
+        start = time.monotonic()
+        queue_wait = 0.0
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            _check_cancelled()
+            # 締め切りがあれば実行枠を待つのはモデル呼び出しの時間を残せる間だけ
+            budget = timeout_for(QUEUE_TIMEOUT_SECONDS[priority] + MIN_MODEL_SECONDS, MIN_MODEL_SECONDS)
+            waited = time.monotonic()
+            if not self.gate.acquire(priority, budget - MIN_MODEL_SECONDS):
+                self._record(caller, start, queue_wait + time.monotonic() - waited, error=True)
+                if budget < QUEUE_TIMEOUT_SECONDS[priority] + MIN_MODEL_SECONDS:
+                    raise DeadlineExceeded("model queue wait exceeds the request deadline")
+                raise OverloadedError(1)
+            queue_wait += time.monotonic() - waited
+            try:
+                _check_cancelled()
+                client = self._attempt_client(region)
+                # 応答時間とスロットリングを同時実行数の適応制御にも渡す
+                with concurrency_limiter.track('bedrock'):
+                    return request(client), start, queue_wait
+            except Exception as e:
+                self.gate.release()
+                backoff = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+                deadline = current_deadline()
+                # 待っても締め切りまでに再試行を終えられない場合は再試行しない
+                too_late = deadline is not None and deadline.remaining() - backoff < MIN_MODEL_SECONDS
+                if attempt == MAX_ATTEMPTS or not is_retryable_error(e) or too_late or \
+                        not self.retry_budget.withdraw():
+                    self._record(caller, start, queue_wait, error=True)
+                    raise
+                with self._lock:
+                    self._caller_metrics(caller).retries += 1
+                self.sleep(backoff)
+
+    def _record(self, caller: str, start: float, queue_wait: float, usage: Optional[Dict[str, Any]] = None,
+                error: bool = False) -> None:
+        with self._lock:
+            metrics = self._caller_metrics(caller)
+            metrics.calls += 1
+            metrics.queue_wait += queue_wait
+            if error:
+                metrics.errors += 1
+                return
+            metrics.latencies.append(time.monotonic() - start - queue_wait)
+            if usage:
+                metrics.input_tokens += (usage.get("input_tokens", 0) or 0) + \
+                    (usage.get("cache_read_input_tokens", 0) or 0) + (usage.get("cache_creation_input_tokens", 0) or 0)
+                metrics.output_tokens += usage.get("output_tokens", 0) or 0
+        prompt_cache_stats.record(usage)
+
+    def invoke(self, caller: str, model_id: str, body: Dict[str, Any], region: str = REGION) -> Dict[str, Any]:
+        """InvokeModel を呼び出し、応答本文を返す
+
+        Args:
+            caller: 集計に使う呼び出し元の名前
+            model_id: モデルID
+            body: リクエスト本文（anthropic_version・messages など）
+            region: リージョン
+
+        Raises:
+            OverloadedError: 実行枠を待ちきれなかった場合
+            DeadlineExceeded: 締め切りまでに呼び出しを終えられない場合
+        """
+        def request(client) -> Dict[str, Any]:
+            response = client.invoke_model(modelId=model_id, body=json.dumps(body),
+                                           accept='application/json', contentType='application/json')
+            return json.loads(response['body'].read())
+
+        response_body, start, queue_wait = self._start(caller, region, request)
+        self.gate.release()
+        self._record(caller, start, queue_wait, response_body.get("usage"))
+        return response_body
+
+    def stream(self, caller: str, model_id: str, body: Dict[str, Any], region: str = REGION) -> Iterator[str]:
+        """InvokeModelWithResponseStream のテキスト断片を順に返す（再試行はストリーム開始前のみ）"""
+        response, start, queue_wait = self._start(
+            caller, region,
+            lambda client: client.invoke_model_with_response_stream(modelId=model_id, body=json.dumps(body))
+        )
+        usage: Dict[str, Any] = {}
+        try:
+            for event in response['body']:
+                _check_cancelled()
+                chunk = event.get('chunk')
+                if not chunk:
+                    continue
+                data = json.loads(chunk['bytes'])
+                if data.get("type") == "message_start":
+                    usage.update(data.get("message", {}).get("usage", {}))
+                elif data.get("type") == "message_delta":
+                    usage.update(data.get("usage", {}))
+                elif data.get("type") == "content_block_delta":
+                    text = data.get("delta", {}).get("text")
+                    if text:
+                        yield text
+        except Exception:
+            self._record(caller, start, queue_wait, error=True)
+            raise
+        else:
+            self._record(caller, start, queue_wait, usage)
+        finally:
+            self.gate.release()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """呼び出し元ごとの集計と待ち行列の長さ"""
+        with self._lock:
+            callers = {caller: metrics.snapshot() for caller, metrics in self._metrics.items()}
+        return {"max_concurrency": self.max_concurrency, "queued": self.gate.queued(), "callers": callers}
+
+
+class FakeClientError(Exception):
+    """botocore の ClientError と同じ形の response を持つ例外（botocore 不要）"""
+
+    def __init__(self, code: str, operation: str = "InvokeModel"):
+        super().__init__(f"An error occurred ({code}) when calling the {operation} operation")
+        self.response = {"Error": {"Code": code, "Message": code}}
+
+
+class FakeBedrockClient(StubBedrockClient):
+    """遅延とスロットリングを再現するフェイクの bedrock-runtime
+
+    latency 秒（±jitter の割合でばらつく）待ってから応答し、
+    throttle_rate の確率で ThrottlingException を返す。
+    """
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.2, throttle_rate: float = 0.0,
+                 seed: Optional[int] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _wait(self, operation: str) -> None:
+        with self._lock:
+            throttled = self._random.random() < self.throttle_rate
+            delay = self.latency * (1 + self._random.uniform(-self.jitter, self.jitter))
+        time.sleep(delay)
+        if throttled:
+            raise FakeClientError("ThrottlingException", operation)
+
+    def invoke_model(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        self._wait("InvokeModel")
+        with self._lock:
+            return super().invoke_model(modelId, body, **kwargs)
+
+    def invoke_model_with_response_stream(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        self._wait("InvokeModelWithResponseStream")
+        with self._lock:
+            return super().invoke_model_with_response_stream(modelId, body, **kwargs)
+
+
+# プロセス全体の Bedrock 呼び出しサービス
+model_invoker = ModelInvoker()
@@ -0,0 +1,250 @@
+"""和暦・期間表現の決定的パーサー
+
+「令和7年9月から12月中旬（予定）まで工事のため休館」のような表現を
+具体的な日付区間と信頼度に変換する。長期休館をBedrockを呼ばずに判定するために使う。
+"""
+import calendar
+from datetime import date, timedelta
+from typing import List, Optional
+
+from closure_patterns import PERIOD_PATTERN, KeywordHits, closure_scanner
+from date_index import era_to_year, governing_keyword, _SentenceLocator
+
+# 旬 → (開始日, 終了日)。終了日 None は月末
+DECADE_RANGES = {
+    "上旬": (1, 10),
+    "初旬": (1, 10),
+    "中旬": (11, 20),
+    "下旬": (21, None),
+    "末": (21, None),
+}
+
+# 信頼度の基準値と減点
+BASE_CONFIDENCE = 0.95
+FUZZY_PENALTY = 0.1        # 旬で指定された端点1つごと
+TENTATIVE_PENALTY = 0.05   # 「予定」
+OPEN_START_PENALTY = 0.15  # 「○日まで」のみで開始日がない
+NO_KEYWORD_PENALTY = 0.3   # 期間を修飾する休館キーワードがない
+FUZZY_TAIL_CONFIDENCE = 0.6  # あいまいな端点の範囲内の日付
+
+# 「○日まで」の終了日を翌年とみなす最大日数（年末に読んだ「1月10日まで」）
+NEW_YEAR_WRAP_DAYS = 62
+
+# 区間の最大長（誤検出で数年単位の区間を作らないため）
+MAX_PERIOD_DAYS = 730
+
+
+class ClosurePeriod:
+    """期間表現から得た日付区間
+
+    start〜end が表現の取りうる最大範囲、certain_start〜certain_end が
+    旬などのあいまいさを除いた確実な範囲。
+    """
+    __slots__ = ("start", "end", "certain_start", "certain_end", "confidence",
+                 "text", "sentence", "keyword", "keyword_kind")
+
+    def __init__(self, start: date, end: date, certain_start: date, certain_end: date, confidence: float,
+                 text: str, sentence: str, keyword: Optional[str], keyword_kind: Optional[str]):
+        self.start = start
+        self.end = end
+        self.certain_start = certain_start
+        self.certain_end = certain_end
+        self.confidence = confidence
+        self.text = text
+        self.sentence = sentence
+        self.keyword = keyword
+        self.keyword_kind = keyword_kind
+
+    def confidence_for(self, target: date) -> float:
+        """対象日が区間に含まれる信頼度（含まれなければ0.0）"""
+        if not (self.start <= target <= self.end):
+            return 0.0
+        if self.certain_start <= target <= self.certain_end:
+            return self.confidence
+        return min(self.confidence, FUZZY_TAIL_CONFIDENCE)
+
+    def to_dict(self) -> dict:
+        return {
+            "start": self.start.isoformat(),
+            "end": self.end.isoformat(),
+            "certain_start": self.certain_start.isoformat(),
+            "certain_end": self.certain_end.isoformat(),
+            "confidence": self.confidence,
+            "text": self.text,
+            "sentence": self.sentence,
+            "keyword": self.keyword,
+            "keyword_kind": self.keyword_kind,
+        }
+
+
+def _point_year(groups: dict, prefix: str, default: int) -> int:
+    if groups[prefix + "era"]:
+        return era_to_year(groups[prefix + "era"], groups[prefix + "era_year"])
+    if groups[prefix + "year"]:
+        return int(groups[prefix + "year"])
+    return default
+
+
+def _month_end(year: int, month: int) -> int:
+    return calendar.monthrange(year, month)[1]
+
+
+def _point_range(year: int, month: int, day: Optional[str], part: Optional[str]):
+    """端点 → (最早日, 最遅日, 旬で指定されたか)"""
+    if day:
+        d = date(year, month, int(day))
+        return d, d, False
+    if part:
+        first, last = DECADE_RANGES[part]
+        return date(year, month, first), date(year, month, last or _month_end(year, month)), True
+    # 月のみ（「9月から12月まで」）は月全体
+    return date(year, month, 1), date(year, month, _month_end(year, month)), False
+
+
+def _build_span(g: dict, start_year: int):
+    """開始点のある期間表現 → (開始の最早日, 最遅日, 旬か, 終了の最早日, 最遅日, 旬か)"""
+    if g["s_month"]:
+        start_month = int(g["s_month"])
+        start_early, start_late, start_fuzzy = _point_range(start_year, start_month, g["s_day"], g["s_part"])
+    else:
+        # 「4日〜10日」のように月がない開始点は終了点の月を使う
+        start_month = int(g["e_month"])
+        start_early = start_late = date(start_year, start_month, int(g["s_day_only"]))
+        start_fuzzy = False
+
+    if g["e_month"]:
+        end_month = int(g["e_month"])
+        end_year = _point_year(g, "e_", start_year)
+        if not (g["e_era"] or g["e_year"]) and end_month < start_month:
+            end_year += 1
+        end_early, end_late, end_fuzzy = _point_range(end_year, end_month, g["e_day"], g["e_part"])
+    else:
+        end_early = end_late = date(start_year, start_month, int(g["e_day_only"]))
+        end_fuzzy = False
+    return start_early, start_late, start_fuzzy, end_early, end_late, end_fuzzy
+
+
+def _distance(start: date, end: date, target: date) -> int:
+    """区間と対象日の距離（含まれれば0）"""
+    if target < start:
+        return (start - target).days
+    if target > end:
+        return (target - end).days
+    return 0
+
+
+def parse_periods(text: str, reference_date: date, hits: Optional[KeywordHits] = None,
+                  target: Optional[date] = None) -> List[ClosurePeriod]:
+    """テキスト中の期間表現を日付区間に変換
+
+    reference_date はページを読んだ日（通常は今日）で、「○日まで」の開始日と年の既定値に使う。
+    年の記載がない区間は、前後1年のうち target（省略時は reference_date）を含む、
+    または最も近い年に解決する（「年末年始（12月29日～1月3日）」を対象日 1月2日 で引く場合など）。
+    """
+    if hits is None:
+        hits = closure_scanner.scan(text)
+    if target is None:
+        target = reference_date
+    locator = _SentenceLocator(text)
+    periods: List[ClosurePeriod] = []
+    current_year = reference_date.year
+
+    for match in PERIOD_PATTERN.finditer(text):
+        g = match.groupdict()
+        has_start = g["s_month"] is not None or g["s_day_only"] is not None
+        # 単独の日付（開始も「まで」もない）は期間ではない
+        if not has_start and not g["until"]:
+            if g["e_era"] or g["e_year"]:
+                current_year = _point_year(g, "e_", current_year)
+            continue
+
+        if has_start:
+            prefix = "s_" if g["s_month"] else "e_"
+            if g["s_day_only"] and not g["e_month"]:
+                continue
+            if g[prefix + "era"] or g[prefix + "year"]:
+                current_year = _point_year(g, prefix, current_year)
+                candidate_years = [current_year]
+            else:
+                candidate_years = [current_year, current_year - 1, current_year + 1]
+            spans = []
+            for year in candidate_years:
+                try:
+                    spans.append(_build_span(g, year))
+                except ValueError:
+                    continue
+            if not spans:
+                continue
+            # 対象日を含む（なければ最も近い）年。同じ距離なら引き継いだ年を優先
+            start_early, start_late, start_fuzzy, end_early, end_late, end_fuzzy = min(
+                spans, key=lambda span: _distance(span[0], span[4], target))
+        else:
+            # 「○日まで」は読んだ日から。終了日が読んだ日より前なら終わった告知として扱う
+            start_early = start_late = reference_date
+            start_fuzzy = False
+            explicit_year = bool(g["e_era"] or g["e_year"])
+            try:
+                if g["e_month"]:
+                    end_year = _point_year(g, "e_", reference_date.year)
+                    end_early, end_late, end_fuzzy = _point_range(
+                        end_year, int(g["e_month"]), g["e_day"], g["e_part"])
+                    if end_late < reference_date and not explicit_year:
+                        # 年末に読んだ「1月10日まで」だけは翌年とみなす
+                        end_early, end_late, end_fuzzy = _point_range(
+                            end_year + 1, int(g["e_month"]), g["e_day"], g["e_part"])
+                        if (end_late - reference_date).days > NEW_YEAR_WRAP_DAYS:
+                            continue
+                else:
+                    end_early = end_late = date(reference_date.year, reference_date.month, int(g["e_day_only"]))
+                    end_fuzzy = False
+            except ValueError:
+                continue
+            if end_late < reference_date:
+                continue
+
+        if end_late < start_early or (end_late - start_early).days > MAX_PERIOD_DAYS:
+            continue
+
+        lower, upper = locator.bounds(match.start(), match.end())
+        keyword, kind = governing_keyword(text, hits, match.start(), match.end(), lower, upper)
+
+        # あいまいな端点（旬）はその範囲を確実な区間から除く
+        certain_start = start_late + timedelta(days=1) if start_fuzzy else start_early
+        certain_end = end_early - timedelta(days=1) if end_fuzzy else end_late
+
+        confidence = BASE_CONFIDENCE - FUZZY_PENALTY * (start_fuzzy + end_fuzzy)
+        if g["tentative"]:
+            confidence -= TENTATIVE_PENALTY
+        if not has_start:
+            confidence -= OPEN_START_PENALTY
+        if kind is None:
+            confidence -= NO_KEYWORD_PENALTY
+
+        periods.append(ClosurePeriod(
+            start=start_early,
+            end=end_late,
+            certain_start=certain_start,
+            certain_end=certain_end,
+            confidence=round(max(confidence, 0.0), 2),
+            text=match.group().strip(),
+            sentence=text[lower:upper].strip(),
+            keyword=keyword,
+            keyword_kind=kind,
+        ))
+
+    return periods
+
+
+def find_closure_period(text: str, target: date, reference_date: Optional[date] = None,
+                        hits: Optional[KeywordHits] = None) -> Optional[ClosurePeriod]:
+    """対象日を含む休館期間のうち最も信頼度の高いもの（reference_date の既定値は今日）"""
+    best = None
+    best_confidence = 0.0
+    for period in parse_periods(text, reference_date or date.today(), hits, target):
+        if period.keyword_kind != "closure":
+            continue
+        confidence = period.confidence_for(target)
+        if confidence > best_confidence:
+            best, best_confidence = period, confidence
+    return best
+
@@ -0,0 +1,202 @@
+"""Bedrockプロンプトキャッシュ
+
+静的なシステムプロンプトにキャッシュのチェックポイント（cache_control）を付けて送信し、
+応答の usage からキャッシュのヒット・ミスを集計する。
+BEDROCK_STUB=1 のときはオフライン検証用のスタブクライアントを使う。
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# Bedrockのキャッシュ有効期間（最後の利用から5分）
+CACHE_TTL_SECONDS = 300
+
+# スタブのストリーミング応答の1イベントあたりの文字数
+STREAM_CHUNK_CHARS = 8
+
+
+# キャッシュできるプレフィックスの最小トークン数（これより短いチェックポイントは無視される）
+CACHE_MIN_TOKENS = 1024
+CACHE_MIN_TOKENS_BY_MODEL = {
+    "haiku": 2048,
+}
+
+
+def cache_min_tokens(model_id: str) -> int:
+    """モデルごとのキャッシュの最小トークン数"""
+    lowered = model_id.lower()
+    for marker, tokens in CACHE_MIN_TOKENS_BY_MODEL.items():
+        if marker in lowered:
+            return tokens
+    return CACHE_MIN_TOKENS
+
+
+def estimate_prefix_tokens(text: str) -> int:
+    """キャッシュできるかの判定用の控えめな見積もり（英数字4文字・それ以外2文字で1トークン）"""
+    ascii_chars = sum(1 for char in text if char.isascii())
+    return ascii_chars // 4 + (len(text) - ascii_chars) // 2
+
+
+def cached_system_blocks(*static_texts: str, min_tokens: int = CACHE_MIN_TOKENS) -> List[Dict[str, Any]]:
+    """静的テキストをシステムブロックにし、末尾にキャッシュのチェックポイントを置く
+
+    合計が min_tokens に届かなければチェックポイントは置かない（キャッシュされないため）。
+    """
+    blocks = [{"type": "text", "text": text} for text in static_texts if text]
+    if blocks and estimate_prefix_tokens("".join(block["text"] for block in blocks)) >= min_tokens:
+        blocks[-1]["cache_control"] = {"type": "ephemeral"}
+    return blocks
+
+
+class PromptCacheStats:
+    """キャッシュのヒット・ミス集計"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.uncached = 0
+        self.cache_read_tokens = 0
+        self.cache_write_tokens = 0
+        self.input_tokens = 0
+
+    def record(self, usage: Optional[Dict[str, Any]]) -> None:
+        """InvokeModel（snake_case）・Converse（camelCase）どちらの usage にも対応"""
+        if not usage:
+            return
+        read = usage.get("cache_read_input_tokens", usage.get("cacheReadInputTokens", 0)) or 0
+        write = usage.get("cache_creation_input_tokens", usage.get("cacheWriteInputTokens", 0)) or 0
+        inputs = usage.get("input_tokens", usage.get("inputTokens", 0)) or 0
+        with self._lock:
+            if read:
+                self.hits += 1
+            elif write:
+                self.misses += 1
+            else:
+                self.uncached += 1
+            self.cache_read_tokens += read
+            self.cache_write_tokens += write
+            self.input_tokens += inputs
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "uncached": self.uncached,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "cache_read_tokens": self.cache_read_tokens,
+                "cache_write_tokens": self.cache_write_tokens,
+                "input_tokens": self.input_tokens,
+            }
+
+
+# プロセス全体の集計
+prompt_cache_stats = PromptCacheStats()
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 2)
+
+
+class StubBedrockClient:
+    """オフライン検証用の bedrock-runtime スタブ
+
+    cache_control 付きブロックまでのプレフィックスを記憶し、
+    実際のBedrockと同じ形式の usage（キャッシュ読み書きトークン数）を返す。
+    プレフィックスがモデルの最小トークン数に満たなければ、Bedrockと同じくキャッシュしない。
+    """
+
+    def __init__(self, reply: str = '{"is_closed": false, "reason": "", "confidence": 0.5}'):
+        self.reply = reply
+        self.cache: Dict[str, float] = {}
+        self.calls: List[Dict[str, Any]] = []
+
+    def _usage(self, modelId: str, request: Dict[str, Any]) -> Dict[str, int]:
+        system = request.get("system", "")
+        blocks = system if isinstance(system, list) else [{"type": "text", "text": system}]
+        prefix, cached_text, tail_text = "", "", ""
+        for block in blocks:
+            prefix += block.get("text", "")
+            if block.get("cache_control"):
+                cached_text, tail_text = prefix, ""
+            else:
+                tail_text += block.get("text", "")
+        message_text = json.dumps(request.get("messages", []), ensure_ascii=False)
+
+        if cached_text and estimate_prefix_tokens(cached_text) < cache_min_tokens(modelId):
+            # 最小トークン数に満たないチェックポイントは無視され、全体が通常の入力になる
+            cached_text = ""
+        uncached_text = tail_text if cached_text else prefix
+
+        usage = {"input_tokens": _estimate_tokens(uncached_text + message_text),
+                 "cache_read_input_tokens": 0, "cache_creation_input_tokens": 0}
+        if cached_text:
+            key = hashlib.sha256(f"{modelId}:{cached_text}".encode('utf-8')).hexdigest()
+            now = time.time()
+            if now - self.cache.get(key, 0) <= CACHE_TTL_SECONDS:
+                usage["cache_read_input_tokens"] = _estimate_tokens(cached_text)
+            else:
+                usage["cache_creation_input_tokens"] = _estimate_tokens(cached_text)
+            self.cache[key] = now
+        return usage
+
+    def invoke_model(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        request = json.loads(body)
+        self.calls.append({"modelId": modelId, "body": request})
+
+        payload = {
+            "content": [{"type": "text", "text": self.reply}],
+            "usage": self._usage(modelId, request),
+            "stop_reason": "end_turn",
+        }
+        return {"body": io.BytesIO(json.dumps(payload).encode('utf-8'))}
+
+    def invoke_model_with_response_stream(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        """応答を STREAM_CHUNK_CHARS 文字ずつのイベントで返す"""
+        request = json.loads(body)
+        self.calls.append({"modelId": modelId, "body": request, "stream": True})
+
+        events = [{"type": "message_start", "message": {"usage": self._usage(modelId, request)}},
+                  {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}}]
+        for i in range(0, len(self.reply), STREAM_CHUNK_CHARS):
+            events.append({"type": "content_block_delta", "index": 0,
+                           "delta": {"type": "text_delta", "text": self.reply[i:i + STREAM_CHUNK_CHARS]}})
+        events.extend([{"type": "content_block_stop", "index": 0},
+                       {"type": "message_delta", "delta": {"stop_reason": "end_turn"},
+                        "usage": {"output_tokens": _estimate_tokens(self.reply)}},
+                       {"type": "message_stop"}])
+        return {"body": ({"chunk": {"bytes": json.dumps(event).encode('utf-8')}} for event in events)}
+
+
+def create_bedrock_client(region: str, max_connections: int = 10, read_timeout: float = 60.0):
+    """bedrock-runtime クライアント（BEDROCK_STUB=1 ならスタブ）
+
+    再試行は model_invoker が予算内で行うため、SDK 側の再試行は無効にする。
+    read_timeout は model_invoker が締め切りまでの残り時間に合わせて選ぶ。
+    """
+    if os.environ.get("BEDROCK_STUB") == "1":
+        return StubBedrockClient()
+    # boto3 の読み込みは重いため初回利用時まで遅延させる
+    import boto3
+    from botocore.config import Config
+    return boto3.client('bedrock-runtime', region_name=region, config=Config(
+        max_pool_connections=max_connections, retries={'total_max_attempts': 1}, read_timeout=read_timeout
+    ))
+
+
+def cached_request_body(system_blocks: List[Dict[str, Any]], messages: List[Dict[str, Any]],
+                        **params) -> Dict[str, Any]:
+    """キャッシュ付きシステムブロックを含む InvokeModel のリクエスト本文"""
+    body = {
+        "anthropic_version": "bedrock-2023-05-31",
+        "system": system_blocks,
+        "messages": messages,
+    }
+    body.update(params)
+    return body
@@ -0,0 +1,156 @@
+"""AI解析プロンプト用のコンテキスト構築
+
+ページテキストを段落単位に分割し、休館キーワード・対象日付への近さ・情報源の優先度で
+スコアを付けて、上位の段落だけをトークン予算内に詰める。
+"""
+import re
+from datetime import date
+from typing import List, Tuple
+
+from closure_patterns import (
+    CLOSURE_KEYWORDS, OPEN_KEYWORDS, SPECIAL_CLOSURE_KEYWORDS, WEEKDAY_JP, closure_scanner
+)
+from date_index import extract_date_mentions
+from period_parser import parse_periods
+
+# 段落の最大文字数
+PASSAGE_MAX_CHARS = 160
+
+# 「--- URL ---」形式の区切り行（_scrape_multiple_pages が付与）
+SECTION_HEADER_PATTERN = re.compile(r'^--- (.+?) ---$', re.MULTILINE)
+SPECIAL_RESULT_SOURCE = "特殊解析結果"
+MAIN_SOURCE = "メインページ"
+
+# 情報源ごとの優先度
+SOURCE_PRIORITY = {
+    SPECIAL_RESULT_SOURCE: 2.0,
+    MAIN_SOURCE: 1.0,
+}
+DEFAULT_SOURCE_PRIORITY = 0.8
+
+# キーワードの重み
+KEYWORD_WEIGHTS = {keyword: 3.0 for keyword in CLOSURE_KEYWORDS}
+KEYWORD_WEIGHTS.update({keyword: 2.0 for keyword in SPECIAL_CLOSURE_KEYWORDS})
+KEYWORD_WEIGHTS.update({keyword: 1.0 for keyword in OPEN_KEYWORDS})
+KEYWORD_WEIGHTS.update({"休館日": 3.0, "臨時休館日": 4.0, "臨時開館日": 4.0, "全館休館": 4.0})
+
+# 日付言及の重み（対象日を含む / 7日以内 / 31日以内）
+DATE_HIT_WEIGHT = 8.0
+DATE_NEAR_WEIGHT = 3.0
+DATE_MONTH_WEIGHT = 1.0
+WEEKDAY_WEIGHT = 1.0
+
+
+class Passage:
+    """プロンプト候補の段落"""
+    __slots__ = ("text", "source", "order", "score")
+
+    def __init__(self, text: str, source: str, order: int, score: float = 0.0):
+        self.text = text
+        self.source = source
+        self.order = order
+        self.score = score
+
+
+def estimate_tokens(text: str) -> int:
+    """トークン数の概算（英数字は4文字で1トークン、日本語は1文字1トークン）"""
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (len(text) - ascii_chars) + ascii_chars // 4 + 1
+
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """結合テキストを (情報源, 本文) に分割"""
+    sections = []
+    last_source, last_end = MAIN_SOURCE, 0
+    for match in SECTION_HEADER_PATTERN.finditer(text):
+        sections.append((last_source, text[last_end:match.start()]))
+        last_source, last_end = match.group(1), match.end()
+    sections.append((last_source, text[last_end:]))
+    return [(source, body.strip()) for source, body in sections if body.strip()]
+
+
+def split_passages(text: str, source: str, start_order: int = 0) -> List[Passage]:
+    """行をまとめて PASSAGE_MAX_CHARS 以内の段落に分割"""
+    passages = []
+    buffer: List[str] = []
+    length = 0
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        if buffer and length + len(line) > PASSAGE_MAX_CHARS:
+            passages.append(Passage('\n'.join(buffer), source, start_order + len(passages)))
+            buffer, length = [], 0
+        # 1行が長すぎる場合は分割
+        while len(line) > PASSAGE_MAX_CHARS:
+            passages.append(Passage(line[:PASSAGE_MAX_CHARS], source, start_order + len(passages)))
+            line = line[PASSAGE_MAX_CHARS:]
+        buffer.append(line)
+        length += len(line)
+    if buffer:
+        passages.append(Passage('\n'.join(buffer), source, start_order + len(passages)))
+    return passages
+
+
+def score_passage(passage: Passage, target: date) -> float:
+    """段落のスコア"""
+    text = passage.text
+    hits = closure_scanner.scan(text)
+    score = sum(weight for keyword, weight in KEYWORD_WEIGHTS.items() if hits.has(keyword))
+
+    date_score = 0.0
+    for mention in extract_date_mentions(text, target.year, hits):
+        if mention.start_date <= target <= mention.end_date:
+            date_score = max(date_score, DATE_HIT_WEIGHT)
+            break
+        distance = min(abs((mention.start_date - target).days), abs((mention.end_date - target).days))
+        if distance <= 7:
+            date_score = max(date_score, DATE_NEAR_WEIGHT)
+        elif distance <= 31:
+            date_score = max(date_score, DATE_MONTH_WEIGHT)
+    if date_score < DATE_HIT_WEIGHT:
+        for period in parse_periods(text, date.today(), hits, target):
+            if period.start <= target <= period.end:
+                date_score = DATE_HIT_WEIGHT
+                break
+    score += date_score
+
+    if hits.has(WEEKDAY_JP[target.weekday()]):
+        score += WEEKDAY_WEIGHT
+
+    return score * SOURCE_PRIORITY.get(passage.source, DEFAULT_SOURCE_PRIORITY)
+
+
+def build_prompt_context(text: str, target: date, token_budget: int) -> str:
+    """スコア上位の段落をトークン予算内で選び、元の順序で連結"""
+    passages: List[Passage] = []
+    for source, body in split_sections(text):
+        passages.extend(split_passages(body, source, len(passages)))
+
+    for passage in passages:
+        passage.score = score_passage(passage, target)
+
+    ranked = [p for p in passages if p.score > 0]
+    ranked.sort(key=lambda p: (-p.score, p.order))
+    # 関連する段落がなければ先頭から詰める
+    if not ranked:
+        ranked = passages
+
+    selected = []
+    used = 0
+    for passage in ranked:
+        cost = estimate_tokens(passage.text)
+        if used + cost > token_budget:
+            continue
+        selected.append(passage)
+        used += cost
+
+    selected.sort(key=lambda p: p.order)
+    lines = []
+    current_source = None
+    for passage in selected:
+        if passage.source != current_source:
+            lines.append(f"--- {passage.source} ---")
+            current_source = passage.source
+        lines.append(passage.text)
+    return '\n'.join(lines)
@@ -0,0 +1,172 @@
+"""
+Shared token-bucket stores for the rate limiter
+
+Every Lambda instance or AgentCore container sees the same buckets, so the
+per-IP and global limits hold across the whole deployment. A store applies
+check and record for all requested buckets atomically in one round trip:
+either every bucket has enough tokens and all are charged, or none is.
+
+RATE_LIMIT_REDIS_URL selects the Redis (Lua script) store; RATE_LIMIT_STORE_PATH
+selects the SQLite stand-in, which multiple local processes can share.
+"""
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+
+# (key, capacity, refill tokens per second)
+BucketSpec = Tuple[str, int, float]
+
+# Timeout for a store round trip; a slow store must not stall requests
+STORE_TIMEOUT_SECONDS = 0.1
+
+# Redis token buckets: read and refill every bucket, then charge all or none.
+# The server clock is used so that instance clock skew does not matter.
+CONSUME_SCRIPT = """
+local cost = tonumber(ARGV[1])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local tokens = {}
+local allowed = 1
+for i = 1, #KEYS do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1])
+    local bucket = redis.call('HMGET', KEYS[i], 't', 'u')
+    local available = capacity
+    if bucket[1] then
+        available = math.min(capacity, tonumber(bucket[1]) + math.max(0, now - tonumber(bucket[2])) * rate)
+    end
+    tokens[i] = available
+    if available < cost then
+        allowed = 0
+    end
+end
+local result = {allowed}
+for i = 1, #KEYS do
+    if allowed == 1 then
+        local capacity = tonumber(ARGV[i * 2])
+        local rate = tonumber(ARGV[i * 2 + 1])
+        redis.call('HSET', KEYS[i], 't', tostring(tokens[i] - cost), 'u', tostring(now))
+        redis.call('EXPIRE', KEYS[i], math.ceil(capacity / rate) + 1)
+    end
+    result[i + 1] = tostring(tokens[i])
+end
+return result
+"""
+
+
+def refill(tokens: float, updated_at: float, capacity: int, rate: float, now: float) -> float:
+    """Tokens available after refilling since the last update"""
+    return min(capacity, tokens + max(0.0, now - updated_at) * rate)
+
+
+class RedisBucketStore:
+    """Token buckets in Redis, one EVALSHA per request"""
+
+    def __init__(self, url: str, prefix: str = 'kzpass:rl:'):
+        self.url = url
+        self.prefix = prefix
+        self._script = None
+
+    @property
+    def script(self):
+        if self._script is None:
+            # redis is only needed when this store is configured
+            import redis
+            client = redis.Redis.from_url(
+                self.url, socket_timeout=STORE_TIMEOUT_SECONDS, socket_connect_timeout=STORE_TIMEOUT_SECONDS
+            )
+            self._script = client.register_script(CONSUME_SCRIPT)
+        return self._script
+
+    def consume(self, buckets: List[BucketSpec], cost: int) -> Tuple[bool, List[float]]:
+        """
+        Charge cost to every bucket if all of them have enough tokens
+
+        Args:
+            buckets: Buckets to check and charge
+            cost: Tokens per bucket
+
+        Returns:
+            Tuple of (allowed, tokens available in each bucket before charging)
+        """
+        args = [cost]
+        for _, capacity, rate in buckets:
+            args.extend([capacity, rate])
+        result = self.script(keys=[self.prefix + key for key, _, _ in buckets], args=args)
+        return bool(int(result[0])), [float(tokens) for tokens in result[1:]]
+
+
+class SQLiteBucketStore:
+    """Token buckets in a SQLite file (local stand-in shared by processes on one host)"""
+
+    # Purge expired buckets once every this many calls
+    PURGE_INTERVAL = 1000
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._calls = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=STORE_TIMEOUT_SECONDS,
+                                         isolation_level=None, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets "
+                "(key TEXT PRIMARY KEY, tokens REAL, updated_at REAL, expires_at REAL)"
+            )
+        return self._conn
+
+    def consume(self, buckets: List[BucketSpec], cost: int) -> Tuple[bool, List[float]]:
+        """
+        Charge cost to every bucket if all of them have enough tokens
+
+        Args:
+            buckets: Buckets to check and charge
+            cost: Tokens per bucket
+
+        Returns:
+            Tuple of (allowed, tokens available in each bucket before charging)
+        """
+        with self._lock:
+            conn = self._connection()
+            now = time.time()
+            # One write transaction: concurrent processes serialize on the database lock
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                tokens = []
+                for key, capacity, rate in buckets:
+                    row = conn.execute("SELECT tokens, updated_at FROM buckets WHERE key = ?", (key,)).fetchone()
+                    tokens.append(capacity if row is None else refill(row[0], row[1], capacity, rate, now))
+
+                allowed = all(available >= cost for available in tokens)
+                if allowed:
+                    for (key, capacity, rate), available in zip(buckets, tokens):
+                        conn.execute(
+                            "INSERT OR REPLACE INTO buckets (key, tokens, updated_at, expires_at) VALUES (?, ?, ?, ?)",
+                            (key, available - cost, now, now + math.ceil(capacity / rate) + 1)
+                        )
+
+                self._calls += 1
+                if self._calls % self.PURGE_INTERVAL == 0:
+                    conn.execute("DELETE FROM buckets WHERE expires_at <= ?", (now,))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return allowed, tokens
+
+
+def create_bucket_store():
+    """Shared store from the environment, or None for in-process buckets only"""
+    redis_url = os.getenv('RATE_LIMIT_REDIS_URL', '')
+    if redis_url:
+        return RedisBucketStore(redis_url)
+    store_path = os.getenv('RATE_LIMIT_STORE_PATH', '')
+    if store_path:
+        return SQLiteBucketStore(store_path)
+    return None
@@ -2,12 +2,27 @@
 Advanced Rate Limiting for Kanazawa Cultural Facility Agent Demo
 Implements multiple rate limiting strategies to prevent abuse
 """
+import logging
+import math
+import threading
 import time
-import hashlib
 from typing import Dict, Tuple, Optional
 from dataclasses import dataclass
 from enum import Enum
 
+from rate_limit_store import create_bucket_store
+
+logger = logging.getLogger(__name__)
+
+# After a shared store error, use local buckets for this long before retrying the store
+STORE_RETRY_SECONDS = 30
+
+# Request cost weights: facility-day lookups per token, multiplier when the agent (Bedrock)
+# is needed, and a cap that stays below the per-IP capacity so heavy queries remain admissible
+FACILITY_DAYS_PER_TOKEN = 6
+AGENT_COST_MULTIPLIER = 2
+MAX_REQUEST_COST = 10
+
 class RateLimitType(Enum):
     """Rate limit types"""
     PER_IP = "per_ip"
@@ -25,21 +40,92 @@ class RateLimitRule:
 class RateLimitResult:
     """Rate limit check result"""
     def __init__(self, allowed: bool, remaining: int = 0, reset_time: float = 0, 
-                 retry_after: int = 0, message: str = ""):
+                 retry_after: int = 0, message: str = "", cost: int = 1):
         self.allowed = allowed
         self.remaining = remaining
         self.reset_time = reset_time
         self.retry_after = retry_after
         self.message = message
+        self.cost = cost
+
+class TokenBucket:
+    """Per-client token bucket record"""
+    __slots__ = ('tokens', 'updated_at', 'slot')
+    
+    def __init__(self, tokens: float, updated_at: float):
+        self.tokens = tokens
+        self.updated_at = updated_at
+        self.slot = -1  # Expiry wheel slot (-1: not scheduled)
+
+class ExpiryWheel:
+    """
+    Timing wheel that drops buckets once they have refilled completely
+    
+    A full bucket behaves exactly like a missing one, so it can be forgotten.
+    Each bucket sits in the slot of the second it becomes full; advancing the
+    wheel only visits the slots that elapsed since the previous call.
+    """
+    
+    def __init__(self, horizon_seconds: float, resolution: float = 1.0):
+        self.resolution = resolution
+        self.size = int(math.ceil(horizon_seconds / resolution)) + 2
+        self.slots = [set() for _ in range(self.size)]
+        self.current_tick: Optional[int] = None
+    
+    def schedule(self, key: str, bucket: TokenBucket, due: float) -> None:
+        """Move a bucket to the slot of its due time (clamped to the wheel span)"""
+        tick = int(due // self.resolution)
+        if self.current_tick is not None:
+            tick = min(max(tick, self.current_tick + 1), self.current_tick + self.size - 1)
+        slot = tick % self.size
+        if bucket.slot != slot:
+            if bucket.slot >= 0:
+                self.slots[bucket.slot].discard(key)
+            self.slots[slot].add(key)
+            bucket.slot = slot
+    
+    def advance(self, now: float, buckets: Dict[str, TokenBucket], due_time) -> None:
+        """Expire the buckets in the slots that elapsed up to now"""
+        tick = int(now // self.resolution)
+        previous_tick = self.current_tick
+        self.current_tick = tick
+        if previous_tick is None:
+            return
+        for step in range(1, min(tick - previous_tick, self.size) + 1):
+            slot = (previous_tick + step) % self.size
+            keys = self.slots[slot]
+            if not keys:
+                continue
+            self.slots[slot] = set()
+            for key in keys:
+                bucket = buckets.get(key)
+                if bucket is None:
+                    continue
+                bucket.slot = -1
+                due = due_time(bucket)
+                if due <= now:
+                    del buckets[key]
+                else:
+                    # Clamped or a later lap of the wheel: keep it scheduled
+                    self.schedule(key, bucket, due)
 
 class AdvancedRateLimiter:
-    """Advanced rate limiter with multiple strategies"""
+    """
+    Advanced rate limiter with multiple strategies
     
-    def __init__(self):
-        # In-memory storage for demo (use Redis/DynamoDB in production)
-        self.request_counts: Dict[str, Tuple[int, float, int]] = {}  # key: (count, window_start, burst_used)
-        self.global_count = 0
-        self.global_window_start = time.time()
+    Token buckets per limit type: capacity is max_requests + burst_allowance and
+    tokens refill at max_requests per window. Checks and records are O(1); idle
+    clients are dropped by an expiry wheel instead of scanning every key.
+    With a shared store, acquire() charges the store's buckets so the limits
+    hold across instances, and falls back to the local buckets if it fails.
+    """
+    
+    def __init__(self, clock=time.time, store=None):
+        # In-process buckets; the shared store (if any) takes precedence in acquire()
+        self.clock = clock
+        self.store = store
+        self._store_retry_at = 0.0
+        self._lock = threading.Lock()
         
         # Rate limit rules
         self.rules = {
@@ -56,170 +142,178 @@ class AdvancedRateLimiter:
                 burst_allowance=20
             )
         }
+        self._buckets: Dict[RateLimitType, Dict[str, TokenBucket]] = {
+            limit_type: {} for limit_type in self.rules
+        }
+        self._wheels: Dict[RateLimitType, ExpiryWheel] = {
+            limit_type: ExpiryWheel(self._capacity(rule) / self._refill_rate(rule))
+            for limit_type, rule in self.rules.items()
+        }
     
-    def check_rate_limit(self, identifier: str, limit_type: RateLimitType = RateLimitType.PER_IP) -> RateLimitResult:
+    @staticmethod
+    def _capacity(rule: RateLimitRule) -> int:
+        return rule.max_requests + rule.burst_allowance
+    
+    @staticmethod
+    def _refill_rate(rule: RateLimitRule) -> float:
+        """Tokens per second"""
+        return rule.max_requests / rule.window_seconds
+    
+    def _tokens(self, bucket: Optional[TokenBucket], rule: RateLimitRule, current_time: float) -> float:
+        """Tokens available now (a missing bucket is full)"""
+        capacity = self._capacity(rule)
+        if bucket is None:
+            return capacity
+        elapsed = max(0.0, current_time - bucket.updated_at)
+        return min(capacity, bucket.tokens + elapsed * self._refill_rate(rule))
+    
+    def check_rate_limit(self, identifier: str, limit_type: RateLimitType = RateLimitType.PER_IP,
+                         cost: int = 1) -> RateLimitResult:
         """
         Check if request is within rate limits
         
         Args:
             identifier: Client identifier (IP, user ID, etc.)
             limit_type: Type of rate limit to check
+            cost: Number of requests this call counts as (batch size)
             
         Returns:
             RateLimitResult with decision and metadata
         """
-        current_time = time.time()
         rule = self.rules.get(limit_type)
         
         if not rule:
             return RateLimitResult(allowed=True, message="No rate limit rule found")
         
-        # Clean up old entries
-        self._cleanup_old_entries(current_time)
+        with self._lock:
+            current_time = self.clock()
+            buckets = self._buckets[limit_type]
+            # Amortized expiry: only the wheel slots that elapsed since the last call
+            self._wheels[limit_type].advance(current_time, buckets, lambda bucket: self._due_time(bucket, rule))
+            tokens = self._tokens(buckets.get(identifier), rule, current_time)
         
-        if limit_type == RateLimitType.GLOBAL:
-            return self._check_global_limit(current_time, rule)
-        else:
-            return self._check_identifier_limit(identifier, current_time, rule)
+        return self._build_result(limit_type, rule, tokens, cost, current_time)
     
-    def record_request(self, identifier: str, limit_type: RateLimitType = RateLimitType.PER_IP) -> None:
+    def _build_result(self, limit_type: RateLimitType, rule: RateLimitRule, tokens: float,
+                      cost: int, current_time: float) -> RateLimitResult:
+        """Decision for a request of the given cost against the available tokens"""
+        capacity = self._capacity(rule)
+        refill_rate = self._refill_rate(rule)
+        if cost > capacity:
+            return RateLimitResult(
+                allowed=False,
+                remaining=int(tokens),
+                reset_time=current_time + (capacity - tokens) / refill_rate,
+                retry_after=rule.window_seconds,
+                message=f"Batch of {cost} requests exceeds the limit of {capacity} per {rule.window_seconds} seconds.",
+                cost=cost
+            )
+        
+        if tokens < cost:
+            retry_after = int(math.ceil((cost - tokens) / refill_rate))
+            prefix = "Global rate limit" if limit_type == RateLimitType.GLOBAL else "Rate limit"
+            return RateLimitResult(
+                allowed=False,
+                remaining=0,
+                reset_time=current_time + (capacity - tokens) / refill_rate,
+                retry_after=retry_after,
+                message=f"{prefix} exceeded. Try again in {retry_after} seconds.",
+                cost=cost
+            )
+        
+        return RateLimitResult(
+            allowed=True,
+            remaining=int(tokens - cost),
+            reset_time=current_time + (capacity - tokens + cost) / refill_rate,
+            message="Request allowed",
+            cost=cost
+        )
+    
+    def record_request(self, identifier: str, limit_type: RateLimitType = RateLimitType.PER_IP,
+                       cost: int = 1) -> None:
         """
         Record a request for rate limiting
         
         Args:
             identifier: Client identifier
             limit_type: Type of rate limit
+            cost: Number of requests this call counts as (batch size)
         """
-        current_time = time.time()
+        rule = self.rules.get(limit_type)
+        if not rule:
+            return
         
-        if limit_type == RateLimitType.GLOBAL:
-            self._record_global_request(current_time)
-        else:
-            self._record_identifier_request(identifier, current_time)
+        with self._lock:
+            current_time = self.clock()
+            self._charge(identifier, limit_type, rule, cost, current_time)
     
-    def _check_identifier_limit(self, identifier: str, current_time: float, rule: RateLimitRule) -> RateLimitResult:
-        """Check rate limit for specific identifier"""
-        key = self._get_cache_key(identifier, rule.limit_type)
-        
-        if key in self.request_counts:
-            count, window_start, burst_used = self.request_counts[key]
-            
-            # Check if we're in the same window
-            if current_time - window_start < rule.window_seconds:
-                total_allowed = rule.max_requests + rule.burst_allowance
-                
-                if count >= total_allowed:
-                    retry_after = int(rule.window_seconds - (current_time - window_start)) + 1
-                    return RateLimitResult(
-                        allowed=False,
-                        remaining=0,
-                        reset_time=window_start + rule.window_seconds,
-                        retry_after=retry_after,
-                        message=f"Rate limit exceeded. Try again in {retry_after} seconds."
-                    )
-                
-                remaining = total_allowed - count
-                return RateLimitResult(
-                    allowed=True,
-                    remaining=remaining,
-                    reset_time=window_start + rule.window_seconds,
-                    message="Request allowed"
-                )
-        
-        # First request or new window
-        return RateLimitResult(
-            allowed=True,
-            remaining=rule.max_requests + rule.burst_allowance - 1,
-            reset_time=current_time + rule.window_seconds,
-            message="Request allowed"
-        )
+    def _charge(self, identifier: str, limit_type: RateLimitType, rule: RateLimitRule,
+                cost: int, current_time: float) -> None:
+        """Take cost tokens from a local bucket (caller holds the lock)"""
+        buckets = self._buckets[limit_type]
+        bucket = buckets.get(identifier)
+        tokens = self._tokens(bucket, rule, current_time)
+        if bucket is None:
+            bucket = buckets[identifier] = TokenBucket(tokens, current_time)
+        bucket.tokens = tokens - cost
+        bucket.updated_at = current_time
+        self._wheels[limit_type].schedule(identifier, bucket, self._due_time(bucket, rule))
     
-    def _check_global_limit(self, current_time: float, rule: RateLimitRule) -> RateLimitResult:
-        """Check global rate limit"""
-        if current_time - self.global_window_start < rule.window_seconds:
-            total_allowed = rule.max_requests + rule.burst_allowance
-            
-            if self.global_count >= total_allowed:
-                retry_after = int(rule.window_seconds - (current_time - self.global_window_start)) + 1
-                return RateLimitResult(
-                    allowed=False,
-                    remaining=0,
-                    reset_time=self.global_window_start + rule.window_seconds,
-                    retry_after=retry_after,
-                    message=f"Global rate limit exceeded. Try again in {retry_after} seconds."
-                )
+    def acquire(self, identifier: str, cost: int = 1) -> Tuple[RateLimitResult, RateLimitType]:
+        """
+        Check and record the per-IP and global limits in one step
+        
+        Args:
+            identifier: Client identifier
+            cost: Number of requests this call counts as (batch size)
             
-            remaining = total_allowed - self.global_count
-            return RateLimitResult(
-                allowed=True,
-                remaining=remaining,
-                reset_time=self.global_window_start + rule.window_seconds,
-                message="Request allowed"
-            )
+        Returns:
+            Tuple of (result, limit type the result applies to). Nothing is
+            charged unless both limits allow the request.
+        """
+        checks = [(identifier, RateLimitType.PER_IP), ("global", RateLimitType.GLOBAL)]
+        current_time = self.clock()
         
-        # New window
-        return RateLimitResult(
-            allowed=True,
-            remaining=rule.max_requests + rule.burst_allowance - 1,
-            reset_time=current_time + rule.window_seconds,
-            message="Request allowed"
-        )
-    
-    def _record_identifier_request(self, identifier: str, current_time: float) -> None:
-        """Record request for identifier"""
-        rule = self.rules[RateLimitType.PER_IP]
-        key = self._get_cache_key(identifier, rule.limit_type)
+        tokens = None
+        if self.store is not None and current_time >= self._store_retry_at:
+            try:
+                # Single round trip: the store checks and charges all buckets atomically
+                _, tokens = self.store.consume([
+                    (f"{limit_type.value}:{key}", self._capacity(self.rules[limit_type]),
+                     self._refill_rate(self.rules[limit_type]))
+                    for key, limit_type in checks
+                ], cost)
+            except Exception as e:
+                logger.warning(f"Rate limit store unavailable, using local buckets: {e}")
+                self._store_retry_at = current_time + STORE_RETRY_SECONDS
         
-        if key in self.request_counts:
-            count, window_start, burst_used = self.request_counts[key]
-            
-            if current_time - window_start < rule.window_seconds:
-                # Same window - increment count
-                new_burst_used = burst_used
-                if count >= rule.max_requests:
-                    new_burst_used += 1
-                
-                self.request_counts[key] = (count + 1, window_start, new_burst_used)
-            else:
-                # New window
-                self.request_counts[key] = (1, current_time, 0)
-        else:
-            # First request
-            self.request_counts[key] = (1, current_time, 0)
-    
-    def _record_global_request(self, current_time: float) -> None:
-        """Record global request"""
-        rule = self.rules[RateLimitType.GLOBAL]
+        if tokens is None:
+            with self._lock:
+                for limit_type in self._wheels:
+                    self._wheels[limit_type].advance(
+                        current_time, self._buckets[limit_type],
+                        lambda bucket, rule=self.rules[limit_type]: self._due_time(bucket, rule)
+                    )
+                tokens = [self._tokens(self._buckets[limit_type].get(key), self.rules[limit_type], current_time)
+                          for key, limit_type in checks]
+                if all(available >= cost for available in tokens):
+                    for key, limit_type in checks:
+                        self._charge(key, limit_type, self.rules[limit_type], cost, current_time)
         
-        if current_time - self.global_window_start < rule.window_seconds:
-            self.global_count += 1
-        else:
-            # New window
-            self.global_count = 1
-            self.global_window_start = current_time
+        results = [(self._build_result(limit_type, self.rules[limit_type], available, cost, current_time), limit_type)
+                   for (_, limit_type), available in zip(checks, tokens)]
+        for result, limit_type in results:
+            if not result.allowed:
+                return result, limit_type
+        return results[0]
     
-    def _get_cache_key(self, identifier: str, limit_type: RateLimitType) -> str:
-        """Generate cache key for identifier and limit type"""
-        # Hash identifier for privacy and consistent key length
-        hashed_id = hashlib.sha256(identifier.encode()).hexdigest()[:16]
-        return f"{limit_type.value}:{hashed_id}"
+    def _due_time(self, bucket: TokenBucket, rule: RateLimitRule) -> float:
+        """Time at which the bucket is full again and can be dropped"""
+        return bucket.updated_at + (self._capacity(rule) - bucket.tokens) / self._refill_rate(rule)
     
-    def _cleanup_old_entries(self, current_time: float) -> None:
-        """Clean up expired entries to prevent memory leaks"""
-        expired_keys = []
-        
-        for key, (count, window_start, burst_used) in self.request_counts.items():
-            # Determine rule based on key prefix
-            if key.startswith("per_ip:"):
-                rule = self.rules[RateLimitType.PER_IP]
-            else:
-                continue  # Skip unknown types
-            
-            if current_time - window_start >= rule.window_seconds * 2:  # Keep for 2x window
-                expired_keys.append(key)
-        
-        for key in expired_keys:
-            del self.request_counts[key]
+    def tracked_identifiers(self, limit_type: RateLimitType = RateLimitType.PER_IP) -> int:
+        """Number of clients currently holding a (non-full) bucket"""
+        return len(self._buckets.get(limit_type, {}))
     
     def get_rate_limit_headers(self, result: RateLimitResult, rule: RateLimitRule) -> Dict[str, str]:
         """
@@ -235,7 +329,8 @@ class AdvancedRateLimiter:
         headers = {
             'X-RateLimit-Limit': str(rule.max_requests + rule.burst_allowance),
             'X-RateLimit-Remaining': str(result.remaining),
-            'X-RateLimit-Reset': str(int(result.reset_time))
+            'X-RateLimit-Reset': str(int(result.reset_time)),
+            'X-RateLimit-Cost': str(result.cost)
         }
         
         if not result.allowed:
@@ -243,35 +338,38 @@ class AdvancedRateLimiter:
         
         return headers
 
-# Global rate limiter instance
-rate_limiter = AdvancedRateLimiter()
+# Global rate limiter instance (shared store from RATE_LIMIT_REDIS_URL / RATE_LIMIT_STORE_PATH)
+rate_limiter = AdvancedRateLimiter(store=create_bucket_store())
 
-def check_request_rate_limit(client_ip: str) -> Tuple[bool, Dict[str, str], str]:
+def request_cost(facilities: int, days: int, needs_agent: bool) -> int:
+    """
+    Weighted cost of one request from its estimated work
+    
+    Args:
+        facilities: Number of facilities the request covers
+        days: Number of days the request covers
+        needs_agent: Whether the request goes to the agent (Bedrock) instead of the fast path
+        
+    Returns:
+        Tokens to charge: 1 for a single facility and date, capped at MAX_REQUEST_COST
+    """
+    cost = math.ceil(facilities * days / FACILITY_DAYS_PER_TOKEN)
+    if needs_agent:
+        cost *= AGENT_COST_MULTIPLIER
+    return max(1, min(cost, MAX_REQUEST_COST))
+
+def check_request_rate_limit(client_ip: str, cost: int = 1) -> Tuple[bool, Dict[str, str], str]:
     """
     Check rate limits for a request
     
     Args:
         client_ip: Client IP address
+        cost: Tokens this request is charged (see request_cost)
         
     Returns:
         Tuple of (allowed, headers, error_message)
     """
-    # Check per-IP limit
-    ip_result = rate_limiter.check_rate_limit(client_ip, RateLimitType.PER_IP)
-    if not ip_result.allowed:
-        headers = rate_limiter.get_rate_limit_headers(ip_result, rate_limiter.rules[RateLimitType.PER_IP])
-        return False, headers, ip_result.message
-    
-    # Check global limit
-    global_result = rate_limiter.check_rate_limit("global", RateLimitType.GLOBAL)
-    if not global_result.allowed:
-        headers = rate_limiter.get_rate_limit_headers(global_result, rate_limiter.rules[RateLimitType.GLOBAL])
-        return False, headers, global_result.message
-    
-    # Both limits passed - record the request
-    rate_limiter.record_request(client_ip, RateLimitType.PER_IP)
-    rate_limiter.record_request("global", RateLimitType.GLOBAL)
-    
-    # Return success with remaining limits
-    headers = rate_limiter.get_rate_limit_headers(ip_result, rate_limiter.rules[RateLimitType.PER_IP])
-    return True, headers, "Request allowed"
\ No newline at end of file
+    # Per-IP and global limits are checked and recorded together
+    result, limit_type = rate_limiter.acquire(client_ip, cost)
+    headers = rate_limiter.get_rate_limit_headers(result, rate_limiter.rules[limit_type])
+    return result.allowed, headers, result.message
\ No newline at end of file
@@ -0,0 +1,215 @@
+"""正規化した質問をキーにした応答キャッシュ
+
+キーは (言語, 施設の集合, 解決済みの絶対日付, 施設名・日付表現を除いた質問文)。
+同じ内容の質問は言い回しや相対日付の違いがあっても同じキーになる。
+ウォームコンテナ内のメモリ層と、共有ストア（DynamoDB / ローカル用SQLite）の2層構成。
+"""
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from config import (
+    REGION, RESPONSE_CACHE_TTL, RESPONSE_CACHE_MEMORY_ENTRIES, RESPONSE_CACHE_TABLE, RESPONSE_CACHE_PATH
+)
+from fast_path import (
+    _ALIASES, _DATE_PATTERN, _clean_query, find_date_expressions, resolve_date, resolve_facilities
+)
+
+logger = logging.getLogger(__name__)
+
+# 過去の日付の休館状況は変わらないため長めに保持
+PAST_DATE_TTL = 24 * 60 * 60
+
+_PUNCTUATION_PATTERN = re.compile(r'[\s、。，．,.!?！？「」『』()（）・:：;；"\'〜~-]+')
+
+
+def build_cache_key(query: str, language: str, today: Optional[datetime] = None) -> Tuple[str, Dict]:
+    """正規化した質問のキャッシュキーと、その構成要素"""
+    today = today or datetime.now()
+    text = _clean_query(query)
+    facilities = sorted(resolve_facilities(text))
+
+    dates = [resolve_date(expression, today) for expression in find_date_expressions(text)]
+    # 日付の指定がない質問は当日についての質問として扱う
+    resolved_dates = sorted(d for d in dates if d) or [today.strftime("%Y-%m-%d")]
+
+    residual = text.lower()
+    for alias, _ in _ALIASES:
+        residual = residual.replace(alias, " ")
+    residual = _DATE_PATTERN.sub(" ", residual)
+    residual = _PUNCTUATION_PATTERN.sub("", residual)
+
+    parts = {
+        "language": language,
+        "facilities": facilities,
+        "dates": resolved_dates,
+        "text": residual,
+    }
+    key = hashlib.sha256(json.dumps(parts, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+    return key, parts
+
+
+def ttl_for(parts: Dict, today: Optional[datetime] = None) -> int:
+    """有効期限（取得済みページの有効期限に合わせ、過去日付のみ長め）"""
+    today_str = (today or datetime.now()).strftime("%Y-%m-%d")
+    if all(d < today_str for d in parts["dates"]):
+        return PAST_DATE_TTL
+    return RESPONSE_CACHE_TTL
+
+
+class MemoryTier:
+    """ウォームコンテナ内のLRUキャッシュ"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[Dict, float]]:
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value, expires_at
+
+    def put(self, key: str, value: Dict, expires_at: float) -> None:
+        with self._lock:
+            self.entries[key] = (expires_at, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+class SQLiteStore:
+    """共有ストアのローカル代替（単一ファイル）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT, expires_at REAL)"
+            )
+        return self._conn
+
+    def get(self, key: str) -> Optional[Tuple[Dict, float]]:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return json.loads(row[0]), row[1]
+
+    def put(self, key: str, value: Dict, expires_at: float) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires_at)
+            )
+            conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+            conn.commit()
+
+
+class DynamoDBStore:
+    """DynamoDB の共有ストア（テーブルのTTL属性は expires_at）"""
+
+    def __init__(self, table_name: str, region: str):
+        self.table_name = table_name
+        self.region = region
+        self._table = None
+
+    @property
+    def table(self):
+        if self._table is None:
+            import boto3
+            self._table = boto3.resource('dynamodb', region_name=self.region).Table(self.table_name)
+        return self._table
+
+    def get(self, key: str) -> Optional[Tuple[Dict, float]]:
+        item = self.table.get_item(Key={"key": key}).get("Item")
+        if not item or float(item["expires_at"]) <= time.time():
+            return None
+        return json.loads(item["value"]), float(item["expires_at"])
+
+    def put(self, key: str, value: Dict, expires_at: float) -> None:
+        self.table.put_item(Item={
+            "key": key,
+            "value": json.dumps(value, ensure_ascii=False),
+            "expires_at": int(expires_at),
+        })
+
+
+class ResponseCache:
+    """メモリ層 + 共有ストアの応答キャッシュ（バッチのワーカースレッドから並行して使う）"""
+
+    def __init__(self, memory: MemoryTier, shared=None):
+        self.memory = memory
+        self.shared = shared
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[Optional[Dict], Dict]:
+        """(キャッシュ済み応答, メタデータ)"""
+        entry = self.memory.get(key)
+        tier = "memory"
+        if entry is None and self.shared is not None:
+            try:
+                entry = self.shared.get(key)
+                tier = "shared"
+            except Exception as e:
+                logger.warning(f"Response cache read failed: {e}")
+                entry = None
+            if entry is not None:
+                # 共有ストアのヒットはメモリ層にも載せる
+                self.memory.put(key, entry[0], entry[1])
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if entry is None:
+            return None, {"status": "miss"}
+
+        value, expires_at = entry
+        return value, {"status": "hit", "tier": tier, "expires_in": int(expires_at - time.time())}
+
+    def put(self, key: str, value: Dict, ttl: int) -> None:
+        expires_at = time.time() + ttl
+        self.memory.put(key, value, expires_at)
+        if self.shared is not None:
+            try:
+                self.shared.put(key, value, expires_at)
+            except Exception as e:
+                logger.warning(f"Response cache write failed: {e}")
+
+
+def _create_shared_store():
+    if RESPONSE_CACHE_TABLE:
+        return DynamoDBStore(RESPONSE_CACHE_TABLE, REGION)
+    if RESPONSE_CACHE_PATH:
+        return SQLiteStore(RESPONSE_CACHE_PATH)
+    return None
+
+
+# プロセス全体の応答キャッシュ
+response_cache = ResponseCache(MemoryTier(RESPONSE_CACHE_MEMORY_ENTRIES), _create_shared_store())
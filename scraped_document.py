@@ -0,0 +1,111 @@
+"""取得済みページと解析結果のキャッシュ
+
+1回の取得で得たHTMLから、正規化済みテキスト・定型文除去済みテキスト・
+キーワード位置・日付インデックスを必要になった時点で一度だけ計算して保持する。
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from bs4 import BeautifulSoup
+
+from boilerplate import boilerplate_learner
+from closure_patterns import KeywordHits, closure_scanner
+from date_index import DateIndex, build_date_index
+from text_normalizer import normalize_text
+
+
+class ScrapedDocument:
+    """取得済みページ
+
+    DocumentCache を通じて複数スレッドから参照されるため、解析結果の計算はロックの下で1回だけ行う。
+    """
+
+    def __init__(self, url: str, html: str, fetched_at: Optional[float] = None):
+        self.url = url
+        self.html = html
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+        # プロパティが互いを呼ぶため再入可能なロック
+        self._lock = threading.RLock()
+        self._soup = None
+        self._raw_text = None
+        self._text = None
+        self._content_text = None
+        self._hits = None
+        self._date_indexes: Dict[int, DateIndex] = {}
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        with self._lock:
+            if self._soup is None:
+                self._soup = BeautifulSoup(self.html, 'html.parser')
+            return self._soup
+
+    @property
+    def raw_text(self) -> str:
+        """get_text() そのままのテキスト"""
+        with self._lock:
+            if self._raw_text is None:
+                self._raw_text = self.soup.get_text()
+            return self._raw_text
+
+    @property
+    def text(self) -> str:
+        """正規化済みテキスト（パーサー・AIプロンプトはこちらを使う）"""
+        with self._lock:
+            if self._text is None:
+                self._text = normalize_text(self.raw_text)
+            return self._text
+
+    @property
+    def content_text(self) -> str:
+        """ホスト共通の定型文を除いた正規化済みテキスト（汎用の休館判定・AIプロンプト用）"""
+        with self._lock:
+            if self._content_text is None:
+                self._content_text = boilerplate_learner.strip(self.url, self.text)
+            return self._content_text
+
+    @property
+    def keyword_hits(self) -> KeywordHits:
+        """content_text のキーワード位置"""
+        with self._lock:
+            if self._hits is None:
+                self._hits = closure_scanner.scan(self.content_text)
+            return self._hits
+
+    def date_index(self, reference_year: int) -> DateIndex:
+        """content_text の日付インデックス（年の記載がない日付は reference_year として扱う）"""
+        with self._lock:
+            if reference_year not in self._date_indexes:
+                self._date_indexes[reference_year] = build_date_index(
+                    self.content_text, reference_year, self.keyword_hits)
+            return self._date_indexes[reference_year]
+
+
+class DocumentCache:
+    """URL → 取得済みページ（件数上限・有効期限つき、複数スレッドから利用可）"""
+
+    def __init__(self, ttl_seconds: int, max_entries: int = 64):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.documents: "OrderedDict[str, ScrapedDocument]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[ScrapedDocument]:
+        with self._lock:
+            document = self.documents.get(url)
+            if document is None:
+                return None
+            if time.time() - document.fetched_at > self.ttl_seconds:
+                del self.documents[url]
+                return None
+            self.documents.move_to_end(url)
+            return document
+
+    def put(self, document: ScrapedDocument) -> None:
+        with self._lock:
+            self.documents[document.url] = document
+            self.documents.move_to_end(document.url)
+            while len(self.documents) > self.max_entries:
+                self.documents.popitem(last=False)
@@ -0,0 +1,58 @@
+"""agent のエージェントキャッシュ"""
+import threading
+
+from agent import AgentCache, _prompt_cache_options
+
+
+class SlowBuildCache(AgentCache):
+    """構築をイベントで止められるキャッシュ"""
+
+    def __init__(self, max_agents: int):
+        super().__init__(max_agents)
+        self.release = {}
+        self.builds = []
+
+    def _build(self, session_id, actor_id):
+        self.builds.append(session_id)
+        self.release.setdefault(session_id, threading.Event()).wait(5)
+        return (object(), threading.Lock(), False)
+
+
+def test_cold_build_does_not_block_other_sessions():
+    cache = SlowBuildCache(max_agents=4)
+    cache.release["slow"] = threading.Event()
+    slow = threading.Thread(target=cache.get, args=("slow", "user"))
+    slow.start()
+    cache.release["fast"] = threading.Event()
+    cache.release["fast"].set()
+    assert cache.get("fast", "user") is not None
+    assert slow.is_alive()
+    cache.release["slow"].set()
+    slow.join(5)
+
+
+def test_concurrent_gets_for_one_session_build_once():
+    cache = SlowBuildCache(max_agents=4)
+    cache.release["s"] = threading.Event()
+    entries = []
+    threads = [threading.Thread(target=lambda: entries.append(cache.get("s", "user"))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    cache.release["s"].set()
+    for thread in threads:
+        thread.join(5)
+    assert cache.builds == ["s"]
+    assert len({id(entry) for entry in entries}) == 1
+
+
+def test_prompt_cache_options_follow_the_model_config():
+    class CurrentModel:
+        class BedrockConfig:
+            __annotations__ = {"model_id": str, "cache_prompt": str, "cache_tools": str}
+
+    class OldModel:
+        class BedrockConfig:
+            __annotations__ = {"model_id": str}
+
+    assert _prompt_cache_options(CurrentModel) == {"cache_prompt": "default", "cache_tools": "default"}
+    assert _prompt_cache_options(OldModel) == {}
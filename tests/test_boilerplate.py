@@ -0,0 +1,34 @@
+"""boilerplate の定型文の学習と保存"""
+import boilerplate
+from boilerplate import BoilerplateLearner, FileTemplateStore
+
+NAVIGATION = ["ホーム", "アクセス", "お問い合わせ"]
+
+
+def page(body: str) -> str:
+    return "\n".join(NAVIGATION + [body])
+
+
+def test_pages_seen_again_are_not_counted_twice(tmp_path):
+    learner = BoilerplateLearner(FileTemplateStore(str(tmp_path / "boilerplate.json")))
+    for _ in range(3):
+        for i in range(2):
+            learner.strip(f"https://example.jp/{i}", page(f"本文{i}"))
+    assert max(learner.hosts["example.jp"]["shingles"].values()) == 2
+    assert learner.remove("https://example.jp/9", page("本文9")) == page("本文9")
+
+
+def test_learned_template_is_shared_through_the_store(tmp_path):
+    path = str(tmp_path / "boilerplate.json")
+    learner = BoilerplateLearner(FileTemplateStore(path))
+    for i in range(3):
+        learner.strip(f"https://example.jp/{i}", page(f"本文{i}"))
+    assert BoilerplateLearner(FileTemplateStore(path)).remove("https://example.jp/9", page("本文9")) == "本文9"
+
+
+def test_host_stops_learning_at_the_page_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(boilerplate, "MAX_PAGES_PER_HOST", 2)
+    learner = BoilerplateLearner(FileTemplateStore(str(tmp_path / "boilerplate.json")))
+    for i in range(4):
+        learner.strip(f"https://example.jp/{i}", page(f"本文{i}"))
+    assert len(learner.hosts["example.jp"]["pages"]) == 2
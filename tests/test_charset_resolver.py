@@ -0,0 +1,44 @@
+"""charset_resolver の文字コードの決定順"""
+from charset_resolver import CharsetResolver
+
+TEXT = "本日は休館日です"
+
+
+def html(charset: str, declared: bool = True) -> bytes:
+    meta = f'<meta charset="{charset}">' if declared else ""
+    return f"<html><head>{meta}</head><body>{TEXT}</body></html>".encode(charset)
+
+
+def test_header_charset_wins_over_meta():
+    resolver = CharsetResolver()
+    content = html("cp932")
+    assert resolver.resolve("https://example.jp/a", content, "text/html; charset=Shift_JIS") == "cp932"
+    assert resolver.resolve("https://example.jp/a", html("utf-8"), "text/html; charset=utf-8") == "utf-8"
+
+
+def test_meta_declaration_wins_over_the_host_cache():
+    resolver = CharsetResolver()
+    resolver.host_charsets["example.jp"] = "cp932"
+    content = html("utf-8")
+    assert resolver.resolve("https://example.jp/new", content, "text/html") == "utf-8"
+    assert TEXT in resolver.decode("https://example.jp/new", content, "text/html")
+
+
+def test_undeclared_pages_use_the_host_cache():
+    resolver = CharsetResolver()
+    resolver.host_charsets["example.jp"] = "euc_jp"
+    assert resolver.resolve("https://example.jp/b", html("euc_jp", declared=False)) == "euc_jp"
+
+
+def test_detected_charset_is_remembered_per_host():
+    resolver = CharsetResolver()
+    assert resolver.resolve("https://example.jp/c", html("utf-8", declared=False)) == "utf-8"
+    assert resolver.host_charsets == {"example.jp": "utf-8"}
+
+
+def test_stale_host_charset_is_redetected_on_decode_error():
+    resolver = CharsetResolver()
+    resolver.host_charsets["example.jp"] = "utf-8"
+    content = html("cp932", declared=False)
+    assert TEXT in resolver.decode("https://example.jp/d", content)
+    assert resolver.host_charsets["example.jp"] != "utf-8"
@@ -0,0 +1,89 @@
+"""concurrency_limiter の AIMD 制御と負荷制限"""
+import pytest
+
+from concurrency_limiter import MIN_SAMPLES, THROTTLE_BACKOFF_SECONDS, AdaptiveConcurrencyLimiter, OverloadedError
+
+
+class Clock:
+    def __init__(self, now: float = 100.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def run(limiter: AdaptiveConcurrencyLimiter, latency: float = 0.1, throttled: bool = False) -> None:
+    assert limiter.try_acquire()
+    limiter.release(latency, throttled)
+
+
+def test_limit_grows_additively_with_successes():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, min_limit=1, max_limit=10, clock=Clock())
+    # +1/limit per success: about one step per limit's worth of completions
+    for _ in range(2):
+        run(limiter)
+    assert limiter.limit == 2
+    run(limiter)
+    assert limiter.limit == 3
+    for _ in range(100):
+        run(limiter)
+    assert limiter.limit == 10
+
+
+def test_throttle_halves_the_limit_and_sheds_during_backoff():
+    clock = Clock()
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8, min_limit=1, max_limit=10, clock=clock)
+    run(limiter, throttled=True)
+    assert limiter.limit == 4
+    assert not limiter.try_acquire()
+    assert limiter.retry_after() == THROTTLE_BACKOFF_SECONDS
+
+    clock.now += THROTTLE_BACKOFF_SECONDS
+    assert limiter.try_acquire()
+    assert limiter.snapshot()['shed'] == 1
+
+
+def test_decrease_applies_once_per_interval():
+    clock = Clock()
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8, min_limit=1, max_limit=10, clock=clock)
+    limiter.observe('bedrock', 0.1, throttled=True)
+    limiter.observe('bedrock', 0.1, throttled=True)
+    assert limiter.limit == 4
+    clock.now += 1
+    limiter.observe('bedrock', 0.1, throttled=True)
+    assert limiter.limit == 2
+
+
+def test_sustained_high_latency_decreases_the_limit():
+    clock = Clock()
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8, min_limit=1, max_limit=10, clock=clock)
+    for _ in range(MIN_SAMPLES):
+        assert not limiter.observe('scrape', 1.0)
+    congested = [limiter.observe('scrape', 10.0) for _ in range(3)]
+    assert congested[-1]
+    assert limiter.limit == 7
+    assert limiter.snapshot()['congested'] >= 1
+
+
+def test_requests_over_the_limit_are_shed():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, min_limit=1, max_limit=2, clock=Clock())
+    assert limiter.try_acquire() and limiter.try_acquire()
+    with pytest.raises(OverloadedError) as excinfo:
+        with limiter.permit():
+            pass
+    assert excinfo.value.retry_after >= 1
+    assert limiter.snapshot()['inFlight'] == 2
+
+
+def test_throttle_error_inside_a_permit_becomes_overloaded():
+    class ThrottlingException(Exception):
+        pass
+
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, min_limit=1, max_limit=4, clock=Clock())
+    with pytest.raises(OverloadedError):
+        with limiter.permit():
+            raise ThrottlingException("ThrottlingException: rate exceeded")
+    snapshot = limiter.snapshot()
+    assert snapshot['inFlight'] == 0
+    assert snapshot['throttles'] == 1
+    assert snapshot['limit'] == 2
@@ -0,0 +1,40 @@
+"""date_index の休館言及の判定"""
+from datetime import date
+
+from date_index import build_date_index
+
+
+def closed_on(text: str, target: date) -> bool:
+    return bool(build_date_index(text, target.year).closure_mentions(target))
+
+
+def test_exhibition_period_next_to_closed_days_label_is_not_a_closure():
+    text = "会期：2025年10月4日(土)～11月30日(日) 休館日：月曜日"
+    assert not closed_on(text, date(2025, 11, 5))
+
+
+def test_closed_days_label_does_not_govern_a_following_exhibition_period():
+    text = "休館日：月曜日 会期：2025年10月4日(土)～11月30日(日)"
+    assert not closed_on(text, date(2025, 11, 5))
+
+
+def test_keyword_in_same_sentence_but_not_attached_is_ignored():
+    text = "2025年10月5日(日) 講演会を開催します。詳しくはお問い合わせください。休館のお知らせ"
+    assert not closed_on(text, date(2025, 10, 5))
+
+
+def test_keyword_after_the_date_governs_it():
+    assert closed_on("2025年10月22日は臨時休館いたします。", date(2025, 10, 22))
+    assert closed_on("2025年12月29日〜1月3日まで休館", date(2026, 1, 2))
+
+
+def test_keyword_before_the_date_governs_it():
+    assert closed_on("臨時休館日：2025年10月22日(水)", date(2025, 10, 22))
+    assert closed_on("休館期間 2025年10月20日～10月24日", date(2025, 10, 23))
+
+
+def test_month_line_list_entries_follow_the_line_keyword():
+    text = "臨時休館日 10月 4(土)-10(金),14(火),21(火),28(火),29(水),30(木),31(金)"
+    assert closed_on(text, date(2025, 10, 5))
+    assert closed_on(text, date(2025, 10, 31))
+    assert not closed_on(text, date(2025, 10, 13))
@@ -0,0 +1,64 @@
+"""fast_path の定型質問判定"""
+from datetime import datetime
+
+import pytest
+
+from fast_path import is_long_running_query, parse_intent, resolve_date
+
+
+@pytest.mark.parametrize("query", [
+    "Is Kenrokuen open on October 5?",
+    "兼六園は来週の月曜日開いてる？",
+    "12/25 兼六園は開いてる？",
+    "Is Kenrokuen open on Monday?",
+    "兼六園は週末開いてる？",
+    "兼六園は10月5日と6日開いてる？",
+    "兼六園は10月5日、6日開いてる？",
+    "Is Kenrokuen open on the 5th?",
+    "Is Kenrokuen open this weekend?",
+])
+def test_unparsed_date_goes_to_agent(query):
+    assert parse_intent(query) is None
+
+
+@pytest.mark.parametrize("query, expression", [
+    ("兼六園は開いてる？", "今日"),
+    ("Is Kenrokuen open?", "今日"),
+    ("兼六園は明日開いてる？", "明日"),
+    ("Is Kenrokuen open tomorrow?", "明日"),
+    ("兼六園は10月5日開いてる？", "10月5日"),
+    ("兼六園は2025年10月20日開いてる？", "2025年10月20日"),
+    ("金沢21世紀美術館は今日開館してる？", "今日"),
+])
+def test_single_date_is_answered(query, expression):
+    intent = parse_intent(query)
+    assert intent is not None
+    assert intent.date_expression == expression
+
+
+def test_resolve_date_keeps_explicit_year():
+    today = datetime(2026, 10, 19)
+    assert resolve_date("2025年10月20日", today) == "2025-10-20"
+    assert resolve_date("10月20日", today) == "2026-10-20"
+    assert resolve_date("10月5日", today) == "2027-10-05"
+
+
+@pytest.mark.parametrize("query", [
+    "全施設は10月5日から開いてる？",
+    "全施設は10月5日まで開いてる？",
+    "Which facilities are open this weekend?",
+    "全施設は週末開いてる？",
+])
+def test_single_day_all_facility_queries_are_not_long_running(query):
+    assert not is_long_running_query(query)
+
+
+@pytest.mark.parametrize("query", [
+    "全施設はゴールデンウィーク開いてる？",
+    "全施設は来週どこが休み？",
+    "全施設は10月5日〜10月8日開いてる？",
+    "Which facilities are open next week?",
+    "Which facilities are closed during GW?",
+])
+def test_multi_day_all_facility_queries_are_long_running(query):
+    assert is_long_running_query(query)
@@ -0,0 +1,60 @@
+"""冪等キーの確保・再送・解放"""
+import time
+
+import pytest
+
+import lambda_handler
+from deadline import Deadline
+from idempotency_store import SQLiteIdempotencyStore
+from lambda_handler import begin_idempotent_request, finish_idempotent_request
+
+EVENT = {"headers": {"X-Forwarded-For": "203.0.113.7"}}
+BODY = {"query": "21世紀美術館は今日開いていますか"}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = SQLiteIdempotencyStore(str(tmp_path / "idempotency.sqlite3"))
+    monkeypatch.setattr(lambda_handler, "idempotency_store", store)
+    return store
+
+
+def ok_response():
+    return lambda_handler.create_cors_response(200, {"response": "開館しています"}, None)
+
+
+def test_completed_request_is_replayed(store):
+    assert begin_idempotent_request("key-1", BODY, EVENT, Deadline.after(5)) is None
+    finish_idempotent_request("key-1", EVENT, ok_response())
+    replay = begin_idempotent_request("key-1", BODY, EVENT, Deadline.after(5))
+    assert replay["statusCode"] == 200
+    assert replay["headers"]["Idempotent-Replayed"] == "true"
+
+
+def test_key_reused_for_a_different_request_is_rejected(store):
+    assert begin_idempotent_request("key-1", BODY, EVENT, Deadline.after(5)) is None
+    conflict = begin_idempotent_request("key-1", {"query": "別の質問"}, EVENT, Deadline.after(5))
+    assert conflict["statusCode"] == 422
+
+
+def test_retry_of_an_in_flight_request_gets_409_within_the_wait_cap(store, monkeypatch):
+    monkeypatch.setattr(lambda_handler, "IDEMPOTENCY_MAX_WAIT_SECONDS", 0.2)
+    monkeypatch.setattr(lambda_handler, "IDEMPOTENCY_POLL_INTERVAL", 0.05)
+    assert begin_idempotent_request("key-1", BODY, EVENT, Deadline.after(60)) is None
+    started = time.monotonic()
+    retry = begin_idempotent_request("key-1", BODY, EVENT, Deadline.after(60))
+    assert retry["statusCode"] == 409
+    assert retry["headers"]["Retry-After"]
+    assert time.monotonic() - started < 1
+
+
+def test_failed_request_releases_its_key(store):
+    assert begin_idempotent_request("key-1", BODY, EVENT, Deadline.after(5)) is None
+    finish_idempotent_request("key-1", EVENT, None)
+    assert begin_idempotent_request("key-1", BODY, EVENT, Deadline.after(5)) is None
+
+
+def test_keys_are_scoped_to_the_client(store):
+    assert begin_idempotent_request("key-1", BODY, EVENT, Deadline.after(5)) is None
+    other_client = {"headers": {"X-Forwarded-For": "198.51.100.2"}}
+    assert begin_idempotent_request("key-1", BODY, other_client, Deadline.after(5)) is None
@@ -0,0 +1,47 @@
+"""job_store のジョブの開始・中断・途中結果"""
+import job_store
+from job_store import (
+    JOB_FAILED, JOB_QUEUED, JOB_RUNNING, SQLiteJobStore, append_partial, job_view, new_job
+)
+
+
+def test_job_is_claimed_only_once(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+    job = new_job("range", {"dates": []}, 1)
+    store.create(job)
+    claimed = store.claim(job["job_id"], job["created_at"] + 60)
+    assert claimed["status"] == JOB_RUNNING
+    assert store.claim(job["job_id"], job["created_at"] + 60) is None
+
+
+def test_running_job_past_its_lease_is_reported_as_failed(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+    job = new_job("range", {"dates": []}, 1)
+    store.create(job)
+    claimed = store.claim(job["job_id"], job["created_at"] + 60)
+    assert job_view(claimed, now=job["created_at"] + 30)["status"] == JOB_RUNNING
+    view = job_view(claimed, now=job["created_at"] + 61)
+    assert view["status"] == JOB_FAILED
+    assert view["error"] == job_store.STALE_JOB_ERROR
+
+
+def test_queued_job_never_started_is_reported_as_failed():
+    job = new_job("range", {"dates": []}, 1)
+    assert job_view(job, now=job["created_at"] + 1)["status"] == JOB_QUEUED
+    later = job["created_at"] + job_store.JOB_START_TIMEOUT_SECONDS + 1
+    assert job_view(job, now=later)["status"] == JOB_FAILED
+
+
+def test_partial_results_are_capped(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_store, "JOB_MAX_RESULT_BYTES", 400)
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+    job = new_job("range", {"dates": []}, 3)
+    store.create(job)
+    for day in range(3):
+        append_partial(store, job, {"date": f"2026-10-0{day + 1}", "closed_facilities": [],
+                                    "details": ["x" * 100]})
+    stored = store.get(job["job_id"])
+    assert stored["progress"]["done"] == 3
+    assert stored["truncated"] is True
+    assert job_store._json_size(stored["partial"]) <= 400
+    assert "details" not in stored["partial"][-1]
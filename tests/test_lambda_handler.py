@@ -0,0 +1,67 @@
+"""lambda_handler の締め切りとジョブ処理"""
+import threading
+import time
+
+import pytest
+
+from concurrency_limiter import AdaptiveConcurrencyLimiter, OverloadedError
+from config import API_GATEWAY_TIMEOUT_SECONDS
+from deadline import Deadline
+import lambda_handler
+from lambda_handler import request_deadline, run_hedged, submit_job, worker_deadline
+
+
+class LambdaContext:
+    function_name = "kanazawa-cultural-facility-demo"
+
+    def __init__(self, remaining_seconds: float):
+        self.remaining_seconds = remaining_seconds
+
+    def get_remaining_time_in_millis(self) -> int:
+        return int(self.remaining_seconds * 1000)
+
+
+def test_request_deadline_is_capped_at_the_gateway_timeout():
+    assert request_deadline(LambdaContext(299)).remaining() <= API_GATEWAY_TIMEOUT_SECONDS
+    assert request_deadline(LambdaContext(10)).remaining() <= 10
+
+
+def test_worker_deadline_uses_the_whole_invocation():
+    assert worker_deadline(LambdaContext(299)).remaining() > 290
+
+
+def test_losing_hedge_path_holds_its_permit_until_it_finishes():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, min_limit=1, max_limit=4)
+    release_loser = threading.Event()
+
+    def slow_agent():
+        release_loser.wait(5)
+        return ["late"]
+
+    results = list(run_hedged([("agent", slow_agent), ("bedrock", lambda: ["fast"])],
+                              Deadline.after(5), hedge_delay=0.05, limiter=limiter))
+    assert results == [("bedrock", "fast")]
+    assert limiter.snapshot()["inFlight"] == 1
+
+    release_loser.set()
+    for _ in range(100):
+        if limiter.snapshot()["inFlight"] == 0:
+            break
+        time.sleep(0.01)
+    assert limiter.snapshot()["inFlight"] == 0
+
+
+def test_run_hedged_sheds_when_no_permit_is_available():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, min_limit=1, max_limit=1)
+    assert limiter.try_acquire()
+    with pytest.raises(OverloadedError):
+        list(run_hedged([("agent", lambda: ["x"])], Deadline.after(1), limiter=limiter))
+
+
+def test_jobs_are_rejected_on_lambda_without_a_shared_store(monkeypatch):
+    monkeypatch.setattr(lambda_handler.job_store, "shared", False)
+    created = []
+    monkeypatch.setattr(lambda_handler.job_store, "create", created.append)
+    response = submit_job("range", {"dates": [], "facilities": []}, 1, LambdaContext(299), None)
+    assert response["statusCode"] == 501
+    assert created == []
@@ -0,0 +1,96 @@
+"""model_invoker の再試行の予算と優先度付きの実行枠"""
+import threading
+import time
+
+import pytest
+
+import model_invoker
+from concurrency_limiter import AdaptiveConcurrencyLimiter
+from model_invoker import FakeBedrockClient, ModelInvoker, PriorityGate, RetryBudget
+
+MODEL_ID = "anthropic.claude-3-haiku-20240307-v1:0"
+BODY = {"anthropic_version": "bedrock-2023-05-31", "max_tokens": 10,
+        "messages": [{"role": "user", "content": "21世紀美術館は開いていますか"}]}
+
+
+@pytest.fixture(autouse=True)
+def isolated_limiter(monkeypatch):
+    # スロットリングの観測がプロセス全体の同時実行数の制御に残らないようにする
+    monkeypatch.setattr(model_invoker, "concurrency_limiter", AdaptiveConcurrencyLimiter())
+
+
+class CountingClient(FakeBedrockClient):
+    def __init__(self, **kwargs):
+        super().__init__(latency=0.0, **kwargs)
+        self.attempts = 0
+
+    def _wait(self, operation: str) -> None:
+        self.attempts += 1
+        super()._wait(operation)
+
+
+def throttled_invoker(budget: RetryBudget):
+    client = CountingClient(throttle_rate=1.0)
+    invoker = ModelInvoker(client_factory=lambda region, **kwargs: client, sleep=lambda seconds: None)
+    invoker.retry_budget = budget
+    return invoker, client
+
+
+def test_retry_budget_refills_in_proportion_to_calls():
+    budget = RetryBudget(ratio=0.5, capacity=1.0)
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert budget.withdraw()
+
+
+def test_throttled_calls_stop_retrying_when_the_budget_is_spent():
+    invoker, client = throttled_invoker(RetryBudget(ratio=0.0, capacity=1.0))
+    with pytest.raises(Exception, match="ThrottlingException"):
+        invoker.invoke("test", MODEL_ID, BODY)
+    assert client.attempts == 2
+
+    with pytest.raises(Exception, match="ThrottlingException"):
+        invoker.invoke("test", MODEL_ID, BODY)
+    assert client.attempts == 3
+    snapshot = invoker.snapshot()["callers"]["test"]
+    assert snapshot["retries"] == 1
+    assert snapshot["errors"] == 2
+
+
+def test_successful_call_returns_the_body_and_frees_its_slot():
+    client = CountingClient()
+    invoker = ModelInvoker(max_concurrency=1, client_factory=lambda region, **kwargs: client)
+    assert "content" in invoker.invoke("test", MODEL_ID, BODY)
+    assert invoker.gate.acquire(model_invoker.PRIORITY_INTERACTIVE, 0.1)
+
+
+def test_gate_serves_interactive_before_background():
+    gate = PriorityGate(1)
+    assert gate.acquire(model_invoker.PRIORITY_INTERACTIVE, 1)
+    order = []
+
+    def wait(priority: int, name: str) -> None:
+        if gate.acquire(priority, 5):
+            order.append(name)
+            gate.release()
+
+    threads = [threading.Thread(target=wait, args=(model_invoker.PRIORITY_BACKGROUND, "background")),
+               threading.Thread(target=wait, args=(model_invoker.PRIORITY_INTERACTIVE, "interactive"))]
+    for thread in threads:
+        thread.start()
+        while gate.queued() < threads.index(thread) + 1:
+            time.sleep(0.01)
+    gate.release()
+    for thread in threads:
+        thread.join(5)
+    assert order == ["interactive", "background"]
+
+
+def test_gate_gives_up_after_the_timeout():
+    gate = PriorityGate(1)
+    assert gate.acquire(model_invoker.PRIORITY_INTERACTIVE, 1)
+    assert not gate.acquire(model_invoker.PRIORITY_BACKGROUND, 0.05)
+    assert gate.queued() == 0
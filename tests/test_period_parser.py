@@ -0,0 +1,36 @@
+"""period_parser の期間表現の解釈"""
+from datetime import date
+
+from period_parser import find_closure_period, parse_periods
+
+
+def test_open_start_period_that_already_ended_is_rejected():
+    assert parse_periods("11月30日まで休館", date(2025, 12, 12), target=date(2025, 12, 12)) == []
+    assert find_closure_period("11月30日まで休館", date(2025, 12, 12), date(2025, 12, 12)) is None
+
+
+def test_open_start_period_starts_at_the_reference_date():
+    period = find_closure_period("11月30日まで休館", date(2025, 11, 10), date(2025, 10, 19))
+    assert (period.start, period.end) == (date(2025, 10, 19), date(2025, 11, 30))
+
+
+def test_open_start_period_read_at_year_end_wraps_into_january():
+    period = find_closure_period("1月10日まで休館", date(2026, 1, 5), date(2025, 12, 20))
+    assert period.end == date(2026, 1, 10)
+
+
+def test_year_wrapping_range_resolves_to_the_span_containing_the_target():
+    period = find_closure_period("年末年始（12月29日～1月3日）は休館", date(2026, 1, 2), date(2025, 12, 1))
+    assert (period.start, period.end) == (date(2025, 12, 29), date(2026, 1, 3))
+
+
+def test_era_period_from_manual_notice():
+    notice = "令和7年9月から12月中旬（予定）まで、工事のため休館"
+    period = find_closure_period(notice, date(2025, 10, 20), date(2025, 10, 19))
+    assert period.start == date(2025, 9, 1)
+    assert period.confidence_for(date(2025, 10, 20)) > 0.7
+
+
+def test_exhibition_period_is_not_governed_by_closed_days_heading():
+    text = "会期：2025年10月4日(土)～11月30日(日) 休館日：月曜日"
+    assert find_closure_period(text, date(2025, 11, 5), date(2025, 10, 19)) is None
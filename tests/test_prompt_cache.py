@@ -0,0 +1,36 @@
+"""prompt_cache のチェックポイントとスタブの最小トークン数"""
+import json
+
+from prompt_cache import StubBedrockClient, cache_min_tokens, cached_request_body, cached_system_blocks
+from prompts import ENHANCED_FACILITY_CONTEXT, ENHANCED_SYSTEM_PROMPT
+
+MODEL_ID = "us.anthropic.claude-3-7-sonnet-20250219-v1:0"
+
+
+def invoke(client, blocks):
+    body = cached_request_body(blocks, [{"role": "user", "content": "兼六園は今日開いてる？"}], max_tokens=10)
+    response = client.invoke_model(MODEL_ID, json.dumps(body))
+    return json.loads(response["body"].read())["usage"]
+
+
+def test_system_prompt_alone_is_too_short_for_a_checkpoint():
+    blocks = cached_system_blocks(ENHANCED_SYSTEM_PROMPT, min_tokens=cache_min_tokens(MODEL_ID))
+    assert not any("cache_control" in block for block in blocks)
+
+
+def test_checkpoint_after_facility_directory_is_cached():
+    client = StubBedrockClient()
+    blocks = cached_system_blocks(ENHANCED_SYSTEM_PROMPT, ENHANCED_FACILITY_CONTEXT,
+                                  min_tokens=cache_min_tokens(MODEL_ID))
+    assert "cache_control" in blocks[-1]
+    assert invoke(client, blocks)["cache_creation_input_tokens"] > 0
+    assert invoke(client, blocks)["cache_read_input_tokens"] > 0
+
+
+def test_stub_ignores_checkpoints_below_the_minimum():
+    client = StubBedrockClient()
+    blocks = cached_system_blocks(ENHANCED_SYSTEM_PROMPT, min_tokens=0)
+    invoke(client, blocks)
+    usage = invoke(client, blocks)
+    assert usage["cache_read_input_tokens"] == 0
+    assert usage["cache_creation_input_tokens"] == 0
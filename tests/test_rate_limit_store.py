@@ -0,0 +1,57 @@
+"""rate_limit_store の共有バケットと障害時のフォールバック"""
+import rate_limiter
+from rate_limit_store import SQLiteBucketStore
+from rate_limiter import AdvancedRateLimiter
+
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FailingStore:
+    def __init__(self):
+        self.calls = 0
+
+    def consume(self, buckets, cost):
+        self.calls += 1
+        raise ConnectionError("store unavailable")
+
+
+def test_store_charges_all_buckets_or_none(tmp_path):
+    store = SQLiteBucketStore(str(tmp_path / "buckets.sqlite3"))
+    assert store.consume([("a", 5, 1.0), ("b", 2, 1.0)], 2) == (True, [5, 2])
+    allowed, tokens = store.consume([("a", 5, 1.0), ("b", 2, 1.0)], 2)
+    assert not allowed
+    assert tokens[0] >= 3 and tokens[1] < 2
+    assert store.consume([("a", 5, 1.0)], 3)[0]
+
+
+def test_limiters_share_buckets_through_the_store(tmp_path):
+    path = str(tmp_path / "buckets.sqlite3")
+    first = AdvancedRateLimiter(store=SQLiteBucketStore(path))
+    second = AdvancedRateLimiter(store=SQLiteBucketStore(path))
+    rule = first.rules[rate_limiter.RateLimitType.PER_IP]
+    capacity = rule.max_requests + rule.burst_allowance
+    assert first.acquire("203.0.113.7", cost=capacity)[0].allowed
+    assert not second.acquire("203.0.113.7")[0].allowed
+
+
+def test_store_error_falls_back_to_local_buckets_until_retry():
+    clock = Clock()
+    store = FailingStore()
+    limiter = AdvancedRateLimiter(clock=clock, store=store)
+    assert limiter.acquire("203.0.113.7")[0].allowed
+    assert limiter.tracked_identifiers() == 1
+    assert store.calls == 1
+
+    # The store is skipped while the retry interval lasts
+    limiter.acquire("203.0.113.7")
+    assert store.calls == 1
+
+    clock.now += rate_limiter.STORE_RETRY_SECONDS
+    assert limiter.acquire("203.0.113.7")[0].allowed
+    assert store.calls == 2
@@ -0,0 +1,77 @@
+"""rate_limiter のトークンバケット"""
+from rate_limiter import MAX_REQUEST_COST, AdvancedRateLimiter, RateLimitType, request_cost
+
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def per_ip_capacity(limiter: AdvancedRateLimiter) -> int:
+    rule = limiter.rules[RateLimitType.PER_IP]
+    return rule.max_requests + rule.burst_allowance
+
+
+def test_bucket_refills_over_time():
+    clock = Clock()
+    limiter = AdvancedRateLimiter(clock=clock)
+    for _ in range(per_ip_capacity(limiter)):
+        assert limiter.acquire("203.0.113.7")[0].allowed
+    result, limit_type = limiter.acquire("203.0.113.7")
+    assert not result.allowed and limit_type == RateLimitType.PER_IP
+    assert result.retry_after == 6
+
+    clock.now += 6
+    assert limiter.acquire("203.0.113.7")[0].allowed
+    assert not limiter.acquire("203.0.113.7")[0].allowed
+
+
+def test_denied_request_charges_no_bucket():
+    clock = Clock()
+    limiter = AdvancedRateLimiter(clock=clock)
+    capacity = per_ip_capacity(limiter)
+    assert not limiter.acquire("203.0.113.7", cost=capacity + 1)[0].allowed
+    assert limiter.tracked_identifiers() == 0
+    assert limiter.acquire("203.0.113.7", cost=capacity)[0].allowed
+
+
+def test_expiry_wheel_drops_refilled_buckets():
+    clock = Clock()
+    limiter = AdvancedRateLimiter(clock=clock)
+    limiter.acquire("203.0.113.7")
+    assert limiter.tracked_identifiers() == 1
+
+    # One token refills in 6 seconds; the next call advances the wheel past it
+    clock.now += 7
+    limiter.acquire("198.51.100.2")
+    assert "203.0.113.7" not in limiter._buckets[RateLimitType.PER_IP]
+    assert limiter.tracked_identifiers() == 1
+
+
+def test_expiry_wheel_keeps_buckets_that_are_not_full_yet():
+    clock = Clock()
+    limiter = AdvancedRateLimiter(clock=clock)
+    limiter.acquire("203.0.113.7", cost=5)
+    clock.now += 7
+    limiter.acquire("198.51.100.2")
+    assert "203.0.113.7" in limiter._buckets[RateLimitType.PER_IP]
+
+
+def test_request_cost_weights_work_and_agent_use():
+    assert request_cost(1, 1, needs_agent=False) == 1
+    assert request_cost(1, 1, needs_agent=True) == 2
+    assert request_cost(6, 2, needs_agent=False) == 2
+    assert request_cost(20, 31, needs_agent=True) == MAX_REQUEST_COST
+
+
+def test_heavy_request_drains_more_tokens():
+    clock = Clock()
+    limiter = AdvancedRateLimiter(clock=clock)
+    capacity = per_ip_capacity(limiter)
+    assert MAX_REQUEST_COST < capacity
+    assert limiter.acquire("203.0.113.7", cost=MAX_REQUEST_COST)[0].remaining == capacity - MAX_REQUEST_COST
+    assert not limiter.acquire("203.0.113.7", cost=MAX_REQUEST_COST)[0].allowed
+    assert limiter.acquire("203.0.113.7", cost=1)[0].allowed
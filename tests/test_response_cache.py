@@ -0,0 +1,65 @@
+"""response_cache のキーの正規化と2層の読み書き"""
+from datetime import datetime
+
+from response_cache import PAST_DATE_TTL, MemoryTier, ResponseCache, SQLiteStore, build_cache_key, ttl_for
+
+TODAY = datetime(2026, 10, 19)
+
+
+def key(query: str, language: str = "ja") -> str:
+    return build_cache_key(query, language, TODAY)[0]
+
+
+def test_facility_aliases_share_a_key():
+    assert key("21世紀美術館は明日開いていますか") == key("金沢21世紀美術館は明日開いていますか")
+
+
+def test_relative_and_absolute_dates_share_a_key():
+    assert key("兼六園は明日開いていますか") == key("兼六園は10月20日開いていますか")
+    assert key("兼六園は明日開いていますか") == key("兼六園は2026-10-20開いていますか")
+
+
+def test_punctuation_and_spacing_do_not_change_the_key():
+    assert key("兼六園は 明日、開いていますか？") == key("兼六園は明日開いていますか")
+
+
+def test_question_without_a_date_is_about_today():
+    assert build_cache_key("兼六園は開いていますか", "ja", TODAY)[1]["dates"] == ["2026-10-19"]
+
+
+def test_language_facility_and_date_separate_keys():
+    base = key("兼六園は明日開いていますか")
+    assert base != key("兼六園は明日開いていますか", language="en")
+    assert base != key("兼六園は明後日開いていますか")
+    assert base != key("21世紀美術館は明日開いていますか")
+
+
+def test_past_dates_are_kept_longer():
+    _, parts = build_cache_key("兼六園は2026-10-01開いていましたか", "ja", TODAY)
+    assert ttl_for(parts, TODAY) == PAST_DATE_TTL
+    _, parts = build_cache_key("兼六園は明日開いていますか", "ja", TODAY)
+    assert ttl_for(parts, TODAY) < PAST_DATE_TTL
+
+
+def test_shared_hit_is_promoted_to_memory(tmp_path):
+    shared = SQLiteStore(str(tmp_path / "cache.sqlite3"))
+    ResponseCache(MemoryTier(8), shared).put("k", {"response": "開館"}, 60)
+
+    cache = ResponseCache(MemoryTier(8), shared)
+    value, meta = cache.get("k")
+    assert value == {"response": "開館"} and meta["tier"] == "shared"
+    assert cache.get("k")[1]["tier"] == "memory"
+
+
+def test_shared_store_errors_are_misses():
+    class BrokenStore:
+        def get(self, key):
+            raise ConnectionError("unavailable")
+
+        def put(self, key, value, expires_at):
+            raise ConnectionError("unavailable")
+
+    cache = ResponseCache(MemoryTier(8), BrokenStore())
+    assert cache.get("k") == (None, {"status": "miss"})
+    cache.put("k", {"response": "開館"}, 60)
+    assert cache.get("k")[0] == {"response": "開館"}
@@ -0,0 +1,31 @@
+"""ページテキストの正規化
+
+取得したテキストを1回だけ正規化し、以降の正規表現・キーワード走査・AIプロンプトは
+正規化済みテキストだけを対象にする。
+- NFKC（全角数字・全角括弧・全角英字 → 半角）
+- 波ダッシュ・チルダ類 → 「〜」、ダッシュ類 → 「-」
+- 曜日表記「（月曜日）」「(月曜)」→「(月)」
+- 空白の連続を1つにまとめ、行頭・行末の空白と空行を除去
+"""
+import re
+import unicodedata
+
+_TILDE_PATTERN = re.compile(r'[~〜〰]')
+_DASH_PATTERN = re.compile(r'[‐‑‒–—―−]')
+_WEEKDAY_MARKER_PATTERN = re.compile(r'\(\s*([月火水木金土日])(?:曜日?)?\s*\)')
+_INLINE_SPACE_PATTERN = re.compile(r'[^\S\n]+')
+_BLANK_LINES_PATTERN = re.compile(r'\n{2,}')
+
+
+def normalize_text(text: str) -> str:
+    """テキストを正規化"""
+    if not text:
+        return ""
+    text = unicodedata.normalize('NFKC', text)
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    text = _TILDE_PATTERN.sub('〜', text)
+    text = _DASH_PATTERN.sub('-', text)
+    text = _WEEKDAY_MARKER_PATTERN.sub(r'(\1)', text)
+    text = _INLINE_SPACE_PATTERN.sub(' ', text)
+    text = '\n'.join(line.strip() for line in text.split('\n'))
+    return _BLANK_LINES_PATTERN.sub('\n', text).strip()
@@ -0,0 +1,117 @@
+"""エージェントのツール結果の圧縮
+
+休館判定エンジンの結果には取得したページ本文・AI の生応答などの診断用フィールドが含まれ、
+そのままツール結果として返すと毎ターンの入力トークンが大きくなる。モデルには判定・理由・
+信頼度・情報源・判定時刻だけを渡し（JSON への変換は closure_models.dumps）、判定結果は
+diagnostics_store に保存して ID（get_closure_diagnostics ツールで取得）だけを添える。
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from closure_models import Verdict
+
+# 判定
+VERDICT_OPEN = "open"
+VERDICT_CLOSED = "closed"
+VERDICT_UNKNOWN = "unknown"
+
+# 診断情報の保持件数と有効期限（秒）
+DIAGNOSTICS_MAX_ENTRIES = 512
+DIAGNOSTICS_TTL = 30 * 60
+
+
+class DiagnosticsStore:
+    """診断情報の保存先（プロセス内、件数と有効期限で古いものから破棄）"""
+
+    def __init__(self, max_entries: int = DIAGNOSTICS_MAX_ENTRIES, ttl: float = DIAGNOSTICS_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, diagnostics: Any) -> str:
+        """保存して ID を返す"""
+        diagnostics_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._entries[diagnostics_id] = (time.time() + self.ttl, diagnostics)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return diagnostics_id
+
+    def get(self, diagnostics_id: str) -> Optional[Any]:
+        """保存した診断情報（期限切れ・不明な ID なら None）"""
+        with self._lock:
+            entry = self._entries.get(diagnostics_id)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[diagnostics_id]
+                return None
+            return entry[1]
+
+
+def compact_closure(verdict: Verdict) -> Dict[str, Any]:
+    """1施設の判定結果をモデル向けの形に圧縮し、判定結果を診断情報として保存する
+
+    Args:
+        verdict: facility_closure_verdict の判定結果
+
+    Returns:
+        facility・date・verdict・reason・confidence・source・as_of・diagnostics_id
+    """
+    compact: Dict[str, Any] = {"facility": verdict.facility, "date": verdict.date}
+    if verdict.is_closed is None:
+        compact["verdict"] = VERDICT_UNKNOWN
+        compact["error"] = verdict.error or "判定できませんでした"
+    else:
+        compact["verdict"] = VERDICT_CLOSED if verdict.is_closed else VERDICT_OPEN
+        if verdict.weekday:
+            compact["weekday"] = verdict.weekday
+        compact["reason"] = verdict.reason
+        if isinstance(verdict.confidence, (int, float)):
+            compact["confidence"] = round(float(verdict.confidence), 2)
+        compact["source"] = verdict.source or "公式サイト"
+    compact["as_of"] = datetime.fromtimestamp(verdict.as_of).isoformat(timespec="seconds")
+    compact["diagnostics_id"] = diagnostics_store.put(verdict)
+    return compact
+
+
+def compact_summary(summary: Dict[str, Any]) -> Dict[str, Any]:
+    """全施設の判定結果を圧縮する（開館施設は名前のみ、休館・判定不能の施設は理由つき）
+
+    Args:
+        summary: all_facilities_closure_summary の結果（details は Verdict のリスト）
+
+    Returns:
+        date・件数・closed・open・unknown・as_of・diagnostics_id
+    """
+    closed, opened, unknown = [], [], []
+    for verdict in summary.get("details", []):
+        item = compact_closure(verdict)
+        if item["verdict"] == VERDICT_OPEN:
+            opened.append(item["facility"])
+            continue
+        entry = {key: item[key] for key in ("facility", "reason", "confidence", "source", "error",
+                                           "diagnostics_id") if key in item}
+        (closed if item["verdict"] == VERDICT_CLOSED else unknown).append(entry)
+    compact = {
+        "date": summary.get("date"),
+        "total_facilities": summary.get("total_facilities", len(summary.get("details", []))),
+        "closed_count": len(closed),
+        "open_count": len(opened),
+        "closed": closed,
+        "open": opened,
+    }
+    if unknown:
+        compact["unknown"] = unknown
+    compact["as_of"] = datetime.now().isoformat(timespec="seconds")
+    compact["diagnostics_id"] = diagnostics_store.put(summary)
+    return compact
+
+
+# プロセス全体の診断情報ストア
+diagnostics_store = DiagnosticsStore()